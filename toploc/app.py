@@ -5,6 +5,7 @@ import shutil
 from model_utils import load_dataset_from_hf, load_model_from_hf
 from prover import ModelProver
 from verifier import Verifier
+from toploc.autotune import load_tuned_params
 
 app = Flask(__name__)
 
@@ -27,12 +28,27 @@ def run_task():
         "topk": 4,
         "skip_prefill": False
     }
+    # Parameters saved by toploc.autotune take precedence over the defaults
+    tuned_params_path = os.environ.get("TOPLOC_TUNED_PARAMS")
+    if tuned_params_path:
+        prover_params = load_tuned_params(tuned_params_path).prover_params()
+    # Thread-count-invariant inference, the same for predict and verify
+    if request.form.get("deterministic"):
+        prover_params["deterministic"] = True
+    # Batch-invariant inference, the same for predict and verify
+    if request.form.get("batch_invariant"):
+        prover_params["batch_invariant"] = True
+    # Samples per forward pass, an integer or "auto", the same for predict and verify
+    chunk_size = request.form.get("chunk_size")
+    if chunk_size:
+        prover_params["chunk_size"] = chunk_size
 
     if task == "verify":
         if not proof:
             return "Proof is required for verification task", 400
         verifier = Verifier()
-        result = verifier.verify_proof(model, proof, prover_params, X, y)
+        claimed_accuracy = request.form.get("accuracy", type=float)
+        result = verifier.verify_proof(model, proof, prover_params, X, y, claimed_accuracy=claimed_accuracy)
         return f"Verification success: {result}"
 
     elif task == "predict":
@@ -0,0 +1,44 @@
+"""
+Microbenchmark of the native verification kernel per decode batch size.
+"""
+
+from toploc import build_proofs, verify_proofs
+import torch
+from torch.utils.benchmark import Timer
+
+TOPK = 128
+SHAPE = (1024, 5120)
+BATCH_SIZES = (1, 4, 16, 32, 64)
+BENCH_ITERATIONS = 5
+
+
+if __name__ == "__main__":
+    torch.manual_seed(42)
+    activations = torch.randn(SHAPE, dtype=torch.bfloat16)
+
+    for decode_batching_size in BATCH_SIZES:
+        proofs = build_proofs(
+            activations,
+            decode_batching_size=decode_batching_size,
+            topk=TOPK,
+            skip_prefill=True,
+        )
+        time_ms = (
+            Timer(
+                stmt="verify_proofs(activations, proofs, decode_batching_size=decode_batching_size, topk=TOPK, skip_prefill=True)",
+                globals={
+                    "verify_proofs": verify_proofs,
+                    "activations": activations,
+                    "proofs": proofs,
+                    "decode_batching_size": decode_batching_size,
+                    "TOPK": TOPK,
+                },
+            )
+            .timeit(BENCH_ITERATIONS)
+            .mean
+            * 1000
+        )
+        print(
+            f"decode_batching_size={decode_batching_size:>3}: {time_ms:8.2f} ms total, "
+            f"{time_ms * 1000 / len(proofs):8.2f} us per batch ({len(proofs)} batches)"
+        )
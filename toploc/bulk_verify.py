@@ -0,0 +1,171 @@
+"""Verify every stored proof, loading each model and dataset only once.
+
+Proofs written by ModelProver.store_proof are grouped by (model_url,
+dataset_url). Each group loads its model and dataset once, runs the forward
+pass once per forward configuration, and verifies all of its proofs and
+their claimed accuracy in parallel. The native verification releases the
+GIL, so a thread pool is enough.
+
+Usage:
+    python bulk_verify.py --proofs_dir proofs --output results.csv
+    python bulk_verify.py --manifest nightly.txt --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from model_utils import load_dataset_from_hf, load_model_from_hf, is_batch_invariant, recompute_forward
+from toploc import LayerProofs, verify_and_decide_base64, verify_and_decide_layers
+from toploc.utils import sha256_tensor
+from verifier import check_claims
+
+RESULT_FIELDS = ["path", "model_url", "dataset_url", "passed", "claims_passed", "num_proofs", "num_failed", "error"]
+
+# keys written by ModelProver.store_proof that verification cannot do without
+REQUIRED_KEYS = ["model_url", "dataset_url", "proof", "prover_params"]
+
+def find_proofs(proofs_dir=None, manifest=None):
+    """Proof files listed in a manifest, one path per line, or in a directory."""
+    if manifest:
+        # paths in a manifest are relative to the manifest itself
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            lines = [line.strip() for line in f]
+        return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+    return sorted(
+        os.path.join(proofs_dir, name) for name in os.listdir(proofs_dir) if name.endswith(".json")
+    )
+
+def load_proof(path):
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    # proofs stored before the key was fixed use "datset_url"
+    data.setdefault("dataset_url", data.get("datset_url"))
+    return data
+
+def _forward_key(prover_params):
+    """Proofs with the same key are verified against the same activations."""
+    return (
+        bool(prover_params.get("multi_layer")),
+        # batch-invariant activations do not depend on the chunking
+        None if is_batch_invariant(prover_params) else prover_params.get("chunk_size"),
+        prover_params.get("capture_layer"),
+        bool(prover_params.get("deterministic")),
+        bool(prover_params.get("batch_invariant")),
+    )
+
+def verify_stored_proof(data, forward, y):
+    """Verdict of a stored proof and whether its claimed accuracy matches."""
+    predictions, activations = forward
+    prover_params = data["prover_params"]
+    claims_passed = check_claims(predictions, y, claimed_accuracy=data.get("accuracy"))
+    if prover_params.get("multi_layer"):
+        layer_proofs = LayerProofs.from_base64(json.loads(data["proof"]), topk=prover_params["topk"])
+        return verify_and_decide_layers(activations, layer_proofs, exp_mismatch_threshold=0), claims_passed
+    return verify_and_decide_base64(
+        activations,
+        data["proof"].split('~'),
+        decode_batching_size=prover_params["decode_batching_size"],
+        topk=prover_params["topk"],
+        skip_prefill=prover_params["skip_prefill"],
+        exp_mismatch_threshold=0,
+    ), claims_passed
+
+def _result(path, data=None, verdict=None, claims_passed=False, error=None):
+    data = data or {}
+    return {
+        "path": path,
+        "model_url": data.get("model_url"),
+        "dataset_url": data.get("dataset_url"),
+        "passed": verdict is not None and verdict.passed and claims_passed,
+        "claims_passed": claims_passed,
+        "num_proofs": verdict.num_proofs if verdict is not None else 0,
+        "num_failed": verdict.num_failed if verdict is not None else 0,
+        "error": error,
+    }
+
+def bulk_verify(paths, max_workers=None, load_model=load_model_from_hf, load_dataset=load_dataset_from_hf):
+    """Verify proof files and return one result row per path, in order."""
+    results = {}
+    groups = defaultdict(list)
+    for path in paths:
+        try:
+            data = load_proof(path)
+        except (OSError, ValueError) as e:
+            results[path] = _result(path, error=f"Could not read proof: {e}")
+            continue
+        missing = [key for key in REQUIRED_KEYS if data.get(key) is None]
+        if missing:
+            results[path] = _result(path, data, error=f"Proof was stored without {', '.join(missing)}")
+            continue
+        groups[(data["model_url"], data["dataset_url"])].append((path, data))
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        for (model_url, dataset_url), proofs in groups.items():
+            print(f"Verifying {len(proofs)} proofs of {model_url} on {dataset_url}...")
+            try:
+                model = load_model(model_url)
+                model.eval()
+                X, y = load_dataset(dataset_url)
+            except Exception as e:
+                for path, data in proofs:
+                    results[path] = _result(path, data, error=f"Could not load model or dataset: {e}")
+                continue
+            digest = sha256_tensor(X)
+
+            # the predictions and activations of a forward pass are shared by
+            # all proofs of the group with the same forward configuration and
+            # dropped once the group is done
+            forwards = {}
+            futures = {}
+            for path, data in proofs:
+                if data.get("dataset_digest", digest) != digest:
+                    results[path] = _result(path, data, error="Dataset digest does not match the proof")
+                    continue
+                key = _forward_key(data["prover_params"])
+                try:
+                    if key not in forwards:
+                        forwards[key] = recompute_forward(model, X, data["prover_params"])
+                except Exception as e:
+                    results[path] = _result(path, data, error=f"Could not recompute activations: {e}")
+                    continue
+                futures[path] = (data, executor.submit(verify_stored_proof, data, forwards[key], y))
+
+            for path, (data, future) in futures.items():
+                try:
+                    verdict, claims_passed = future.result()
+                    results[path] = _result(path, data, verdict, claims_passed)
+                except Exception as e:
+                    results[path] = _result(path, data, error=f"Could not verify proof: {e}")
+
+    return [results[path] for path in paths]
+
+def write_results(results, output):
+    with open(output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify all stored proofs, loading each model and dataset once")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--proofs_dir", default="proofs", help="Directory with proof_<ns>.json files")
+    source.add_argument("--manifest", help="Text file with one proof path per line")
+    parser.add_argument("--workers", type=int, default=None, help="Proofs verified in parallel")
+    parser.add_argument("--output", default="verification_results.csv", help="CSV file for the results table")
+    args = parser.parse_args()
+
+    paths = find_proofs(args.proofs_dir, args.manifest)
+    results = bulk_verify(paths, max_workers=args.workers)
+    write_results(results, args.output)
+
+    num_passed = sum(result["passed"] for result in results)
+    print(f"{num_passed}/{len(results)} proofs passed, results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import argparse
 from model_utils import load_dataset_from_hf, load_model_from_hf
 from prover import ModelProver, PROOFS_DIR, TRAINED_MODELS_DIR
 from verifier import Verifier
+from toploc.autotune import load_tuned_params
 
 def cleanup():
     if os.path.exists(PROOFS_DIR):
@@ -22,8 +23,17 @@ def main():
     parser.add_argument("--model_url", required=True, help="Hugging Face URL to .pt model file")
     parser.add_argument("--task", choices=["predict", "verify"], required=True, help="Task to run: predict or verify")
     parser.add_argument("--proof", help="Provided proof in single string deleimited by ~")
+    parser.add_argument("--tuned_params", help="JSON file with prover parameters saved by toploc.autotune")
+    parser.add_argument("--claimed_accuracy", type=float, help="Accuracy claimed by the prover, checked during verify")
+    parser.add_argument("--deterministic", action="store_true", help="Thread-count-invariant inference; predict and verify must both use it")
+    parser.add_argument("--batch_invariant", action="store_true", help="Batch-invariant inference, lets verify use its own --chunk_size")
+    parser.add_argument("--audit_sample", type=float, help="Only audit --claimed_accuracy on this fraction of rows, needs decode_batching_size 1")
+    parser.add_argument("--seed", type=int, help="Seed of the audit sample")
+    parser.add_argument("--chunk_size", help="Samples per forward pass, an integer or 'auto'; verify needs the value used to predict")
 
     args = parser.parse_args()
+    if args.audit_sample is not None and args.claimed_accuracy is None:
+        parser.error("--audit_sample needs --claimed_accuracy")
     dataset_url = args.dataset_url
     model_url = args.model_url
     task = args.task
@@ -37,12 +47,24 @@ def main():
         "topk": 4,
         "skip_prefill": False
     }
+    if args.tuned_params:
+        prover_params = load_tuned_params(args.tuned_params).prover_params()
+    if args.deterministic:
+        prover_params["deterministic"] = True
+    if args.batch_invariant:
+        prover_params["batch_invariant"] = True
+    if args.chunk_size:
+        prover_params["chunk_size"] = args.chunk_size
 
     if task == "verify":
         proof = args.proof
         verifier = Verifier()
-        results_success = verifier.verify_proof(model, proof, prover_params, X, y)
-        print("Verification success:", results_success)
+        if args.audit_sample is not None:
+            audit = verifier.audit_proof(model, proof, prover_params, X, y, args.claimed_accuracy, sample=args.audit_sample, seed=args.seed)
+            print(f"Audit: {audit['passed']}, accuracy interval {audit['accuracy_interval']} at {audit['confidence']} confidence")
+        else:
+            results_success = verifier.verify_proof(model, proof, prover_params, X, y, claimed_accuracy=args.claimed_accuracy)
+            print("Verification success:", results_success)
     elif task == "predict":
         prover = ModelProver(model)
         proof_data = prover.generate_proof(X, prover_params)
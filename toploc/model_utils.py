@@ -2,9 +2,6 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from sklearn.datasets import load_iris
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from huggingface_hub import hf_hub_download
 import pandas as pd
 import json
@@ -13,6 +10,10 @@ import sys
 from datetime import datetime
 import importlib
 from urllib.parse import urlparse
+from toploc.utils import sha256_tensor
+from toploc.capture import ActivationCapture
+from toploc.deterministic import BatchInvariantInference, DeterministicInference
+import contextlib
 
 #  Add the directory containing the `models` folder to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -27,7 +28,49 @@ TRAINED_MODELS_DIR = "trained_models"
 if not os.path.exists(TRAINED_MODELS_DIR):
     os.makedirs(TRAINED_MODELS_DIR)
 
+# Content-addressed store of the datasets proofs refer to
+DATASETS_DIR = "datasets"
+
+class DatasetStore:
+    """Local content-addressed store of input tensors.
+
+    Proofs refer to their inputs by sha256_tensor digest instead of inlining
+    every row, and the verifier resolves the digest here on demand.
+    """
+
+    def __init__(self, root=DATASETS_DIR):
+        self.root = root
+
+    def _path(self, digest):
+        return os.path.join(self.root, f"{digest}.pt")
+
+    def __contains__(self, digest):
+        return os.path.exists(self._path(digest))
+
+    def put(self, X):
+        digest = sha256_tensor(X)
+        if digest not in self:
+            os.makedirs(self.root, exist_ok=True)
+            # write then rename so a reader never sees a partial file
+            tmp_path = self._path(digest) + ".tmp"
+            torch.save(X.detach().cpu().contiguous(), tmp_path)
+            os.replace(tmp_path, self._path(digest))
+        return digest
+
+    def get(self, digest):
+        if digest not in self:
+            raise KeyError(f"Dataset {digest} is not in {self.root}")
+        X = torch.load(self._path(digest))
+        if sha256_tensor(X) != digest:
+            raise ValueError(f"Dataset {digest} in {self.root} is corrupted")
+        return X
+
 def load_and_prepare_dataset():
+    # sklearn is only needed for training, not to prove or verify
+    from sklearn.datasets import load_iris
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
     print("Loading and preparing the Iris dataset...")
     iris = load_iris()
     X, y = iris.data, iris.target
@@ -45,6 +88,104 @@ def load_and_prepare_dataset():
 
     return X_train_tensor, y_train_tensor, X_test_tensor, y_test_tensor
 
+# Activation memory a chunk may use when chunk_size is "auto"
+AUTO_CHUNK_BYTES = 256 * 1024 * 1024
+
+def resolve_chunk_size(model, chunk_size, num_samples, memory_budget=AUTO_CHUNK_BYTES):
+    """Number of samples per forward pass.
+
+    A missing chunk_size runs the whole dataset at once. "auto" sizes the
+    chunks so that the outputs of every Linear layer of a chunk fit into
+    memory_budget bytes. The result only depends on the model and the dataset
+    size, so the verifier reproduces the prover's chunking exactly.
+    """
+    if not chunk_size:
+        return max(1, num_samples)
+    if chunk_size == "auto":
+        param = next(model.parameters(), None)
+        element_size = param.element_size() if param is not None else 4
+        width = sum(m.out_features for m in model.modules() if isinstance(m, nn.Linear))
+        chunk_size = memory_budget // max(1, width * element_size)
+    return max(1, min(int(chunk_size), num_samples))
+
+def accuracy(predicted_classes, y):
+    """Fraction of correct predictions, rounded to 3 digits as stored with proofs."""
+    predicted_classes = torch.as_tensor(predicted_classes)
+    y = torch.as_tensor(y)
+    if predicted_classes.shape != y.shape:
+        raise ValueError(f"Expected {len(y)} predictions, got {len(predicted_classes)}")
+    if len(y) == 0:
+        return 0.0
+    return round(float((predicted_classes == y.to(predicted_classes.dtype)).float().mean()), 3)
+
+def inference_context(prover_params):
+    """Context for the forward passes of a proof.
+
+    With prover_params deterministic set, nn.Linear runs with a fixed reduction
+    order, so the activations are bit-identical at any torch thread count and
+    the verifier can use all cores. With batch_invariant set, each row's
+    activations do not depend on the batch it ran in, at a fixed thread count.
+    Deterministic inference is batch invariant as well. The prover and
+    verifier must agree on both.
+    """
+    if prover_params.get("deterministic"):
+        return DeterministicInference()
+    if prover_params.get("batch_invariant"):
+        return BatchInvariantInference()
+    return contextlib.nullcontext()
+
+def is_batch_invariant(prover_params):
+    """Whether the verifier may recompute with a different chunking than the prover."""
+    return bool(prover_params.get("deterministic") or prover_params.get("batch_invariant"))
+
+def run_model(model, X, capture_layer=None, capture=None):
+    """Output and hidden activations of one forward pass.
+
+    Without capture_layer the model's forward must return (output, hidden).
+    Otherwise any model works: the output of the submodule named capture_layer
+    is copied by a forward hook, into capture if given (e.g. a ring buffer
+    reused across chunks). The activations are returned as a list of row views.
+    """
+    if not capture_layer:
+        output, activations = model(X)
+        return output, [activations]
+    if capture is None:
+        with ActivationCapture(model, [capture_layer], capacity=len(X)) as capture:
+            output = model(X)
+    else:
+        output = model(X)
+    if isinstance(output, tuple):
+        output = output[0]
+    return output, capture.read(capture_layer)
+
+def recompute_forward(model, X, prover_params):
+    """Predictions and activations of the forward pass the proof was generated with."""
+    with torch.no_grad(), inference_context(prover_params):
+        if prover_params.get("multi_layer"):
+            output, layers = model.forward_layers(X)
+            return torch.argmax(output, dim=1), layers
+        chunk_size = resolve_chunk_size(model, prover_params.get("chunk_size"), len(X))
+        predictions = []
+        segments = []
+        for chunk in X.split(chunk_size):
+            output, chunk_segments = run_model(model, chunk, prover_params.get("capture_layer"))
+            predictions.append(torch.argmax(output, dim=1))
+            segments.extend(chunk_segments)
+    activations = segments[0] if len(segments) == 1 else torch.cat(segments)
+    return torch.cat(predictions), activations
+
+def chunk_capture(model, prover_params, chunk_size):
+    """Ring buffer capture reused across the chunks of a chunked run, if any.
+
+    The builder or verifier may hold up to decode_batching_size rows of the
+    previous chunk, so those must survive the next chunk.
+    """
+    capture_layer = prover_params.get("capture_layer")
+    if not capture_layer:
+        return None
+    capacity = chunk_size + prover_params["decode_batching_size"]
+    return ActivationCapture(model, [capture_layer], capacity=capacity, ring=True)
+
 def train_model(model, X_train_tensor, y_train_tensor, epochs=200, lr=0.01):
     print(f"Training the {model.__class__.__name__} model...")
     torch.manual_seed(42)
@@ -19,4 +19,15 @@ class SimpleNet(nn.Module):
         # ! model is required to return the activation
         hidden = x.clone()   # <-- last hidden activation
         output = self.net[-1](x)       # final linear layer
-        return output, hidden
\ No newline at end of file
+        return output, hidden
+
+    def forward_layers(self, x):
+        # same forward pass, keeping the activation of every hidden layer
+        # so that all of them can be proven at once
+        hidden = {}
+        for layer in self.net[:-1]:
+            x = layer(x)
+            if isinstance(layer, nn.ReLU):
+                hidden[f"hidden{len(hidden) + 1}"] = x
+        output = self.net[-1](x)
+        return output, hidden
@@ -2,10 +2,11 @@ import torch
 import json
 import os
 import time
+import math
+import multiprocessing
 import numpy as np
-import sklearn
-from toploc import build_proofs_base64
-from model_utils import save_model_with_metadata, load_model_with_metadata, TRAINED_MODELS_DIR
+from toploc import build_proofs_base64, build_layer_proofs, ProofBuilder
+from model_utils import save_model_with_metadata, load_model_with_metadata, accuracy, inference_context, recompute_forward, resolve_chunk_size, run_model, chunk_capture, DatasetStore, TRAINED_MODELS_DIR
 import torch.nn.functional as F
 
 
@@ -15,27 +16,32 @@ if not os.path.exists(PROOFS_DIR):
     os.makedirs(PROOFS_DIR)
 
 class ModelProver:
-    def __init__(self, model):
+    def __init__(self, model, dataset_store=None):
         self.model = model
+        self.dataset_store = dataset_store or DatasetStore()
 
     def save_trained_model(self, prover_params, model_data_type=torch.bfloat16):
         return save_model_with_metadata(self.model, prover_params, model_data_type)
 
     def generate_proof(self, samples_tensor, prover_params):        
-        # Get the real activations from the model's hidden layer
-        with torch.no_grad():
-            output, original_activations_list = self.model(samples_tensor)
+        if prover_params.get("multi_layer"):
+            return self.generate_layer_proof(samples_tensor, prover_params)
+        if prover_params.get("chunk_size"):
+            return self.generate_chunked_proof(samples_tensor, prover_params)
+
+        # Get the real activations from the model's hidden layer, either
+        # returned by the model or captured from capture_layer by a hook
+        with torch.no_grad(), inference_context(prover_params):
+            output, segments = run_model(self.model, samples_tensor, prover_params.get("capture_layer"))
+        original_activations = segments[0] if len(segments) == 1 else torch.cat(segments)
 
         # Convert output to numpy for result interpretation (optional for proof)
         # output_np = output.to(dtype=torch.float32).numpy()
         predicted_classes = torch.argmax(output, dim=1).tolist()
         # predicted_classes = np.argmax(output_np, axis=1).tolist()
 
-        # The `toploc` library expects a list of tensors
-        original_activations = [act for act in original_activations_list]
-        # print(f"Extracted {len(original_activations)} activation tensors.")
-
-        # Build verifiable proofs
+        # Build verifiable proofs directly on the [N, H] hidden state tensor,
+        # which `toploc` proves row-wise when decode_batching_size is 1
         proofs_base64 = build_proofs_base64(
             original_activations,
             decode_batching_size=prover_params["decode_batching_size"],
@@ -47,34 +53,195 @@ class ModelProver:
         
         # print("Proofs generated successfully.")
         
-        # Prepare data for proof JSON
-        # Convert samples_tensor to a list of lists (numpy arrays) for JSON serialization
-        samples_list = samples_tensor.tolist()
-
+        # Refer to the inputs by digest, the verifier resolves them from the store
         return {
             "proofs_base64": concatenated_proof,
-            "samples_input": samples_list,
+            "dataset_digest": self.dataset_store.put(samples_tensor),
             "predicted_classes": predicted_classes,
             "prover_params_used": prover_params
         }
     
+    def generate_chunked_proof(self, samples_tensor, prover_params):
+        # Run the model on mini-batches so that only one chunk of activations
+        # is held at a time. The proofs are streamed out of the builder as
+        # soon as their decode batch is complete, so they are the same as
+        # when the whole dataset runs in one forward pass
+        chunk_size = resolve_chunk_size(self.model, prover_params["chunk_size"], len(samples_tensor))
+        builder = ProofBuilder(
+            topk=prover_params["topk"],
+            decode_batching_size=prover_params["decode_batching_size"],
+            skip_prefill=prover_params["skip_prefill"]
+        )
+        capture = chunk_capture(self.model, prover_params, chunk_size)
+        proofs_base64 = []
+        predicted_classes = []
+
+        try:
+            with torch.no_grad(), inference_context(prover_params):
+                for chunk in samples_tensor.split(chunk_size):
+                    output, segments = run_model(self.model, chunk, prover_params.get("capture_layer"), capture)
+                    predicted_classes.extend(torch.argmax(output, dim=1).tolist())
+                    # the whole decode batches of a chunk are proven together
+                    for activations in segments:
+                        proofs_base64.extend(proof.to_base64() for proof in builder.extend(activations))
+        finally:
+            if capture is not None:
+                capture.remove()
+        last_proof = builder.finish()
+        if last_proof is not None:
+            proofs_base64.append(last_proof.to_base64())
+
+        return {
+            "proofs_base64": '~'.join(proofs_base64),
+            "dataset_digest": self.dataset_store.put(samples_tensor),
+            "predicted_classes": predicted_classes,
+            # the verifier must run the model on the same chunks
+            "prover_params_used": {**prover_params, "chunk_size": chunk_size}
+        }
+
+    def generate_layer_proof(self, samples_tensor, prover_params):
+        # Prove every hidden layer from a single forward pass, all layers
+        # are interpolated together so this costs about as much as one
+        with torch.no_grad(), inference_context(prover_params):
+            output, layers = self.model.forward_layers(samples_tensor)
+
+        predicted_classes = torch.argmax(output, dim=1).tolist()
+        layer_proofs = build_layer_proofs(layers, topk=prover_params["topk"])
+
+        return {
+            "proofs_base64": json.dumps(layer_proofs.to_base64()),
+            "dataset_digest": self.dataset_store.put(samples_tensor),
+            "predicted_classes": predicted_classes,
+            "prover_params_used": prover_params
+        }
+
     def store_proof(self, proof_data, model_url, dataset_url ,y):
         
         time_now = time.time_ns()
         proof_filename = os.path.join(PROOFS_DIR, f"proof_{time_now}.json")
-        accuracy = round(sklearn.metrics.accuracy_score(proof_data["predicted_classes"], y), 3)
+        claimed_accuracy = accuracy(proof_data["predicted_classes"], y)
         
         print(y)
               
-        print(f"Calculated accuracy: {accuracy}")
+        print(f"Calculated accuracy: {claimed_accuracy}")
         
         data = {
             "model_url": model_url,
-            "datset_url": dataset_url,
+            "dataset_url": dataset_url,
             "proof": proof_data["proofs_base64"],
+            "dataset_digest": proof_data["dataset_digest"],
+            # needed to verify the stored proof later, see bulk_verify.py
+            "prover_params": proof_data["prover_params_used"],
+            "accuracy": claimed_accuracy,
         }
 
         with open(proof_filename, 'w') as f:
             json.dump(data, f)
         print(f"Proof stored to {proof_filename}")
-        return proof_filename
\ No newline at end of file
+        return proof_filename
+
+
+def shard_bounds(num_rows, num_shards, decode_batching_size, skip_prefill):
+    """Split rows into up to num_shards ranges that start on decode batch boundaries.
+
+    Batch boundaries are 0, then 1 (after the prefill) unless skip_prefill,
+    then every decode_batching_size rows. No proof batch spans two shards.
+    """
+    offset = 0 if skip_prefill else 1
+    bounds = [0]
+    for i in range(1, num_shards):
+        target = i * num_rows // num_shards
+        boundary = offset + math.ceil(max(target - offset, 0) / decode_batching_size) * decode_batching_size
+        if bounds[-1] < boundary < num_rows:
+            bounds.append(boundary)
+    bounds.append(num_rows)
+    return list(zip(bounds, bounds[1:]))
+
+
+# (model, samples_tensor, prover_params, activations) inherited by forked shard
+# workers, so neither the model, the dataset nor the activations are pickled
+_shard_state = None
+
+def _init_shard_worker(num_threads):
+    # Split the intra-op threads between the workers instead of oversubscribing
+    torch.set_num_threads(num_threads)
+
+def _prove_shard(start, end):
+    model, samples_tensor, prover_params, activations = _shard_state
+    predicted_classes = None
+    if activations is None:
+        # Deterministic activations do not depend on the batch they run in or
+        # on the thread count, so every shard runs its own rows
+        predictions, activations = recompute_forward(model, samples_tensor[start:end], prover_params)
+        predicted_classes = predictions.tolist()
+    else:
+        activations = activations[start:end]
+    # Shards after the first start after the prefill, on a decode batch boundary
+    proofs_base64 = build_proofs_base64(
+        activations,
+        decode_batching_size=prover_params["decode_batching_size"],
+        topk=prover_params["topk"],
+        skip_prefill=prover_params["skip_prefill"] or start > 0
+    )
+    return proofs_base64, predicted_classes
+
+
+class ShardedModelProver(ModelProver):
+    """ModelProver that proves row ranges of the dataset on a process pool.
+
+    Workers are forked, so they share the model and the dataset copy-on-write,
+    and split the intra-op threads between them. With deterministic
+    prover_params every shard runs the forward pass of its own rows, since
+    the activations do not depend on the batch or the thread count. Otherwise
+    the parent runs the forward pass of generate_proof, on the same chunks and
+    with its own thread count, and the shards only build the proofs of their
+    rows. Shards prove whole decode batches in native code and are merged in
+    row order, so the result is identical to a single-process run with the
+    same prover_params. The model must produce one activation row per sample.
+    """
+
+    def __init__(self, model, num_workers=None, dataset_store=None):
+        super().__init__(model, dataset_store)
+        self.num_workers = num_workers or os.cpu_count() or 1
+
+    def generate_proof(self, samples_tensor, prover_params):
+        if (
+            prover_params.get("multi_layer")
+            or self.num_workers == 1
+            or "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            return super().generate_proof(samples_tensor, prover_params)
+
+        if prover_params.get("chunk_size"):
+            chunk_size = resolve_chunk_size(self.model, prover_params["chunk_size"], len(samples_tensor))
+            prover_params = {**prover_params, "chunk_size": chunk_size}
+        activations = None
+        predicted_classes = None
+        if not prover_params.get("deterministic"):
+            predictions, activations = recompute_forward(self.model, samples_tensor, prover_params)
+            predicted_classes = predictions.tolist()
+        bounds = shard_bounds(
+            len(samples_tensor),
+            self.num_workers,
+            prover_params["decode_batching_size"],
+            prover_params["skip_prefill"]
+        )
+        num_threads = max(1, torch.get_num_threads() // len(bounds))
+
+        global _shard_state
+        _shard_state = (self.model, samples_tensor, prover_params, activations)
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(len(bounds), initializer=_init_shard_worker, initargs=(num_threads,)) as pool:
+                shards = pool.starmap(_prove_shard, bounds)
+        finally:
+            _shard_state = None
+
+        if predicted_classes is None:
+            predicted_classes = [c for _, shard_classes in shards for c in shard_classes]
+        return {
+            "proofs_base64": '~'.join(proof for shard_proofs, _ in shards for proof in shard_proofs),
+            "dataset_digest": self.dataset_store.put(samples_tensor),
+            "predicted_classes": predicted_classes,
+            "prover_params_used": prover_params
+        }
@@ -28,25 +28,50 @@ elif platform.system() == "Linux":
     extra_compile_args.extend(["-fopenmp"])
     extra_link_args.extend(["-fopenmp"])
 
+HEADERS = [os.path.join(CSRC_DIR, header) for header in ("stats.h", "ndd.h", "fp.h")]
+
+# ISA-specific builds of the poly kernels, picked at import by toploc.backend
+if platform.machine().lower() in ("x86_64", "amd64") and platform.system() == "Linux":
+    POLY_VARIANTS = {
+        "poly": [],
+        "poly_avx2": ["-mavx2", "-mfma", "-mbmi2"],
+        "poly_avx512": [
+            "-mavx2",
+            "-mfma",
+            "-mbmi2",
+            "-mavx512f",
+            "-mavx512bw",
+            "-mavx512dq",
+            "-mavx512vl",
+        ],
+    }
+else:
+    POLY_VARIANTS = {"poly": []}
+
 extensions = [
     CppExtension(
         name="toploc.C.csrc.ndd",
         sources=[os.path.join(CSRC_DIR, "ndd.cpp")],
+        depends=HEADERS,
         extra_compile_args=extra_compile_args,
         extra_link_args=extra_link_args,
     ),
     CppExtension(
         name="toploc.C.csrc.utils",
         sources=[os.path.join(CSRC_DIR, "utils.cpp")],
+        depends=HEADERS,
         extra_compile_args=extra_compile_args,
         extra_link_args=extra_link_args,
     ),
+] + [
     CppExtension(
-        name="toploc.C.csrc.poly",
-        sources=[os.path.join(CSRC_DIR, "poly.cpp")],
-        extra_compile_args=extra_compile_args,
+        name=f"toploc.C.csrc.{name}",
+        sources=[os.path.join(CSRC_DIR, f"{name}.cpp")],
+        depends=HEADERS + [os.path.join(CSRC_DIR, "poly.cpp")],
+        extra_compile_args=extra_compile_args + isa_flags,
         extra_link_args=extra_link_args,
-    ),
+    )
+    for name, isa_flags in POLY_VARIANTS.items()
 ]
 
 setup(
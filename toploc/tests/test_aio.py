@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import pytest
+import torch
+from toploc import aio
+from toploc.poly import build_proofs_base64, verify_proofs_base64
+
+
+@pytest.fixture(autouse=True)
+def restore_concurrency():
+    yield
+    aio.set_max_concurrency(aio.DEFAULT_MAX_CONCURRENCY)
+
+
+def test_build_and_verify():
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(5)]
+    expected = build_proofs_base64(activations, decode_batching_size=2, topk=4)
+
+    async def main():
+        proofs = await aio.build_proofs_base64(
+            activations, decode_batching_size=2, topk=4
+        )
+        results = await aio.verify_proofs_base64(
+            activations, proofs, decode_batching_size=2, topk=4
+        )
+        return proofs, results
+
+    proofs, results = asyncio.run(main())
+    assert proofs == expected
+    assert results == verify_proofs_base64(
+        activations, expected, decode_batching_size=2, topk=4
+    )
+
+
+def test_concurrent_calls():
+    activations = [
+        [torch.randn(16, dtype=torch.bfloat16) for _ in range(5)] for _ in range(4)
+    ]
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                aio.build_proofs_base64(acts, decode_batching_size=2, topk=4)
+                for acts in activations
+            )
+        )
+
+    aio.set_max_concurrency(2)
+    assert asyncio.run(main()) == [
+        build_proofs_base64(acts, decode_batching_size=2, topk=4)
+        for acts in activations
+    ]
+
+
+def test_cancel_queued_call():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def blocking():
+        started.set()
+        release.wait(timeout=10)
+
+    async def main():
+        first = asyncio.ensure_future(aio.run(blocking))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        # The only worker is busy, so this call is still queued
+        second = asyncio.ensure_future(aio.run(calls.append, 1))
+        await asyncio.sleep(0)
+        second.cancel()
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    aio.set_max_concurrency(1)
+    asyncio.run(main())
+    assert calls == []
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        aio.set_max_concurrency(0)
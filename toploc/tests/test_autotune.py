@@ -0,0 +1,95 @@
+import pytest
+import torch
+from toploc import build_proofs, verify_and_decide
+from toploc.autotune import TuneResult, autotune, load_tuned_params
+
+
+def test_autotune():
+    result = autotune(
+        (16, 32),
+        topk_candidates=(4, 8),
+        decode_batching_size_candidates=(1, 4),
+        repeats=1,
+    )
+    assert isinstance(result, TuneResult)
+    assert result.topk in (4, 8)
+    assert result.decode_batching_size in (1, 4)
+    assert result.build_proofs_per_sec > 0
+    assert result.verify_proofs_per_sec > 0
+    assert 0 <= result.detection_rate <= 1
+
+
+def test_autotune_byte_budget():
+    small = autotune(
+        (16, 32),
+        topk_candidates=(4, 64),
+        decode_batching_size_candidates=(4,),
+        max_proof_bytes=20,
+        repeats=1,
+    )
+    assert small.topk == 4
+    assert small.proof_bytes <= 20
+
+    with pytest.raises(ValueError):
+        autotune(
+            (16, 32),
+            topk_candidates=(4,),
+            decode_batching_size_candidates=(1,),
+            max_proof_bytes=1,
+            repeats=1,
+        )
+
+
+def test_autotune_skips_oversized_topk():
+    # A single row of 8 values cannot hold a top-16
+    result = autotune(
+        (3, 8),
+        dtype=torch.float16,
+        topk_candidates=(4, 16),
+        decode_batching_size_candidates=(1,),
+        repeats=1,
+    )
+    assert result.topk == 4
+
+
+def test_autotune_skip_prefill():
+    # Batches of 4 rows hold a top-16 of 8 values each, the prefill row alone
+    # does not
+    result = autotune(
+        (8, 8),
+        topk_candidates=(16,),
+        decode_batching_size_candidates=(4,),
+        skip_prefill=True,
+        repeats=1,
+    )
+    params = result.prover_params()
+    assert params["skip_prefill"]
+    activations = torch.randn(8, 8, dtype=torch.bfloat16)
+    proofs = build_proofs(activations, **params)
+    assert verify_and_decide(activations, proofs, **params).passed
+
+    with pytest.raises(ValueError):
+        autotune(
+            (8, 8),
+            topk_candidates=(16,),
+            decode_batching_size_candidates=(4,),
+            skip_prefill=False,
+            repeats=1,
+        )
+
+
+def test_load_tuned_params(tmp_path):
+    path = tmp_path / "params.json"
+    result = autotune(
+        (16, 32),
+        topk_candidates=(4,),
+        decode_batching_size_candidates=(1,),
+        repeats=1,
+        path=str(path),
+    )
+    assert load_tuned_params(str(path)) == result
+    assert result.prover_params() == {
+        "decode_batching_size": 1,
+        "topk": 4,
+        "skip_prefill": False,
+    }
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import pytest
+import torch
+from toploc import backend, reference
+from toploc.C.csrc import poly as generic
+
+
+def test_backend_selected():
+    assert backend.name in backend.supported_backends()
+    assert backend.ProofPoly.__module__ == "toploc.backend"
+
+
+def test_newton_coefficients_match():
+    x = torch.randperm(1000)[:64].tolist()
+    y = torch.randint(0, 2**16, (64,)).tolist()
+    coeffs = reference.compute_newton_coefficients(x, y)
+    assert coeffs == generic.compute_newton_coefficients(x, y)
+    assert reference.evaluate_polynomials(coeffs, x) == [i % 65497 for i in y]
+    assert reference.evaluate_polynomial(coeffs, x[3]) == y[3] % 65497
+
+
+def _topk(row: torch.Tensor, topk: int) -> tuple[torch.Tensor, torch.Tensor]:
+    indices = row.float().abs().topk(topk).indices
+    if row.element_size() == 1:
+        return indices, row.view(torch.uint8)[indices].view(row.dtype)
+    return indices, row[indices]
+
+
+@pytest.mark.parametrize(
+    "dtype", [torch.bfloat16, torch.float16, torch.float8_e4m3fn, torch.int8]
+)
+def test_proofs_and_verification_match(dtype):
+    if dtype == torch.int8:
+        activations = torch.randint(-128, 128, (4, 64), dtype=torch.int8)
+    else:
+        activations = torch.randn(4, 64).to(dtype)
+
+    proofs, native_proofs = [], []
+    for row in activations:
+        indices, values = _topk(row, 16)
+        proofs.append(reference.ProofPoly.from_points_tensor(indices, values))
+        native_proofs.append(generic.ProofPoly.from_points_tensor(indices, values))
+    for proof, native in zip(proofs, native_proofs):
+        assert proof.to_bytes() == native.to_bytes()
+        assert proof.to_base64() == native.to_base64()
+        assert reference.ProofPoly.from_base64(native.to_base64()) == proof
+        assert repr(proof) == repr(native)
+
+    perturbed = (activations.float() * 1.01).to(dtype)
+    for acts in (activations, perturbed):
+        expected = generic.verify_proofs_tensors(acts, native_proofs, 1, 16)
+        results = reference.verify_proofs_tensors(acts, proofs, 1, 16)
+        for result, expected_result in zip(results, expected):
+            assert torch.equal(result, expected_result)
+
+
+def test_get_fp_parts_match():
+    tensor = torch.randn(128, dtype=torch.bfloat16)
+    assert reference.get_fp_parts(tensor) == generic.get_fp_parts(tensor)
+
+
+def _backend_in_subprocess(name: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", "import toploc.backend as b; print(b.name)"],
+        env={**os.environ, "TOPLOC_BACKEND": name},
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_backend_override():
+    result = _backend_in_subprocess("numpy")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "numpy"
+
+    result = _backend_in_subprocess("sse")
+    assert result.returncode != 0
+    assert "Unknown TOPLOC_BACKEND" in result.stderr
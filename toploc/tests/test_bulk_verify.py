@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+import torch
+
+# The verification app lives next to the tests, outside of the toploc package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_verify import RESULT_FIELDS, bulk_verify, write_results  # noqa: E402
+from model_utils import DatasetStore, accuracy  # noqa: E402
+from models.iris_nn import SimpleNet  # noqa: E402
+from prover import ModelProver  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return SimpleNet().to(torch.bfloat16).eval()
+
+
+@pytest.fixture
+def datasets():
+    torch.manual_seed(1)
+    return {
+        url: (torch.randn(20, 4, dtype=torch.bfloat16), torch.randint(0, 3, (20,)))
+        for url in ["hf://data/a", "hf://data/b"]
+    }
+
+
+@pytest.fixture
+def loaders(model, datasets):
+    calls = {"model": [], "dataset": []}
+
+    def load_model(url):
+        calls["model"].append(url)
+        return model
+
+    def load_dataset(url):
+        calls["dataset"].append(url)
+        return datasets[url]
+
+    return calls, load_model, load_dataset
+
+
+def write_proof(tmp_path, name, model, datasets, dataset_url, **prover_params):
+    X, y = datasets[dataset_url]
+    prover_params = {
+        "decode_batching_size": 3,
+        "topk": 4,
+        "skip_prefill": False,
+        **prover_params,
+    }
+    prover = ModelProver(model, DatasetStore(str(tmp_path / "datasets")))
+    proof = prover.generate_proof(X, prover_params)
+    data = {
+        "model_url": "hf://models/iris",
+        "dataset_url": dataset_url,
+        "proof": proof["proofs_base64"],
+        "dataset_digest": proof["dataset_digest"],
+        "prover_params": proof["prover_params_used"],
+        "accuracy": accuracy(proof["predicted_classes"], y),
+    }
+    path = str(tmp_path / name)
+    with open(path, "w") as f:
+        json.dump(data, f)
+    return path, data
+
+
+def test_bulk_verify_loads_once_per_group(tmp_path, model, datasets, loaders):
+    calls, load_model, load_dataset = loaders
+    paths = [
+        write_proof(tmp_path, "a1.json", model, datasets, "hf://data/a")[0],
+        write_proof(tmp_path, "b.json", model, datasets, "hf://data/b")[0],
+        write_proof(
+            tmp_path, "a2.json", model, datasets, "hf://data/a", chunk_size=7
+        )[0],
+    ]
+
+    results = bulk_verify(paths, load_model=load_model, load_dataset=load_dataset)
+    assert [result["path"] for result in results] == paths
+    assert all(list(result) == RESULT_FIELDS for result in results)
+    assert all(result["passed"] and result["error"] is None for result in results)
+    assert sorted(calls["model"]) == ["hf://models/iris"] * 2
+    assert sorted(calls["dataset"]) == ["hf://data/a", "hf://data/b"]
+
+
+def test_bulk_verify_rejects_wrong_claims(tmp_path, model, datasets, loaders):
+    _, load_model, load_dataset = loaders
+    path, data = write_proof(tmp_path, "a.json", model, datasets, "hf://data/a")
+    cheated = str(tmp_path / "cheated.json")
+    with open(cheated, "w") as f:
+        json.dump({**data, "accuracy": data["accuracy"] + 0.5}, f)
+
+    results = bulk_verify(
+        [path, cheated], load_model=load_model, load_dataset=load_dataset
+    )
+    assert results[0]["passed"]
+    assert not results[1]["passed"] and not results[1]["claims_passed"]
+    assert results[1]["error"] is None
+
+
+def test_bulk_verify_per_file_errors(tmp_path, model, datasets, loaders):
+    calls, load_model, load_dataset = loaders
+    path, data = write_proof(tmp_path, "a.json", model, datasets, "hf://data/a")
+    no_model_url = str(tmp_path / "no_model_url.json")
+    with open(no_model_url, "w") as f:
+        json.dump({k: v for k, v in data.items() if k != "model_url"}, f)
+    unreadable = str(tmp_path / "unreadable.json")
+    with open(unreadable, "w") as f:
+        f.write("{not json")
+    not_an_object = str(tmp_path / "list.json")
+    with open(not_an_object, "w") as f:
+        json.dump([data], f)
+    missing = str(tmp_path / "missing.json")
+
+    paths = [no_model_url, unreadable, path, not_an_object, missing]
+    results = bulk_verify(paths, load_model=load_model, load_dataset=load_dataset)
+    assert [result["path"] for result in results] == paths
+    assert "model_url" in results[0]["error"]
+    assert results[0]["dataset_url"] == "hf://data/a"
+    assert all(
+        not result["passed"] and result["error"]
+        for i, result in enumerate(results)
+        if i != 2
+    )
+    assert results[2]["passed"] and results[2]["error"] is None
+    assert calls["model"] == ["hf://models/iris"]
+
+    output = str(tmp_path / "results.csv")
+    write_results(results, output)
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["path"] for row in rows] == paths
+    assert list(rows[0]) == RESULT_FIELDS
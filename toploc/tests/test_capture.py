@@ -0,0 +1,83 @@
+import pytest
+import torch
+import torch.nn as nn
+
+from toploc.capture import ActivationCapture
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(4, 8), nn.ReLU(), nn.Linear(8, 3))
+
+
+def test_capture_matches_forward(model):
+    x = torch.randn(5, 4)
+    with ActivationCapture(model, ["0", "1"]) as capture:
+        model(x)
+    assert torch.equal(capture["0"], model[0](x))
+    assert torch.equal(capture["1"], model[1](model[0](x)))
+
+
+def test_capture_hooks_removed(model):
+    with ActivationCapture(model, ["1"]) as capture:
+        model(torch.randn(2, 4))
+    model(torch.randn(3, 4))
+    assert len(capture["1"]) == 2
+
+
+def test_capture_reuses_buffers(model):
+    capture = ActivationCapture(model, ["1"], capacity=8)
+    model(torch.randn(4, 4))
+    data_ptr = capture["1"].data_ptr()
+
+    capture.reset()
+    x = torch.randn(8, 4)
+    model(x)
+    assert capture["1"].data_ptr() == data_ptr
+    assert torch.equal(capture["1"], model[1](model[0](x)))
+    capture.remove()
+
+
+def test_capture_grows(model):
+    capture = ActivationCapture(model, ["1"], capacity=2)
+    xs = [torch.randn(3, 4) for _ in range(3)]
+    for x in xs:
+        model(x)
+    capture.remove()
+    assert torch.equal(capture["1"], model[1](model[0](torch.cat(xs))))
+
+
+def test_capture_flattens_leading_dims(model):
+    x = torch.randn(2, 3, 4)
+    with ActivationCapture(model, ["2"]) as capture:
+        model(x)
+    assert torch.equal(capture["2"], model(x).reshape(6, 3))
+
+
+def test_capture_ring(model):
+    capture = ActivationCapture(model, ["1"], capacity=5, ring=True)
+    xs = [torch.randn(3, 4) for _ in range(4)]
+    read = []
+    for x in xs:
+        model(x)
+        segments = capture.read("1")
+        assert 1 <= len(segments) <= 2
+        read.extend(segments)
+    capture.remove()
+    assert torch.equal(torch.cat(read), model[1](model[0](torch.cat(xs))))
+    with pytest.raises(TypeError):
+        capture["1"]
+
+
+def test_capture_ring_overflow(model):
+    capture = ActivationCapture(model, ["1"], capacity=5, ring=True)
+    model(torch.randn(3, 4))
+    with pytest.raises(RuntimeError):
+        model(torch.randn(3, 4))
+    capture.remove()
+
+
+def test_capture_ring_needs_capacity(model):
+    with pytest.raises(ValueError):
+        ActivationCapture(model, ["1"], ring=True)
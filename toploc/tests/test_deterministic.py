@@ -0,0 +1,91 @@
+import pytest
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from toploc.deterministic import (
+    BatchInvariantInference,
+    DeterministicInference,
+    batch_invariant_linear,
+    deterministic_linear,
+)
+
+
+@pytest.fixture
+def restore_num_threads():
+    num_threads = torch.get_num_threads()
+    yield
+    torch.set_num_threads(num_threads)
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.bfloat16, torch.float16])
+def test_deterministic_linear_close_to_linear(dtype):
+    x = torch.randn(7, 100).to(dtype)
+    weight = torch.randn(30, 100).to(dtype)
+    bias = torch.randn(30).to(dtype)
+    out = deterministic_linear(x, weight, bias)
+    assert out.dtype == dtype
+    expected = F.linear(x.float(), weight.float(), bias.float())
+    torch.testing.assert_close(out.float(), expected, atol=0.1, rtol=0.02)
+
+
+def test_deterministic_linear_thread_count_invariant(restore_num_threads):
+    x = torch.randn(64, 1000, dtype=torch.bfloat16)
+    weight = torch.randn(256, 1000, dtype=torch.bfloat16)
+    outputs = []
+    for num_threads in [1, 2, 4]:
+        torch.set_num_threads(num_threads)
+        outputs.append(deterministic_linear(x, weight))
+    assert all(torch.equal(out, outputs[0]) for out in outputs)
+
+
+def test_deterministic_linear_rows_independent():
+    x = torch.randn(16, 70, dtype=torch.bfloat16)
+    weight = torch.randn(9, 70, dtype=torch.bfloat16)
+    out = deterministic_linear(x, weight)
+    assert torch.equal(deterministic_linear(x[3:5], weight), out[3:5])
+    out_3d = deterministic_linear(x.view(4, 4, 70), weight)
+    assert torch.equal(out_3d, out.view(4, 4, 9))
+
+
+def test_deterministic_inference_routes_linear():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(4, 16), nn.ReLU(), nn.Linear(16, 3))
+    x = torch.randn(5, 4)
+    with torch.no_grad(), DeterministicInference():
+        out = model(x)
+    with torch.no_grad():
+        hidden = deterministic_linear(x, model[0].weight, model[0].bias).relu()
+        expected = deterministic_linear(hidden, model[2].weight, model[2].bias)
+    assert torch.equal(out, expected)
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.bfloat16])
+def test_batch_invariant_linear_close_to_linear(dtype):
+    x = torch.randn(45, 100).to(dtype)
+    weight = torch.randn(30, 100).to(dtype)
+    bias = torch.randn(30).to(dtype)
+    out = batch_invariant_linear(x, weight, bias)
+    assert out.shape == (45, 30) and out.dtype == dtype
+    expected = F.linear(x.float(), weight.float(), bias.float())
+    torch.testing.assert_close(out.float(), expected, atol=0.1, rtol=0.02)
+
+
+def test_batch_invariant_linear_rows_independent():
+    x = torch.randn(100, 300, dtype=torch.bfloat16)
+    weight = torch.randn(200, 300, dtype=torch.bfloat16)
+    bias = torch.randn(200, dtype=torch.bfloat16)
+    out = batch_invariant_linear(x, weight, bias)
+    for start, end in [(0, 1), (7, 40), (50, 100)]:
+        rows = batch_invariant_linear(x[start:end], weight, bias)
+        assert torch.equal(rows, out[start:end])
+    assert torch.equal(batch_invariant_linear(x.flip(0), weight, bias), out.flip(0))
+
+
+def test_batch_invariant_inference_routes_linear():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(4, 16), nn.ReLU(), nn.Linear(16, 3))
+    x = torch.randn(70, 4)
+    with torch.no_grad(), BatchInvariantInference():
+        out = model(x)
+        assert torch.equal(model(x[5:9]), out[5:9])
@@ -0,0 +1,39 @@
+import pytest
+import torch
+from toploc import backend, build_proofs_base64, verify_proofs_base64
+from toploc.instrumentation import enable_stats, reset_stats, stats
+
+pytestmark = pytest.mark.skipif(
+    backend.name == "numpy", reason="The NumPy backend has no counters"
+)
+
+
+def test_stats_disabled_by_default():
+    reset_stats()
+    activations = torch.randn(8, 16, dtype=torch.bfloat16)
+    build_proofs_base64(activations, decode_batching_size=2, topk=4)
+    assert all(counter["calls"] == 0 for counter in stats().values())
+
+
+def test_stats_collects_per_stage():
+    reset_stats()
+    enable_stats()
+    try:
+        activations = torch.randn(8, 16, dtype=torch.bfloat16)
+        proofs = build_proofs_base64(
+            activations, decode_batching_size=2, topk=4, skip_prefill=True
+        )
+        verify_proofs_base64(
+            activations, proofs, decode_batching_size=2, topk=4, skip_prefill=True
+        )
+        snapshot = stats()
+    finally:
+        enable_stats(False)
+        reset_stats()
+
+    for stage in ("modulus_search", "interpolation", "base64", "topk", "evaluation"):
+        assert snapshot[stage]["calls"] > 0, stage
+        assert snapshot[stage]["nanoseconds"] > 0, stage
+    assert snapshot["interpolation"]["items"] == 4 * len(proofs)
+    assert snapshot["topk"]["calls"] == len(proofs)
+    assert all(counter["calls"] == 0 for counter in stats().values())
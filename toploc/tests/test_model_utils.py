@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+import torch
+
+from toploc.utils import sha256_tensor
+
+# model_utils lives next to the tests, outside of the toploc package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_utils import DatasetStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path / "datasets"))
+
+
+def test_dataset_store_round_trip(store):
+    X = torch.randn(10, 4, dtype=torch.bfloat16)
+    digest = store.put(X)
+    assert digest == sha256_tensor(X)
+    assert digest in store
+    assert torch.equal(store.get(digest), X)
+    # Storing the same tensor again keeps its digest
+    assert store.put(X.clone()) == digest
+    assert os.listdir(store.root) == [f"{digest}.pt"]
+
+
+def test_dataset_store_missing(store):
+    digest = sha256_tensor(torch.zeros(3))
+    assert digest not in store
+    with pytest.raises(KeyError):
+        store.get(digest)
+
+
+def test_dataset_store_corrupted(store):
+    X = torch.randn(10, 4)
+    digest = store.put(X)
+    # Overwrite the file with other contents under the same digest
+    torch.save(X + 1, os.path.join(store.root, f"{digest}.pt"))
+    assert digest in store
+    with pytest.raises(ValueError):
+        store.get(digest)
@@ -1,15 +1,37 @@
+import math
 import pickle
 import pytest
 import torch
 import base64
 from toploc.poly import (
+    LayerProofs,
+    ProofBuilder,
+    StreamingVerifier,
+    SpotCheckResult,
+    batch_activations,
+    spot_check_proofs,
+    spot_check_proofs_base64,
+    build_proofs,
+    build_proofs_rowwise,
     find_injective_modulus,
+    verify_proofs,
+    verify_proofs_rowwise,
     build_proofs_bytes,
     build_proofs_base64,
     verify_proofs_bytes,
     verify_proofs_base64,
+    VerificationResults,
+    decide,
+    num_batches,
+    verify_and_decide_base64,
+    build_layer_proofs,
+    verify_layer_proofs,
+    verify_and_decide_layers,
+    verify_and_decide,
+    verify_and_decide_many,
+    verify_and_decide_many_base64,
 )
-from toploc.C.csrc.poly import ProofPoly, VerificationResult
+from toploc.backend import ProofPoly, VerificationResult
 
 
 def test_find_injective_modulus():
@@ -358,3 +380,537 @@ def test_pickleable_ProofPoly():
     assert poly_unpickled == poly
     assert poly_unpickled != ProofPoly([1, 2, 3], 5)
     assert poly_unpickled != ProofPoly([1, 2, 4], 4)
+
+
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_verify_proofs_as_tensors(skip_prefill):
+    """Struct-of-arrays results match the per-proof results"""
+    activations = torch.randn(16, 16, dtype=torch.bfloat16)
+    proofs = build_proofs_bytes(
+        activations, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+    perturbed = activations * 1.05
+
+    expected = verify_proofs_bytes(
+        perturbed, proofs, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+    results = verify_proofs_bytes(
+        perturbed,
+        proofs,
+        decode_batching_size=3,
+        topk=4,
+        skip_prefill=skip_prefill,
+        as_tensors=True,
+    )
+
+    assert isinstance(results, VerificationResults)
+    assert results.exp_mismatches.dtype == torch.int32
+    assert results.mant_err_mean.dtype == torch.float64
+    assert results.mant_err_median.dtype == torch.float64
+    assert results.exp_mismatches.shape == (len(proofs),)
+    assert results.to_list() == expected
+
+
+@pytest.mark.parametrize(
+    "num_activations, decode_batching_size, skip_prefill, expected",
+    [
+        (0, 3, False, 0),
+        (1, 3, False, 1),
+        (8, 2, False, 5),
+        (17, 4, True, 5),
+        (0, 4, True, 0),
+    ],
+)
+def test_num_batches(num_activations, decode_batching_size, skip_prefill, expected):
+    assert num_batches(num_activations, decode_batching_size, skip_prefill) == expected
+
+
+def test_decide():
+    results = VerificationResults(
+        torch.tensor([0, 1, 0], dtype=torch.int32),
+        torch.tensor([0.5, 1.0, 3.0], dtype=torch.float64),
+        torch.tensor([0.0, 1.0, 2.0], dtype=torch.float64),
+    )
+    verdict = decide(results)
+    assert not verdict.passed
+    assert verdict.num_proofs == 3
+    assert verdict.num_failed == 1
+    assert verdict.max_exp_mismatches == 1
+    assert verdict.max_mant_err_mean == 3.0
+    assert verdict.max_mant_err_median == 2.0
+
+    assert decide(results, exp_mismatch_threshold=1).passed
+    assert not decide(results, exp_mismatch_threshold=1, expected_proofs=4).passed
+    verdict = decide(results, exp_mismatch_threshold=1, mant_err_mean_threshold=2)
+    assert not verdict.passed
+    assert verdict.num_failed == 1
+
+
+def test_verify_and_decide_base64(sample_activations):
+    proofs = build_proofs_base64(sample_activations, decode_batching_size=2, topk=5)
+
+    verdict = verify_and_decide_base64(
+        sample_activations, proofs, decode_batching_size=2, topk=5
+    )
+    assert verdict.passed
+    assert verdict.num_proofs == len(proofs)
+    assert verdict.num_failed == 0
+
+    verdict = verify_and_decide_base64(
+        [i * 4 for i in sample_activations], proofs, decode_batching_size=2, topk=5
+    )
+    assert not verdict.passed
+    assert verdict.num_failed == len(proofs)
+
+    # A truncated proof set must be rejected
+    verdict = verify_and_decide_base64(
+        sample_activations, proofs[:-1], decode_batching_size=2, topk=5
+    )
+    assert not verdict.passed
+
+    # So must a proof set padded with extra proofs
+    verdict = verify_and_decide_base64(
+        sample_activations, proofs + proofs[-1:], decode_batching_size=2, topk=5
+    )
+    assert not verdict.passed
+
+
+@pytest.mark.parametrize("decode_batching_size", [1, 3, 16])
+def test_verify_proofs_native_matches_python(decode_batching_size):
+    """The fused native kernel agrees with the Python reference path"""
+    activations = torch.randn(16, 64, dtype=torch.bfloat16)
+    proofs = build_proofs_bytes(
+        activations,
+        decode_batching_size=decode_batching_size,
+        topk=8,
+        skip_prefill=True,
+    )
+    perturbed = activations * 1.02
+
+    native = verify_proofs_bytes(
+        perturbed,
+        proofs,
+        decode_batching_size=decode_batching_size,
+        topk=8,
+        skip_prefill=True,
+    )
+    python = verify_proofs_bytes(
+        list(perturbed),
+        proofs,
+        decode_batching_size=decode_batching_size,
+        topk=8,
+        skip_prefill=True,
+    )
+
+    assert len(native) == len(python) == len(proofs)
+    for n, p in zip(native, python):
+        assert n.exp_mismatches == p.exp_mismatches
+        assert n.mant_err_mean == pytest.approx(p.mant_err_mean)
+
+
+def _perturb(activations: torch.Tensor) -> torch.Tensor:
+    if activations.dtype == torch.int8:
+        return (activations.to(torch.int16) * 2).clamp(-128, 127).to(torch.int8)
+    return (activations.float() * 4).to(activations.dtype)
+
+
+@pytest.mark.parametrize(
+    "dtype", [torch.float16, torch.float8_e4m3fn, torch.float8_e5m2, torch.int8]
+)
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_proofs_low_precision_dtypes(dtype, skip_prefill):
+    """Proofs can be built and verified directly on quantized activations"""
+    if dtype == torch.int8:
+        activations = torch.randint(-100, 100, (16, 32), dtype=torch.int8)
+    else:
+        activations = torch.randn(16, 32).to(dtype)
+    proofs = build_proofs_bytes(
+        activations, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+    assert ProofPoly.null(4).to_bytes() not in proofs
+
+    results = verify_proofs_bytes(
+        activations, proofs, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+    assert len(results) == len(proofs)
+    assert all(r.exp_mismatches == 0 for r in results)
+    assert all(r.mant_err_mean == 0 for r in results)
+
+    results = verify_proofs_bytes(
+        _perturb(activations),
+        proofs,
+        decode_batching_size=3,
+        topk=4,
+        skip_prefill=skip_prefill,
+    )
+    assert all(r.exp_mismatches > 0 or r.mant_err_mean > 0 for r in results)
+
+
+def test_batch_activations_zero_copy():
+    """Decode batches over contiguous storage are views, not copies"""
+    activations = torch.randn(10, 16, dtype=torch.bfloat16)
+    storage_ptr = activations.untyped_storage().data_ptr()
+
+    for inputs in (activations, list(activations)):
+        batches = batch_activations(inputs, decode_batching_size=4)
+        assert len(batches) == 4
+        for batch in batches:
+            assert batch.untyped_storage().data_ptr() == storage_ptr
+        assert torch.equal(batches[1], activations[1:5].reshape(-1))
+        assert torch.equal(batches[-1], activations[9:].reshape(-1))
+
+
+def test_batch_activations_separate_tensors():
+    """Activations from separate storages are concatenated"""
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(5)]
+    batches = batch_activations(activations, decode_batching_size=2)
+    assert len(batches) == 3
+    assert torch.equal(batches[1], torch.cat(activations[1:3]))
+
+    # Rows that are out of order are not a contiguous run
+    rows = torch.randn(4, 16, dtype=torch.bfloat16)
+    batches = batch_activations([rows[0], rows[2], rows[1]], decode_batching_size=2)
+    assert torch.equal(batches[1], torch.cat([rows[2], rows[1]]))
+
+
+@pytest.mark.parametrize("dtype", [torch.bfloat16, torch.float8_e4m3fn])
+def test_build_proofs_rowwise(dtype):
+    """Row-wise proofs match per-row decode batches"""
+    activations = torch.randn(32, 16).to(dtype)
+    proofs = build_proofs_rowwise(activations, topk=4)
+    expected = build_proofs(
+        list(activations), decode_batching_size=1, topk=4, skip_prefill=True
+    )
+    assert proofs == expected
+    # 2D tensors with decode_batching_size=1 take the row-wise path
+    assert build_proofs(activations, decode_batching_size=1, topk=4) == expected
+
+
+@pytest.mark.parametrize("decode_batching_size", [1, 3])
+def test_verify_and_decide_many(decode_batching_size):
+    activations = torch.randn(10, 16, dtype=torch.bfloat16)
+    honest = build_proofs(activations, decode_batching_size, topk=4)
+    cheated = build_proofs(activations * 1.05, decode_batching_size, topk=4)
+    proof_sets = [honest, cheated, honest[:-1], honest + honest[-1:], []]
+
+    verdicts = verify_and_decide_many(
+        activations, proof_sets, decode_batching_size, topk=4, mant_err_mean_threshold=0
+    )
+    expected = [
+        verify_and_decide(
+            activations, proofs, decode_batching_size, 4, mant_err_mean_threshold=0
+        )
+        for proofs in proof_sets
+    ]
+    assert [v.passed for v in verdicts] == [True, False, False, False, False]
+    assert [v.passed for v in verdicts] == [v.passed for v in expected]
+    assert [v.num_proofs for v in verdicts] == [v.num_proofs for v in expected]
+    assert [v.num_failed for v in verdicts] == [v.num_failed for v in expected]
+
+    verdicts = verify_and_decide_many_base64(
+        list(activations),
+        [[p.to_base64() for p in proofs] for proofs in proof_sets[:2]],
+        decode_batching_size,
+        topk=4,
+    )
+    assert verdicts[0].passed
+
+
+def test_build_layer_proofs():
+    """Layer proofs match row-wise proofs of each layer"""
+    layers = {
+        "hidden1": torch.randn(8, 16, dtype=torch.bfloat16),
+        "hidden2": torch.randn(8, 12, dtype=torch.float16),
+        "hidden3": torch.randn(2, 4, 8, dtype=torch.bfloat16),
+    }
+    proofs = build_layer_proofs(layers, topk=4)
+    assert list(proofs.proofs) == ["hidden1", "hidden2", "hidden3"]
+    assert proofs.proofs["hidden1"] == build_proofs_rowwise(layers["hidden1"], 4)
+    assert proofs.proofs["hidden2"] == build_proofs_rowwise(layers["hidden2"], 4)
+    assert proofs.proofs["hidden3"] == build_proofs_rowwise(
+        layers["hidden3"].reshape(8, 8), 4
+    )
+    assert LayerProofs.from_base64(proofs.to_base64(), topk=4) == proofs
+
+
+def test_build_layer_proofs_error_handling():
+    layers = {"hidden1": torch.randn(3, 8), "hidden2": torch.randn(3, 2)}
+    proofs = build_layer_proofs(layers, topk=4)
+    assert proofs.proofs == {
+        "hidden1": [ProofPoly.null(4)] * 3,
+        "hidden2": [ProofPoly.null(4)] * 3,
+    }
+
+
+def test_verify_layer_proofs():
+    layers = {
+        "hidden1": torch.randn(8, 16, dtype=torch.bfloat16),
+        "hidden2": torch.randn(8, 12, dtype=torch.bfloat16),
+    }
+    proofs = build_layer_proofs(layers, topk=4)
+
+    results = verify_layer_proofs(layers, proofs)
+    assert all(len(results[name]) == 8 for name in layers)
+    assert all(r.exp_mismatches == 0 for r in results["hidden2"])
+    assert verify_and_decide_layers(layers, proofs).passed
+
+    perturbed = {**layers, "hidden2": layers["hidden2"] * 1.05}
+    results = verify_layer_proofs(perturbed, proofs, as_tensors=True)
+    assert results["hidden1"].mant_err_mean.sum() == 0
+    assert results["hidden2"].mant_err_mean.sum() > 0
+    assert not verify_and_decide_layers(
+        perturbed, proofs, mant_err_mean_threshold=0
+    ).passed
+
+    # A recomputed layer without proofs rejects the proof set
+    missing = LayerProofs({"hidden1": proofs.proofs["hidden1"]}, topk=4)
+    assert list(verify_layer_proofs(layers, missing)) == ["hidden1"]
+    assert not verify_and_decide_layers(layers, missing).passed
+
+    # Extra proofs of one layer do not make up for missing proofs of another
+    shifted = LayerProofs(
+        {
+            "hidden1": proofs.proofs["hidden1"] + proofs.proofs["hidden1"][-1:],
+            "hidden2": proofs.proofs["hidden2"][:-1],
+        },
+        topk=4,
+    )
+    assert not verify_and_decide_layers(layers, shifted).passed
+    padded = LayerProofs(
+        {**proofs.proofs, "hidden2": proofs.proofs["hidden2"] * 2}, topk=4
+    )
+    assert len(verify_layer_proofs(layers, padded)["hidden2"]) == 8
+    assert not verify_and_decide_layers(layers, padded).passed
+
+
+def test_build_proofs_rowwise_error_handling():
+    activations = torch.randn(3, 2, dtype=torch.bfloat16)
+    proofs = build_proofs_rowwise(activations, topk=4)
+    assert proofs == [ProofPoly.null(4)] * 3
+
+
+def test_verify_proofs_rowwise():
+    activations = torch.randn(32, 16, dtype=torch.bfloat16)
+    proofs = build_proofs_rowwise(activations, topk=4)
+
+    results = verify_proofs_rowwise(activations, proofs, topk=4)
+    assert len(results) == len(proofs)
+    assert all(r.exp_mismatches == 0 for r in results)
+    assert all(r.mant_err_mean == 0 for r in results)
+
+    perturbed = activations * 1.05
+    results = verify_proofs_rowwise(perturbed, proofs, topk=4, as_tensors=True)
+    expected = verify_proofs(
+        list(perturbed), proofs, decode_batching_size=1, topk=4, skip_prefill=True
+    )
+    assert results.exp_mismatches.tolist() == [r.exp_mismatches for r in expected]
+    assert results.mant_err_mean.tolist() == pytest.approx(
+        [r.mant_err_mean for r in expected]
+    )
+
+
+@pytest.mark.parametrize("decode_batching_size", [1, 3, 4])
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_proof_builder(decode_batching_size, skip_prefill):
+    """Streamed proofs match build_proofs on the full list"""
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(10)]
+    expected = build_proofs(
+        activations, decode_batching_size, topk=4, skip_prefill=skip_prefill
+    )
+
+    builder = ProofBuilder(
+        topk=4, decode_batching_size=decode_batching_size, skip_prefill=skip_prefill
+    )
+    emitted = builder.extend(activations)
+    last = builder.finish()
+    if last is not None:
+        emitted.append(last)
+    assert emitted == expected
+    assert builder.proofs == expected
+
+
+@pytest.mark.parametrize("decode_batching_size", [1, 3, 4])
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_proof_builder_2d_chunks(decode_batching_size, skip_prefill):
+    """Chunks of rows that do not align with the batches match build_proofs"""
+    activations = torch.randn(23, 16, dtype=torch.bfloat16)
+    expected = build_proofs(
+        list(activations), decode_batching_size, topk=4, skip_prefill=skip_prefill
+    )
+
+    builder = ProofBuilder(
+        topk=4, decode_batching_size=decode_batching_size, skip_prefill=skip_prefill
+    )
+    emitted = []
+    for chunk in activations.split(5):
+        emitted.extend(builder.extend(chunk))
+    last = builder.finish()
+    if last is not None:
+        emitted.append(last)
+    assert emitted == expected
+    assert builder.proofs == expected
+
+    verifier = StreamingVerifier(
+        expected, decode_batching_size, topk=4, skip_prefill=skip_prefill
+    )
+    results = []
+    for chunk in activations.split(5):
+        results.extend(verifier.extend(chunk))
+    assert verifier.finish().passed
+    assert len(results) == len(expected)
+    assert all(r.exp_mismatches == 0 for r in results)
+
+
+def test_streaming_verifier_2d_early_reject():
+    activations = torch.randn(20, 16, dtype=torch.bfloat16)
+    proofs = build_proofs(list(activations), decode_batching_size=2, topk=4)
+    tampered = activations.clone()
+    tampered[5] *= 2
+
+    verifier = StreamingVerifier(proofs, decode_batching_size=2, topk=4)
+    results = verifier.extend(tampered)
+    # Prefill and the first two decode batches pass, the third one fails
+    assert verifier.rejected
+    assert len(results) == 4
+    assert results[-1].exp_mismatches > 0
+    assert verifier.extend(tampered) == []
+    assert not verifier.finish().passed
+
+    verifier = StreamingVerifier(proofs[:-2], decode_batching_size=2, topk=4)
+    verifier.extend(activations)
+    assert verifier.rejected
+    assert not verifier.finish().passed
+
+
+def test_proof_builder_emits_on_full_batch():
+    builder = ProofBuilder(topk=4, decode_batching_size=2)
+    # Prefill is its own batch
+    assert builder.push(torch.randn(16, dtype=torch.bfloat16)) is not None
+    assert builder.push(torch.randn(16, dtype=torch.bfloat16)) is None
+    assert builder.push(torch.randn(16, dtype=torch.bfloat16)) is not None
+    assert builder.finish() is None
+    assert len(builder.proofs) == 2
+    with pytest.raises(RuntimeError):
+        builder.push(torch.randn(16, dtype=torch.bfloat16))
+
+
+def test_proof_builder_error_handling():
+    builder = ProofBuilder(topk=4, decode_batching_size=1)
+    assert builder.push(torch.randn(2, dtype=torch.bfloat16)) == ProofPoly.null(4)
+
+
+@pytest.mark.parametrize("decode_batching_size", [1, 3])
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_streaming_verifier(decode_batching_size, skip_prefill):
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(10)]
+    proofs = build_proofs(
+        activations, decode_batching_size, topk=4, skip_prefill=skip_prefill
+    )
+
+    verifier = StreamingVerifier(
+        proofs, decode_batching_size, topk=4, skip_prefill=skip_prefill
+    )
+    verifier.extend(activations)
+    verdict = verifier.finish()
+    assert verdict.passed
+    assert verdict.num_proofs == len(proofs)
+    assert not verifier.rejected
+
+
+def test_streaming_verifier_early_reject():
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(10)]
+    proofs = build_proofs(activations, decode_batching_size=2, topk=4)
+    activations[3] = activations[3] * 2
+
+    verifier = StreamingVerifier(proofs, decode_batching_size=2, topk=4)
+    results = verifier.extend(activations)
+    # Prefill and the first decode batch pass, the second one fails
+    assert verifier.rejected
+    assert len(results) == 3
+    assert results[-1].exp_mismatches > 0
+    assert not verifier.finish().passed
+
+
+def test_streaming_verifier_proof_count_mismatch():
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(10)]
+    proofs = build_proofs(activations, decode_batching_size=2, topk=4)
+
+    verifier = StreamingVerifier(proofs[:-1], decode_batching_size=2, topk=4)
+    verifier.extend(activations)
+    assert verifier.rejected
+    assert not verifier.finish().passed
+
+    verifier = StreamingVerifier(proofs, decode_batching_size=2, topk=4)
+    verifier.extend(activations[:-2])
+    assert not verifier.finish().passed
+
+
+@pytest.mark.parametrize("skip_prefill", [False, True])
+def test_spot_check_proofs(skip_prefill):
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(20)]
+    proofs = build_proofs_base64(
+        activations, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+
+    result = spot_check_proofs_base64(
+        activations, proofs, 3, topk=4, skip_prefill=skip_prefill, sample=0.5, seed=0
+    )
+    assert result.num_batches == len(proofs)
+    assert len(result.indices) == math.ceil(0.5 * len(proofs))
+    assert result.indices == sorted(set(result.indices))
+    assert (result.results.exp_mismatches == 0).all()
+    assert decide(result.results).passed
+
+    again = spot_check_proofs_base64(
+        activations, proofs, 3, topk=4, skip_prefill=skip_prefill, sample=0.5, seed=0
+    )
+    assert again.indices == result.indices
+
+    perturbed = [i * 2 for i in activations]
+    result = spot_check_proofs_base64(
+        perturbed, proofs, 3, topk=4, skip_prefill=skip_prefill, sample=2, seed=0
+    )
+    assert len(result.indices) == 2
+    assert not decide(result.results).passed
+
+
+def test_spot_check_proofs_only_reads_sampled_batches():
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(10)]
+    proofs = build_proofs(activations, decode_batching_size=1, topk=4)
+    result = spot_check_proofs(activations, proofs, 1, topk=4, sample=3, seed=1)
+    indices = result.indices
+
+    sparse = [a if i in indices else None for i, a in enumerate(activations)]
+    result = spot_check_proofs(sparse, proofs, 1, topk=4, sample=3, seed=1)
+    assert result.indices == indices
+    assert (result.results.exp_mismatches == 0).all()
+
+
+def test_spot_check_proofs_invalid_sample():
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(4)]
+    proofs = build_proofs(activations, decode_batching_size=1, topk=4)
+    with pytest.raises(ValueError):
+        spot_check_proofs(activations, proofs, 1, topk=4, sample=1.5)
+
+
+@pytest.mark.parametrize("skip_prefill", [True, False])
+def test_spot_check_proofs_wrong_proof_count(skip_prefill):
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(20)]
+    proofs = build_proofs_base64(
+        activations, decode_batching_size=3, topk=4, skip_prefill=skip_prefill
+    )
+    for wrong in [proofs[:-2], proofs + proofs[-1:]]:
+        with pytest.raises(ValueError):
+            spot_check_proofs_base64(
+                activations, wrong, 3, topk=4, skip_prefill=skip_prefill, sample=1.0
+            )
+
+
+def test_detection_confidence():
+    empty = VerificationResults(*(torch.empty(0),) * 3)
+    full = SpotCheckResult(list(range(10)), empty, 10)
+    assert full.detection_confidence(0.1) == pytest.approx(1.0)
+    # Two of ten batches cheated, two sampled: 1 - (8/10 * 7/9)
+    partial = SpotCheckResult([0, 1], empty, 10)
+    assert partial.detection_confidence(0.2) == pytest.approx(1 - 8 / 10 * 7 / 9)
+    assert partial.detection_confidence(0.0) == 0.0
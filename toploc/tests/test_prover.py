@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+import torch
+
+# The prover app lives next to the tests, outside of the toploc package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_utils import DatasetStore  # noqa: E402
+from models.iris_nn import SimpleNet  # noqa: E402
+from prover import ModelProver, ShardedModelProver, shard_bounds  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return SimpleNet().to(torch.bfloat16).eval()
+
+
+@pytest.mark.parametrize("skip_prefill", [True, False])
+@pytest.mark.parametrize("decode_batching_size", [1, 3])
+def test_shard_bounds(decode_batching_size, skip_prefill):
+    bounds = shard_bounds(50, 4, decode_batching_size, skip_prefill)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 50
+    assert all(end == start for (_, end), (start, _) in zip(bounds, bounds[1:]))
+    offset = 0 if skip_prefill else 1
+    assert all((start - offset) % decode_batching_size == 0 for start, _ in bounds[1:])
+
+
+@pytest.mark.parametrize("deterministic", [False, True])
+@pytest.mark.parametrize("capture_layer", [None, "net.5"])
+@pytest.mark.parametrize("chunk_size", [None, 7])
+@pytest.mark.parametrize(
+    "decode_batching_size,skip_prefill", [(1, True), (3, False), (4, True)]
+)
+def test_sharded_proofs_match_single_process(
+    model,
+    tmp_path,
+    decode_batching_size,
+    skip_prefill,
+    chunk_size,
+    capture_layer,
+    deterministic,
+):
+    samples = torch.randn(50, 4, dtype=torch.bfloat16)
+    prover_params = {
+        "decode_batching_size": decode_batching_size,
+        "topk": 4,
+        "skip_prefill": skip_prefill,
+        "chunk_size": chunk_size,
+        "capture_layer": capture_layer,
+        "deterministic": deterministic,
+    }
+    store = DatasetStore(str(tmp_path))
+
+    expected = ModelProver(model, store).generate_proof(samples, prover_params)
+    sharded = ShardedModelProver(model, num_workers=3, dataset_store=store)
+    assert sharded.generate_proof(samples, prover_params) == expected
+
+
+def test_sharded_prover_keeps_parent_threads(model, tmp_path):
+    num_threads = torch.get_num_threads()
+    prover = ShardedModelProver(
+        model, num_workers=2, dataset_store=DatasetStore(str(tmp_path))
+    )
+    prover.generate_proof(
+        torch.randn(20, 4, dtype=torch.bfloat16),
+        {"decode_batching_size": 1, "topk": 4, "skip_prefill": False},
+    )
+    # Only the workers split the threads
+    assert torch.get_num_threads() == num_threads
@@ -0,0 +1,78 @@
+import logging
+import pytest
+import torch
+from toploc.poly import build_proofs_base64, verify_proofs_base64
+from toploc.tracing import (
+    HistogramCollector,
+    LoggingTraceHook,
+    Span,
+    add_trace_hook,
+    remove_trace_hook,
+    trace,
+)
+
+
+@pytest.fixture
+def collector():
+    collector = HistogramCollector()
+    add_trace_hook(collector)
+    yield collector
+    remove_trace_hook(collector)
+
+
+def test_no_hooks_is_noop():
+    with trace("topk", 10) as span:
+        assert span is trace("interpolation")
+
+
+def test_build_and_verify_spans(collector):
+    activations = [torch.randn(16, dtype=torch.bfloat16) for _ in range(5)]
+    proofs = build_proofs_base64(activations, decode_batching_size=2, topk=4)
+    verify_proofs_base64(activations, proofs, decode_batching_size=2, topk=4)
+
+    summary = collector.summary()
+    for stage in (
+        "concat",
+        "topk",
+        "transfer",
+        "interpolation",
+        "encoding",
+        "decoding",
+        "evaluation",
+        "comparison",
+    ):
+        assert summary[stage]["count"] > 0
+        assert summary[stage]["total_ms"] >= 0
+    # Prefill plus two decode batches, proven and verified
+    assert summary["interpolation"]["count"] == 3
+    assert summary["encoding"]["size"] == 3
+
+    collector.reset()
+    assert collector.summary() == {}
+
+
+def test_logging_hook(caplog):
+    hook = LoggingTraceHook(level=logging.INFO)
+    add_trace_hook(hook)
+    try:
+        with caplog.at_level(logging.INFO, logger="toploc.trace"):
+            with trace("topk", 7):
+                pass
+    finally:
+        remove_trace_hook(hook)
+    assert "topk" in caplog.text
+    assert "size=7" in caplog.text
+
+
+def test_failing_hook_does_not_propagate():
+    def hook(span: Span):
+        raise RuntimeError("broken hook")
+
+    add_trace_hook(hook)
+    try:
+        proofs = build_proofs_base64(
+            [torch.randn(16, dtype=torch.bfloat16)], decode_batching_size=1, topk=4
+        )
+    finally:
+        remove_trace_hook(hook)
+    assert len(proofs) == 1
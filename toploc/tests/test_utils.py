@@ -3,7 +3,7 @@ import torch
 import time
 import pytest
 import tempfile
-from toploc.utils import sha256sum
+from toploc.utils import sha256sum, sha256_tensor
 
 
 @pytest.mark.parametrize(
@@ -118,6 +118,38 @@ def test_get_bf16_parts(tensor_shape: tuple[int, ...]) -> None:
     assert new_time < old_time
 
 
+@pytest.mark.parametrize(
+    "dtype, bits_dtype, exp_bits, mant_bits",
+    [
+        (torch.float16, torch.int16, 5, 10),
+        (torch.float8_e4m3fn, torch.uint8, 4, 3),
+        (torch.float8_e5m2, torch.uint8, 5, 2),
+    ],
+)
+def test_get_low_precision_parts(dtype, bits_dtype, exp_bits, mant_bits) -> None:
+    a = torch.randn(1000).to(dtype)
+    exps, mantissas = get_fp_parts(a)
+
+    bits = a.view(bits_dtype).to(torch.int64) & ((1 << (1 + exp_bits + mant_bits)) - 1)
+    ref_exps = ((bits >> mant_bits) & ((1 << exp_bits) - 1)).tolist()
+    ref_mants = (bits & ((1 << mant_bits) - 1)).tolist()
+
+    assert exps == ref_exps
+    assert mantissas == ref_mants
+
+
+def test_get_int8_parts() -> None:
+    a = torch.tensor([0, 1, -1, 127, -128, 42, -42], dtype=torch.int8)
+    exps, mantissas = get_fp_parts(a)
+    assert exps == [0, 0, 1, 0, 1, 0, 1]
+    assert mantissas == [0, 1, 1, 127, 128, 42, 42]
+
+
+def test_get_fp_parts_unsupported_dtype() -> None:
+    with pytest.raises(Exception):
+        get_fp_parts(torch.zeros(4, dtype=torch.float64))
+
+
 def test_sha256sum():
     with tempfile.NamedTemporaryFile() as f:
         f.write(b"Hello, world!" * 1000)
@@ -126,3 +158,17 @@ def test_sha256sum():
             sha256sum(f.name)
             == "a8f764e70df94be2c911fb51b3d0c56c03882078dbdb215de8b7bd0374b0fb10"
         )
+
+
+def test_sha256_tensor():
+    a = torch.randn(6, 4, dtype=torch.bfloat16)
+    digest = sha256_tensor(a)
+    assert len(digest) == 64
+    # Layout does not matter, only dtype, shape and values
+    assert sha256_tensor(a.t().contiguous().t()) == digest
+    assert sha256_tensor(torch.cat([a, a])[6:]) == digest
+    assert sha256_tensor(a.reshape(4, 6)) != digest
+    assert sha256_tensor(a.half()) != digest
+    b = a.clone()
+    b[2, 1] += 1
+    assert sha256_tensor(b) != digest
@@ -0,0 +1,180 @@
+import os
+import subprocess
+import sys
+
+import pytest
+import torch
+
+# The verifier app lives next to the tests, outside of the toploc package
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+
+from model_utils import DatasetStore, accuracy  # noqa: E402
+from models.iris_nn import SimpleNet  # noqa: E402
+from prover import ModelProver  # noqa: E402
+from verifier import Verifier, check_claims  # noqa: E402
+
+PROVER_PARAMS = {
+    "decode_batching_size": 1,
+    "topk": 4,
+    "skip_prefill": False,
+    "batch_invariant": True,
+}
+
+
+def test_check_claims():
+    predictions = torch.tensor([0, 1, 2, 1])
+    y = torch.tensor([0, 1, 2, 2])
+    assert check_claims(predictions, y)
+    assert check_claims(predictions, y, claimed_predictions=[0, 1, 2, 1])
+    assert check_claims(predictions, y, claimed_accuracy=0.75)
+    assert check_claims(predictions, y, [0, 1, 2, 1], claimed_accuracy=0.7501)
+    # Mismatching predictions, in value or in number
+    assert not check_claims(predictions, y, claimed_predictions=[0, 1, 2, 2])
+    assert not check_claims(predictions, y, claimed_predictions=[0, 1, 2])
+    # Mismatching accuracy
+    assert not check_claims(predictions, y, claimed_accuracy=1.0)
+    assert not check_claims(predictions, y, [0, 1, 2, 1], claimed_accuracy=0.5)
+
+
+def test_verifier_does_not_import_sklearn():
+    code = "import sys, verifier; assert 'sklearn' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, check=True)
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return SimpleNet().to(torch.bfloat16).eval()
+
+
+@pytest.fixture
+def task(model, tmp_path):
+    torch.manual_seed(1)
+    X = torch.randn(40, 4, dtype=torch.bfloat16)
+    y = torch.randint(0, 3, (40,))
+    store = DatasetStore(str(tmp_path))
+    proof = ModelProver(model, store).generate_proof(X, PROVER_PARAMS)
+    return X, y, proof, store
+
+
+def test_audit_proof(model, task):
+    X, y, proof, store = task
+    claimed_accuracy = accuracy(proof["predicted_classes"], y)
+    verifier = Verifier(store)
+    audit = verifier.audit_proof(
+        model, proof["proofs_base64"], PROVER_PARAMS, X, y, claimed_accuracy,
+        sample=1.0,
+    )
+    assert audit["passed"]
+    assert audit["sample_accuracy"] == pytest.approx(claimed_accuracy, abs=5e-4)
+
+    audit = verifier.audit_proof(
+        model, proof["proofs_base64"], PROVER_PARAMS, X, y, claimed_accuracy,
+        sample=10, seed=0,
+    )
+    assert audit["proofs_passed"]
+    assert len(audit["sample_indices"]) == 10
+
+
+@pytest.mark.parametrize("capture_layer", [None, "net.5"])
+@pytest.mark.parametrize("decode_batching_size,skip_prefill", [(1, False), (3, True)])
+def test_verify_chunked_proof(
+    model, tmp_path, decode_batching_size, skip_prefill, capture_layer
+):
+    torch.manual_seed(2)
+    X = torch.randn(40, 4, dtype=torch.bfloat16)
+    prover_params = {
+        "decode_batching_size": decode_batching_size,
+        "topk": 4,
+        "skip_prefill": skip_prefill,
+        "chunk_size": 7,
+        "capture_layer": capture_layer,
+    }
+    store = DatasetStore(str(tmp_path))
+    prover = ModelProver(model, store)
+    proof = prover.generate_proof(X, prover_params)
+    params = proof["prover_params_used"]
+    verifier = Verifier(store)
+    assert verifier.verify_chunked_proof(
+        model, proof["proofs_base64"], params, X,
+        claimed_predictions=proof["predicted_classes"],
+    )
+
+    # The proofs of one tampered chunk are rejected
+    tampered = X.clone()
+    tampered[14:21] += 1
+    tampered_proof = prover.generate_proof(tampered, prover_params)
+    assert tampered_proof["proofs_base64"] != proof["proofs_base64"]
+    assert not verifier.verify_chunked_proof(
+        model, tampered_proof["proofs_base64"], params, X
+    )
+    # Hooks of the capture layer are removed after verification
+    assert not any(m._forward_hooks for m in model.modules())
+
+
+@pytest.mark.parametrize("sample", [0.0, -0.1, 1.5, 0, -3, True, "all", None])
+def test_audit_proof_invalid_sample(model, task, sample):
+    X, y, proof, store = task
+    with pytest.raises(ValueError):
+        Verifier(store).audit_proof(
+            model, proof["proofs_base64"], PROVER_PARAMS, X, y, 0.5, sample=sample
+        )
+
+
+@pytest.mark.parametrize("claimed_accuracy", [None, -0.1, 1.5])
+def test_audit_proof_invalid_claimed_accuracy(model, task, claimed_accuracy):
+    X, y, proof, store = task
+    with pytest.raises(ValueError):
+        Verifier(store).audit_proof(
+            model, proof["proofs_base64"], PROVER_PARAMS, X, y, claimed_accuracy
+        )
+
+
+def test_main_audit_needs_claimed_accuracy():
+    args = [
+        "--dataset_url", "hf://data", "--model_url", "hf://model",
+        "--task", "verify", "--proof", "", "--audit_sample", "0.5",
+    ]
+    run = subprocess.run(
+        [sys.executable, "main.py", *args], cwd=APP_DIR, capture_output=True, text=True
+    )
+    assert run.returncode == 2
+    assert "--claimed_accuracy" in run.stderr
+
+
+def test_verify_competing_proofs(model, task):
+    X, y, proof, store = task
+    honest = proof["proofs_base64"]
+    claimed_accuracy = accuracy(proof["predicted_classes"], y)
+    proofs_by_operator = {
+        "honest": honest,
+        "copy": honest,
+        "padded": honest + "~" + honest.split("~")[-1],
+    }
+    table = Verifier(store).verify_competing_proofs(
+        model, proofs_by_operator, PROVER_PARAMS, X, y,
+        claimed_accuracy_by_operator={
+            "honest": claimed_accuracy,
+            "copy": claimed_accuracy + 0.5,
+        },
+    )
+    assert table["honest"]["passed"]
+    assert table["honest"]["proof_hash"] == table["copy"]["proof_hash"]
+    assert not table["copy"]["passed"] and not table["copy"]["claims_passed"]
+    assert not table["padded"]["passed"]
+
+
+def test_verify_competing_proofs_needs_labels(model, task):
+    X, y, proof, store = task
+    verifier = Verifier(store)
+    with pytest.raises(ValueError):
+        verifier.verify_competing_proofs(
+            model, {"honest": proof["proofs_base64"]}, PROVER_PARAMS, X,
+            claimed_accuracy_by_operator={"honest": 0.5},
+        )
+    # Without claimed accuracies the labels are not needed
+    table = verifier.verify_competing_proofs(
+        model, {"honest": proof["proofs_base64"]}, PROVER_PARAMS, X
+    )
+    assert table["honest"]["passed"]
@@ -0,0 +1,149 @@
+#pragma once
+
+// Required PyTorch header for tensor operations
+#include <torch/torch.h>
+#include <omp.h>
+#include <thread>
+#include "./stats.h"
+
+// Namespace alias for pybind11
+namespace py = pybind11;
+
+// Get max number of CPU threads available
+inline const int max_num_threads = std::thread::hardware_concurrency();
+
+// Bit masks and constants for float32 and bfloat16 manipulation
+namespace {
+    // FP32: 1 bit sign, 8 bits exponent, 23 bits mantissa
+    constexpr uint32_t FP32_EXP_MASK = 0x7F800000;  // bits 23-30
+    constexpr uint32_t FP32_MANT_MASK = 0x007FFFFF; // bits 0-22
+    constexpr int FP32_EXP_SHIFT = 23;
+    
+    // BF16: 1 bit sign, 8 bits exponent, 7 bits mantissa
+    constexpr uint16_t BF16_EXP_MASK = 0x7F80;  // bits 7-14
+    constexpr uint16_t BF16_MANT_MASK = 0x007F; // bits 0-6
+    constexpr int BF16_EXP_SHIFT = 7;
+
+    // FP16: 1 bit sign, 5 bits exponent, 10 bits mantissa
+    constexpr uint16_t FP16_EXP_MASK = 0x7C00;  // bits 10-14
+    constexpr uint16_t FP16_MANT_MASK = 0x03FF; // bits 0-9
+    constexpr int FP16_EXP_SHIFT = 10;
+
+    // FP8 E4M3: 1 bit sign, 4 bits exponent, 3 bits mantissa
+    constexpr uint8_t FP8_E4M3_EXP_MASK = 0x78;  // bits 3-6
+    constexpr uint8_t FP8_E4M3_MANT_MASK = 0x07; // bits 0-2
+    constexpr int FP8_E4M3_EXP_SHIFT = 3;
+
+    // FP8 E5M2: 1 bit sign, 5 bits exponent, 2 bits mantissa
+    constexpr uint8_t FP8_E5M2_EXP_MASK = 0x7C;  // bits 2-6
+    constexpr uint8_t FP8_E5M2_MANT_MASK = 0x03; // bits 0-1
+    constexpr int FP8_E5M2_EXP_SHIFT = 2;
+}
+
+// Describes how to split the raw bits of a dtype into exponent and mantissa.
+// Integers have no exponent: the sign is used as the "exponent" and the
+// magnitude as the "mantissa", so a sign flip counts as an exponent mismatch.
+struct FpLayout {
+    uint32_t exp_mask;
+    int exp_shift;
+    uint32_t mant_mask;
+    int bytes;
+    bool is_int;
+};
+
+constexpr FpLayout FP32_LAYOUT{FP32_EXP_MASK, FP32_EXP_SHIFT, FP32_MANT_MASK, 4, false};
+constexpr FpLayout BF16_LAYOUT{BF16_EXP_MASK, BF16_EXP_SHIFT, BF16_MANT_MASK, 2, false};
+constexpr FpLayout FP16_LAYOUT{FP16_EXP_MASK, FP16_EXP_SHIFT, FP16_MANT_MASK, 2, false};
+constexpr FpLayout FP8_E4M3_LAYOUT{FP8_E4M3_EXP_MASK, FP8_E4M3_EXP_SHIFT, FP8_E4M3_MANT_MASK, 1, false};
+constexpr FpLayout FP8_E5M2_LAYOUT{FP8_E5M2_EXP_MASK, FP8_E5M2_EXP_SHIFT, FP8_E5M2_MANT_MASK, 1, false};
+constexpr FpLayout INT8_LAYOUT{0, 0, 0, 1, true};
+
+// Bit layout for a tensor dtype; throws for unsupported dtypes
+inline const FpLayout& fp_layout(c10::ScalarType dtype) {
+    switch (dtype) {
+        case c10::ScalarType::Float: return FP32_LAYOUT;
+        case c10::ScalarType::BFloat16: return BF16_LAYOUT;
+        case c10::ScalarType::Half: return FP16_LAYOUT;
+        case c10::ScalarType::Float8_e4m3fn: return FP8_E4M3_LAYOUT;
+        case c10::ScalarType::Float8_e5m2: return FP8_E5M2_LAYOUT;
+        case c10::ScalarType::Char: return INT8_LAYOUT;
+        default:
+            throw std::invalid_argument(
+                std::string("Unsupported dtype ") + c10::toString(dtype) +
+                ", expected one of [float32, bfloat16, float16, float8_e4m3fn, float8_e5m2, int8]");
+    }
+}
+
+// Load the raw bits of element i of a buffer with `bytes`-wide elements
+inline uint32_t load_bits(const void* data, size_t i, int bytes) {
+    switch (bytes) {
+        case 1: return static_cast<const uint8_t*>(data)[i];
+        case 2: return static_cast<const uint16_t*>(data)[i];
+        default: return static_cast<const uint32_t*>(data)[i];
+    }
+}
+
+// Split raw bits into exponent and mantissa according to layout
+inline void split_bits(uint32_t bits, const FpLayout& layout, int32_t& exp, int32_t& mant) {
+    if (layout.is_int) {
+        int32_t value = static_cast<int8_t>(bits & 0xFF);
+        exp = value < 0;
+        mant = std::abs(value);
+    } else {
+        exp = (bits & layout.exp_mask) >> layout.exp_shift;
+        mant = bits & layout.mant_mask;
+    }
+}
+
+// Main function to extract exponent and mantissa bits from tensor
+inline std::tuple<std::vector<int32_t>, std::vector<int32_t>> get_fp_parts(
+    const torch::Tensor& tensor,
+    int num_threads = max_num_threads
+) {
+    // Input Validation
+    TORCH_CHECK(tensor.device().is_cpu(), "Input tensor must be on CPU");
+    TORCH_CHECK(num_threads > 0, "Number of threads must be positive");
+    const FpLayout& layout = fp_layout(tensor.scalar_type());
+    
+    // Extract tensor properties
+    torch::Tensor contiguous = tensor.contiguous();
+    const void* data = contiguous.data_ptr();
+    size_t num_elements = contiguous.numel();
+    toploc_stats::ScopedTimer timer(toploc_stats::FP_SPLIT, num_elements);
+    
+    // Initialize vectors to store exponent and mantissa bits
+    std::vector<int32_t> prefill_exps(num_elements);
+    std::vector<int32_t> prefill_mants(num_elements);
+    
+    omp_set_num_threads(num_threads);
+    
+    #pragma omp parallel for
+    for (size_t i = 0; i < num_elements; ++i) {
+        split_bits(load_bits(data, i, layout.bytes), layout, prefill_exps[i], prefill_mants[i]);
+    }
+    
+    return std::make_tuple(std::move(prefill_exps), std::move(prefill_mants));
+}
+
+inline std::tuple<std::vector<int32_t>, std::vector<int32_t>> get_fp_parts_vec(
+    const std::vector<uint16_t>& tensor,
+    int num_threads = max_num_threads
+) {
+    // Extract tensor properties
+    size_t num_elements = tensor.size();
+    
+    // Initialize vectors to store exponent and mantissa bits
+    std::vector<int32_t> prefill_exps(num_elements);
+    std::vector<int32_t> prefill_mants(num_elements);
+    
+    omp_set_num_threads(num_threads);
+    
+    #pragma omp parallel for
+    for (size_t i = 0; i < num_elements; ++i) {
+        uint16_t bits = tensor[i];
+        prefill_exps[i] = (bits & BF16_EXP_MASK) >> BF16_EXP_SHIFT;
+        prefill_mants[i] = bits & BF16_MANT_MASK;
+    }
+    
+    return std::make_tuple(std::move(prefill_exps), std::move(prefill_mants));
+}
@@ -1,4 +1,8 @@
-from typing import List
+from typing import Dict, List
 
 def compute_newton_coefficients(x: List[int], y: List[int]) -> List[int]: ...
 def evaluate_polynomial(coefficients: List[int], x: int) -> int: ...
+
+def _stats() -> Dict[str, Dict[str, int]]: ...
+def _reset_stats() -> None: ...
+def _set_stats_enabled(enabled: bool) -> None: ...
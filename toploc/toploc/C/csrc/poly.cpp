@@ -3,10 +3,14 @@
 #include <string>
 #include <sstream>
 #include <stdexcept>
+#include <algorithm>
+#include <exception>
+#include <thread>
 #include <pybind11/stl.h>
 #include <pybind11/operators.h>
-#include "./ndd.cpp"
-#include "./utils.cpp"
+#include "./ndd.h"
+#include "./fp.h"
+#include "./stats.h"
 
 #ifdef DEBUG
 #define DEBUG_PRINT(x) std::cout << x << std::endl
@@ -24,6 +28,7 @@ static const std::string base64_chars =
     "0123456789+/";
 
 static std::string base64_encode(const std::string& input) {
+    toploc_stats::ScopedTimer timer(toploc_stats::BASE64, input.size());
     std::string ret;
     int i = 0;
     int j = 0;
@@ -64,6 +69,7 @@ static std::string base64_encode(const std::string& input) {
 }
 
 static std::string base64_decode(const std::string& encoded_string) {
+    toploc_stats::ScopedTimer timer(toploc_stats::BASE64, encoded_string.size());
     size_t in_len = encoded_string.size();
     int i = 0;
     int j = 0;
@@ -101,6 +107,46 @@ static std::string base64_decode(const std::string& encoded_string) {
     return ret;
 }
 
+/**
+ * Run fn(start, end) over [0, total), split into one contiguous range per
+ * hardware thread. Exceptions thrown by fn are rethrown on the calling thread.
+ */
+template <typename Fn>
+static void parallel_for(std::size_t total, Fn&& fn) {
+    if (total == 0) {
+        return;
+    }
+    std::size_t tc = std::min<std::size_t>(std::max(1u, std::thread::hardware_concurrency()), total);
+    std::size_t chunk = (total + tc - 1)/tc;
+    std::vector<std::exception_ptr> errors(tc);
+    std::vector<std::thread> threads {};
+    threads.reserve(tc);
+    {
+        // Time spent spawning the worker threads
+        toploc_stats::ScopedTimer timer(toploc_stats::THREAD_STARTUP, tc);
+        for (std::size_t ti=0; ti < tc; ++ti) {
+            threads.emplace_back([=, &fn, &errors] {
+                std::size_t start = ti * chunk;
+                std::size_t end = std::min(start + chunk, total);
+                try {
+                    if (start < end) {
+                        fn(start, end);
+                    }
+                } catch (...) {
+                    errors[ti] = std::current_exception();
+                }
+            });
+        }
+    }
+
+    for (auto&& t : threads) t.join();
+    for (auto&& error : errors) {
+        if (error) {
+            std::rethrow_exception(error);
+        }
+    }
+}
+
 class ProofPoly {
 public:
     std::vector<int> coeffs;
@@ -195,20 +241,23 @@ public:
         
         // Find injective modulus
         int modulus = 0;
-        for (int i = 65497; i > 0; i--) {
-            std::vector<int> modded;
-            bool is_injective = true;
-            for (int val : x) {
-                int mod_val = val % i;
-                if (std::find(modded.begin(), modded.end(), mod_val) != modded.end()) {
-                    is_injective = false;
+        {
+            toploc_stats::ScopedTimer timer(toploc_stats::MODULUS_SEARCH, x.size());
+            for (int i = 65497; i > 0; i--) {
+                std::vector<int> modded;
+                bool is_injective = true;
+                for (int val : x) {
+                    int mod_val = val % i;
+                    if (std::find(modded.begin(), modded.end(), mod_val) != modded.end()) {
+                        is_injective = false;
+                        break;
+                    }
+                    modded.push_back(mod_val);
+                }
+                if (is_injective) {
+                    modulus = i;
                     break;
                 }
-                modded.push_back(mod_val);
-            }
-            if (is_injective) {
-                modulus = i;
-                break;
             }
         }
         
@@ -227,58 +276,95 @@ public:
         return ProofPoly(coeffs, modulus);
     }
 
-    static ProofPoly from_points_tensor(const torch::Tensor& x, const torch::Tensor& y) {
-        if (x.dim() != 1 || y.dim() != 1) {
-            throw std::invalid_argument("x and y must be 1D tensors");
-        }
-        if (x.dtype() != torch::kInt32 && x.dtype() != torch::kLong) {
-            throw std::invalid_argument("x must be an int32 or long tensor");
-        }
-
+    // Flattened x values of an index tensor
+    static std::vector<int> x_values(const torch::Tensor& x_) {
+        torch::Tensor x = x_.contiguous();
         // TODO: Make this work with int64_t x
-        std::vector<int> x_vec;
         if (x.dtype() == torch::kLong) {
-            x_vec = std::vector<int>(x.data_ptr<int64_t>(), x.data_ptr<int64_t>() + x.numel());
-        } else if (x.dtype() == torch::kInt32 || x.dtype() == torch::kUInt32) {
-            x_vec = std::vector<int>(x.data_ptr<int>(), x.data_ptr<int>() + x.numel());
+            return std::vector<int>(x.data_ptr<int64_t>(), x.data_ptr<int64_t>() + x.numel());
+        } else if (x.dtype() == torch::kInt32) {
+            return std::vector<int>(x.data_ptr<int>(), x.data_ptr<int>() + x.numel());
         } else {
-            throw std::invalid_argument("x must be of dtype [int32, uint32, long]");
-        } 
-        
+            throw std::invalid_argument("x must be of dtype [int32, long]");
+        }
+    }
+
+    // Flattened y values of a value tensor; 16-bit and 8-bit floats are taken as raw bits
+    static std::vector<int> y_values(const torch::Tensor& y_) {
+        torch::Tensor y = y_.contiguous();
         // We dont support float32 yet
-        std::vector<int> y_vec;
         if (y.dtype() == torch::kBFloat16) {
-            y_vec = std::vector<int>(
+            return std::vector<int>(
                 reinterpret_cast<const uint16_t*>(y.data_ptr<c10::BFloat16>()),
                 reinterpret_cast<const uint16_t*>(y.data_ptr<c10::BFloat16>() + y.numel())
             );
         } else if (y.dtype() == torch::kFloat16) {
-            y_vec = std::vector<int>(
+            return std::vector<int>(
                 reinterpret_cast<const uint16_t*>(y.data_ptr<c10::Half>()),
                 reinterpret_cast<const uint16_t*>(y.data_ptr<c10::Half>() + y.numel())
             );
         } else if (y.dtype() == torch::kInt32) {
-            y_vec = std::vector<int>(
+            return std::vector<int>(
                 y.data_ptr<int32_t>(),
                 y.data_ptr<int32_t>() + y.numel()
             );
         } else if (y.dtype() == torch::kUInt32) {
-            y_vec = std::vector<int>(
+            return std::vector<int>(
                 y.data_ptr<uint32_t>(),
                 y.data_ptr<uint32_t>() + y.numel()
             );
         } else if (y.dtype() == torch::kLong) {
-            y_vec = std::vector<int>(
+            return std::vector<int>(
                 y.data_ptr<int64_t>(),
                 y.data_ptr<int64_t>() + y.numel()
             );
+        } else if (y.dtype() == torch::kInt8 || y.dtype() == torch::kUInt8 ||
+                   y.scalar_type() == c10::ScalarType::Float8_e4m3fn ||
+                   y.scalar_type() == c10::ScalarType::Float8_e5m2) {
+            // 8-bit values are interpolated as their raw bits
+            const uint8_t* bits = reinterpret_cast<const uint8_t*>(y.data_ptr());
+            return std::vector<int>(bits, bits + y.numel());
         } else if (y.dtype() == torch::kFloat32) {
             throw std::invalid_argument("float32 not supported yet because interpolate has hardcode prime");
         } else {
-            throw std::invalid_argument("y must be of dtype [float16, bfloat16, float32]");
+            throw std::invalid_argument(
+                "y must be of dtype [float16, bfloat16, float8_e4m3fn, float8_e5m2, int8, uint8, int32, uint32, long]");
         }
+    }
 
-        return from_points(x_vec, y_vec);
+    static ProofPoly from_points_tensor(const torch::Tensor& x, const torch::Tensor& y) {
+        if (x.dim() != 1 || y.dim() != 1) {
+            throw std::invalid_argument("x and y must be 1D tensors");
+        }
+        if (x.dtype() != torch::kInt32 && x.dtype() != torch::kLong) {
+            throw std::invalid_argument("x must be an int32 or long tensor");
+        }
+        return from_points(x_values(x), y_values(y));
+    }
+
+    // One polynomial per row of 2D x and y tensors, interpolated in parallel
+    static std::vector<ProofPoly> from_points_batch(const torch::Tensor& x, const torch::Tensor& y) {
+        if (x.dim() != 2 || y.dim() != 2) {
+            throw std::invalid_argument("x and y must be 2D tensors");
+        }
+        if (x.sizes() != y.sizes()) {
+            throw std::invalid_argument("x and y must have the same shape");
+        }
+        std::vector<int> xs = x_values(x);
+        std::vector<int> ys = y_values(y);
+        std::size_t rows = x.size(0);
+        std::size_t k = x.size(1);
+
+        std::vector<ProofPoly> proofs(rows, ProofPoly::null(k));
+        parallel_for(rows, [&](std::size_t start, std::size_t end) {
+            for (std::size_t r = start; r < end; ++r) {
+                proofs[r] = from_points(
+                    std::vector<int>(xs.begin() + r * k, xs.begin() + (r + 1) * k),
+                    std::vector<int>(ys.begin() + r * k, ys.begin() + (r + 1) * k)
+                );
+            }
+        });
+        return proofs;
     }
 };
 
@@ -323,109 +409,226 @@ public:
     }
 };
 
-std::vector<VerificationResult> verify_proofs(
+/**
+ * Top-k magnitudes of a flat tensor, returned as (indices, values).
+ *
+ * 8-bit dtypes are ranked in float32, which is exact for them, because
+ * |int8 min| overflows in int8 and fp8 has few kernels. Their values are
+ * gathered as raw uint8 bits.
+ */
+static std::tuple<torch::Tensor, torch::Tensor> topk_magnitudes(const torch::Tensor& flat, int topk) {
+    if (flat.element_size() == 1) {
+        torch::Tensor indices = std::get<1>(flat.to(torch::kFloat32).abs().topk(topk));
+        return {indices, flat.view(torch::kUInt8).index_select(0, indices)};
+    }
+    torch::Tensor indices = std::get<1>(flat.abs().topk(topk));
+    return {indices, flat.index_select(0, indices)};
+}
+
+/**
+ * Fused evaluate-and-compare kernel for one batch.
+ *
+ * Evaluates the proof polynomial at each of the top-k indices, splits the
+ * proof value and the activation value into exponent and mantissa and
+ * accumulates the mismatch count and mantissa error statistics in a single
+ * pass. The median is found by selection rather than a full sort.
+ *
+ * `values` holds `topk` raw activation bit patterns laid out according to
+ * `layout`; the proof values are interpreted with the same layout.
+ * `mant_errs` is caller-owned scratch storage that is reused across batches
+ * to avoid per-batch allocation.
+ */
+static VerificationResult compare_topk(
+    const int64_t* indices,
+    const void* values,
+    const FpLayout& layout,
+    int topk,
+    const ProofPoly& proof,
+    std::vector<int32_t>& mant_errs
+) {
+    mant_errs.clear();
+    int exp_mismatch_count = 0;
+    int64_t mant_err_sum = 0;
+
+    for (int i = 0; i < topk; i++) {
+        int64_t x = indices[i];
+        if (proof.modulus > 0) {
+            x %= proof.modulus;
+        }
+        uint32_t proof_bits = static_cast<uint32_t>(
+            evaluate_polynomial(proof.coeffs, static_cast<int>(x)));
+        uint32_t value_bits = load_bits(values, i, layout.bytes);
+
+        int32_t proof_exp, proof_mant, value_exp, value_mant;
+        split_bits(proof_bits, layout, proof_exp, proof_mant);
+        split_bits(value_bits, layout, value_exp, value_mant);
+        if (proof_exp != value_exp) {
+            exp_mismatch_count++;
+            continue;
+        }
+        int32_t err = std::abs(proof_mant - value_mant);
+        mant_err_sum += err;
+        mant_errs.push_back(err);
+    }
+
+    if (mant_errs.empty()) {
+        return {exp_mismatch_count, std::pow(2, 64), std::pow(2, 64)};
+    }
+    double mean = static_cast<double>(mant_err_sum) / mant_errs.size();
+    auto mid = mant_errs.begin() + mant_errs.size() / 2;
+    std::nth_element(mant_errs.begin(), mid, mant_errs.end());
+    return {exp_mismatch_count, mean, static_cast<double>(*mid)};
+}
+
+// Verify every proof against its activation batch, writing the statistics
+// of proof p into exp_mismatches[p], mant_err_mean[p] and mant_err_median[p].
+// The output arrays must hold at least proofs.size() elements.
+static void verify_proofs_into(
     const torch::Tensor& activations,
     const std::vector<ProofPoly>& proofs,
     int decode_batching_size,
-    int topk
+    int topk,
+    int32_t* out_exp_mismatches,
+    double* out_mant_err_mean,
+    double* out_mant_err_median
 ) {
-    const auto eval_batch = [&](size_t proof_idx) -> VerificationResult {
+    const FpLayout& layout = fp_layout(activations.scalar_type());
+
+    const auto eval_batch = [&](size_t proof_idx, std::vector<int32_t>& mant_errs) -> VerificationResult {
         // Get corresponding activation batch
         int batch_start = proof_idx * decode_batching_size;
-        int batch_end = std::min(batch_start + decode_batching_size, (int)activations.numel());
-        DEBUG_PRINT("activations: " << activations.sizes());
+        int batch_end = std::min(batch_start + decode_batching_size, (int)activations.size(0));
         DEBUG_PRINT("batch_start: " << batch_start);
         DEBUG_PRINT("batch_end: " << batch_end);
-        torch::Tensor chunk = activations.slice(0, batch_start, batch_end);
+        torch::Tensor chunk = activations.slice(0, batch_start, batch_end).reshape({-1});
 
-        DEBUG_PRINT("chunk: " << chunk.sizes());
-        chunk = chunk.view({-1});
-        DEBUG_PRINT("chunk: " << chunk.sizes());
         // Get top-k indices and values
-        auto topk_result = chunk.abs().topk(topk);
-        // Note: Up till here, the tensors could be on GPU
-        torch::Tensor topk_indices = std::get<1>(topk_result);
-        torch::Tensor topk_values = chunk.index_select(0, topk_indices).cpu();
-        topk_indices = topk_indices.cpu();
-
-        DEBUG_PRINT("topk_indices: " << topk_indices.sizes());
-        DEBUG_PRINT("topk_values: " << topk_values.sizes());
+        torch::Tensor topk_indices, topk_values;
+        {
+            toploc_stats::ScopedTimer timer(toploc_stats::TOPK, chunk.numel());
+            std::tie(topk_indices, topk_values) = topk_magnitudes(chunk, topk);
+            // Note: Up till here, the tensors could be on GPU
+            topk_values = topk_values.cpu().contiguous();
+            topk_indices = topk_indices.cpu().contiguous();
+        }
 
-        // Evaluate polynomial at topk indices
-        std::vector<int> indices_vec(
+        toploc_stats::ScopedTimer timer(toploc_stats::EVALUATION, topk);
+        return compare_topk(
             topk_indices.const_data_ptr<int64_t>(),
-            topk_indices.const_data_ptr<int64_t>() + topk_indices.numel()
+            topk_values.data_ptr(),
+            layout,
+            topk,
+            proofs[proof_idx],
+            mant_errs
         );
+    };
 
-        // Modulus the indices
-        for (size_t idx = 0; idx < indices_vec.size(); idx++) {
-            indices_vec[idx] = indices_vec[idx] % proofs[proof_idx].modulus;
-        }
-
-        DEBUG_PRINT("indices_vec: " << indices_vec.size());
-        DEBUG_PRINT("proofs[proof_idx].coeffs: " << proofs[proof_idx].coeffs.size());
-        std::vector<int> y_values = evaluate_polynomials(proofs[proof_idx].coeffs, indices_vec);
-
-        // Convert to tensors for comparison
-        std::vector<uint16_t> proof_values(y_values.begin(), y_values.end());
-
-        // Get exponents and mantissas
-        auto [exps, mants] = get_fp_parts_vec(proof_values);
-        auto [proof_exps, proof_mants] = get_fp_parts(topk_values);
-
-        DEBUG_PRINT("exps: " << exps.size());
-        DEBUG_PRINT("proof_exps: " << proof_exps.size());
-        DEBUG_PRINT("mants: " << mants.size());
-        DEBUG_PRINT("proof_mants: " << proof_mants.size());
-
-        // Calculate mismatches and errors
-        std::vector<bool> exp_mismatches;
-        std::vector<float> mant_errs;
-
-        for (int i = 0; i < topk; i++) {
-            bool exp_mismatch = exps[i] != proof_exps[i];
-            exp_mismatches.push_back(exp_mismatch);
-            if (!exp_mismatch) {
-                mant_errs.push_back(std::abs(mants[i] - proof_mants[i]));
-            }
+    parallel_for(proofs.size(), [&](std::size_t start, std::size_t end) {
+        // Per-thread scratch storage, reused for every batch of this thread
+        std::vector<int32_t> mant_errs;
+        mant_errs.reserve(topk);
+        for (std::size_t p=start; p < end; ++p) {
+            VerificationResult result = eval_batch(p, mant_errs);
+            out_exp_mismatches[p] = result.exp_mismatches;
+            out_mant_err_mean[p] = result.mant_err_mean;
+            out_mant_err_median[p] = result.mant_err_median;
         }
+    });
+}
 
-        // Calculate statistics
-        int exp_mismatch_count = std::count(exp_mismatches.begin(), exp_mismatches.end(), true);
-        double mean = 0.0;
-        double median = 0.0;
-
-        if (!mant_errs.empty()) {
-            mean = std::accumulate(mant_errs.begin(), mant_errs.end(), 0.0) / mant_errs.size();
-            std::sort(mant_errs.begin(), mant_errs.end());
-            median = mant_errs[mant_errs.size() / 2];
-        } else {
-            mean = std::pow(2, 64);
-            median = std::pow(2, 64);
-        }
-        return {exp_mismatch_count, mean, median};
-    };
+std::vector<VerificationResult> verify_proofs(
+    const torch::Tensor& activations,
+    const std::vector<ProofPoly>& proofs,
+    int decode_batching_size,
+    int topk
+) {
+    std::size_t total = proofs.size();
+    std::vector<int32_t> exp_mismatches(total);
+    std::vector<double> mant_err_mean(total);
+    std::vector<double> mant_err_median(total);
+    verify_proofs_into(
+        activations, proofs, decode_batching_size, topk,
+        exp_mismatches.data(), mant_err_mean.data(), mant_err_median.data()
+    );
 
     std::vector<VerificationResult> results{};
-    results.resize(proofs.size());
-    std::size_t tc = std::max(1u, std::thread::hardware_concurrency());
-    std::vector<std::thread> threads {};
-    threads.reserve(tc);
-    std::size_t total = proofs.size();
-    std::size_t chunk = (total + tc - 1)/tc;
-    for (std::size_t ti=0; ti < tc; ++ti) {
-        threads.emplace_back([ti, chunk, total, &results, &eval_batch] {
-            std::size_t start = ti * chunk;
-            std::size_t end = std::min(start + chunk, total);
-            for (std::size_t p=start; p < end; ++p) {
-                results[p] = eval_batch(p);
-            }
-        });
+    results.reserve(total);
+    for (std::size_t p = 0; p < total; ++p) {
+        results.emplace_back(exp_mismatches[p], mant_err_mean[p], mant_err_median[p]);
     }
+    return results;
+}
 
-    for (auto&& t : threads) t.join();
+// Struct-of-arrays variant of verify_proofs: returns three contiguous CPU
+// tensors (exp_mismatches: int32, mant_err_mean: float64, mant_err_median: float64)
+// instead of one VerificationResult object per proof.
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor> verify_proofs_tensors(
+    const torch::Tensor& activations,
+    const std::vector<ProofPoly>& proofs,
+    int decode_batching_size,
+    int topk
+) {
+    int64_t total = static_cast<int64_t>(proofs.size());
+    torch::Tensor exp_mismatches = torch::empty({total}, torch::kInt32);
+    torch::Tensor mant_err_mean = torch::empty({total}, torch::kFloat64);
+    torch::Tensor mant_err_median = torch::empty({total}, torch::kFloat64);
+    verify_proofs_into(
+        activations, proofs, decode_batching_size, topk,
+        exp_mismatches.data_ptr<int32_t>(),
+        mant_err_mean.data_ptr<double>(),
+        mant_err_median.data_ptr<double>()
+    );
+    return std::make_tuple(exp_mismatches, mant_err_mean, mant_err_median);
+}
 
-    return results;
+// Verify row-wise proofs against precomputed top-k indices and values.
+// Row r of topk_indices / topk_values (shape [rows, topk]) is checked against
+// proofs[r]. Returns struct-of-arrays results like verify_proofs_tensors.
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor> verify_proofs_topk(
+    const torch::Tensor& topk_indices_,
+    const torch::Tensor& topk_values_,
+    const std::vector<ProofPoly>& proofs
+) {
+    TORCH_CHECK(topk_indices_.dim() == 2 && topk_values_.dim() == 2,
+                "topk_indices and topk_values must be 2D tensors");
+    TORCH_CHECK(topk_indices_.sizes() == topk_values_.sizes(),
+                "topk_indices and topk_values must have the same shape");
+    TORCH_CHECK(topk_indices_.size(0) == static_cast<int64_t>(proofs.size()),
+                "Expected one proof per row of topk_indices");
+    torch::Tensor topk_indices = topk_indices_.cpu().to(torch::kLong).contiguous();
+    torch::Tensor topk_values = topk_values_.cpu().contiguous();
+    const FpLayout& layout = fp_layout(topk_values.scalar_type());
+    const int topk = topk_indices.size(1);
+    const int64_t* indices = topk_indices.const_data_ptr<int64_t>();
+    const uint8_t* values = static_cast<const uint8_t*>(topk_values.data_ptr());
+
+    int64_t total = static_cast<int64_t>(proofs.size());
+    torch::Tensor exp_mismatches = torch::empty({total}, torch::kInt32);
+    torch::Tensor mant_err_mean = torch::empty({total}, torch::kFloat64);
+    torch::Tensor mant_err_median = torch::empty({total}, torch::kFloat64);
+    int32_t* out_exp_mismatches = exp_mismatches.data_ptr<int32_t>();
+    double* out_mant_err_mean = mant_err_mean.data_ptr<double>();
+    double* out_mant_err_median = mant_err_median.data_ptr<double>();
+
+    parallel_for(proofs.size(), [&](std::size_t start, std::size_t end) {
+        toploc_stats::ScopedTimer timer(toploc_stats::EVALUATION, (end - start) * topk);
+        std::vector<int32_t> mant_errs;
+        mant_errs.reserve(topk);
+        for (std::size_t r = start; r < end; ++r) {
+            VerificationResult result = compare_topk(
+                indices + r * topk,
+                values + r * topk * layout.bytes,
+                layout,
+                topk,
+                proofs[r],
+                mant_errs
+            );
+            out_exp_mismatches[r] = result.exp_mismatches;
+            out_mant_err_mean[r] = result.mant_err_mean;
+            out_mant_err_median[r] = result.mant_err_median;
+        }
+    });
+    return std::make_tuple(exp_mismatches, mant_err_mean, mant_err_median);
 }
 
 std::vector<VerificationResult> verify_proofs_bytes(
@@ -456,13 +659,23 @@ std::vector<VerificationResult> verify_proofs_base64(
 
 
 
-PYBIND11_MODULE(poly, m) {
-    py::class_<ProofPoly>(m, "ProofPoly")
+// The heavy kernels only touch Python objects while their arguments and
+// results are converted, so they run with the GIL released and overlap with
+// other Python threads
+using release_gil = py::call_guard<py::gil_scoped_release>;
+
+// TORCH_EXTENSION_NAME is set by the build to the last component of the
+// extension name, so the same source builds the generic poly module and the
+// ISA-specific poly_avx2 and poly_avx512 modules. Their classes are module
+// local so that several builds can be loaded side by side.
+PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
+    py::class_<ProofPoly>(m, "ProofPoly", py::module_local())
         .def(py::init<const std::vector<int>&, int>())
         .def("__call__", &ProofPoly::call)
         .def("__len__", &ProofPoly::length)
-        .def_static("from_points", &ProofPoly::from_points)
-        .def_static("from_points_tensor", &ProofPoly::from_points_tensor)
+        .def_static("from_points", &ProofPoly::from_points, release_gil())
+        .def_static("from_points_tensor", &ProofPoly::from_points_tensor, release_gil())
+        .def_static("from_points_batch", &ProofPoly::from_points_batch, release_gil())
         .def_static("null", &ProofPoly::null)
         .def("to_bytes", &ProofPoly::to_bytes)
         .def("to_base64", &ProofPoly::to_base64)
@@ -478,7 +691,7 @@ PYBIND11_MODULE(poly, m) {
         .def_readwrite("coeffs", &ProofPoly::coeffs)
         .def_readwrite("modulus", &ProofPoly::modulus);
 
-    py::class_<VerificationResult>(m, "VerificationResult")
+    py::class_<VerificationResult>(m, "VerificationResult", py::module_local())
         .def(py::init<int, double, double>())
         .def(py::pickle(
             [](const VerificationResult &v) { return v.to_tuple(); },
@@ -491,24 +704,65 @@ PYBIND11_MODULE(poly, m) {
         .def(py::self == py::self)
         .def(py::self != py::self);
         
-    m.def("verify_proofs", &verify_proofs, 
+    m.def("verify_proofs", &verify_proofs, release_gil(), 
           py::arg("activations"), 
           py::arg("proofs"),
           py::arg("decode_batching_size"),
           py::arg("topk")
     );
 
-    m.def("verify_proofs_bytes", &verify_proofs_bytes, 
+    m.def("verify_proofs_tensors", &verify_proofs_tensors, release_gil(),
+          py::arg("activations"),
+          py::arg("proofs"),
+          py::arg("decode_batching_size"),
+          py::arg("topk")
+    );
+
+    m.def("verify_proofs_topk", &verify_proofs_topk, release_gil(),
+          py::arg("topk_indices"),
+          py::arg("topk_values"),
+          py::arg("proofs")
+    );
+
+    m.def("verify_proofs_bytes", &verify_proofs_bytes, release_gil(), 
           py::arg("activations"), 
           py::arg("proofs"),
           py::arg("decode_batching_size"),
           py::arg("topk")
     );
 
-    m.def("verify_proofs_base64", &verify_proofs_base64, 
+    m.def("verify_proofs_base64", &verify_proofs_base64, release_gil(), 
           py::arg("activations"), 
           py::arg("proofs"),
           py::arg("decode_batching_size"),
           py::arg("topk")
     );
+
+    // The hot kernels of ndd and utils, built with the same ISA as this module
+    m.def("compute_newton_coefficients", &compute_newton_coefficients, release_gil(),
+          py::arg("x"),
+          py::arg("y")
+    );
+
+    m.def("evaluate_polynomial", &evaluate_polynomial,
+          py::arg("coefficients"),
+          py::arg("x")
+    );
+
+    m.def("evaluate_polynomials", &evaluate_polynomials, release_gil(),
+          py::arg("coefficients"),
+          py::arg("x")
+    );
+
+    m.def("get_fp_parts", &get_fp_parts, release_gil(),
+          py::arg("tensor"),
+          py::arg("num_threads") = max_num_threads
+    );
+
+    // Pickle through toploc.backend, so that proofs pickled with one backend
+    // load with whichever backend is selected on the unpickling machine
+    m.attr("ProofPoly").attr("__module__") = "toploc.backend";
+    m.attr("VerificationResult").attr("__module__") = "toploc.backend";
+
+    toploc_stats::bind(m);
 }
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Tuple, Union
 import torch
 
 class ProofPoly:
@@ -21,7 +21,18 @@ class ProofPoly:
         Create a polynomial from a tensor of x and y values.
         x and y must be 1D tensors of the same length.
         x must be of dtype [int32, uint32, long]
-        y must be of dtype [float16, bfloat16, float32]
+        y must be of dtype [float16, bfloat16, float8_e4m3fn, float8_e5m2, int8,
+        uint8, int32, uint32, long]. 16-bit and 8-bit values are interpolated
+        as their raw bit patterns.
+        """
+        ...
+
+    @staticmethod
+    def from_points_batch(x: torch.Tensor, y: torch.Tensor) -> List["ProofPoly"]:
+        """
+        Create one polynomial per row of 2D tensors of x and y values.
+        x and y must be 2D tensors of the same shape, with the same dtypes as
+        accepted by from_points_tensor. Rows are interpolated in parallel.
         """
         ...
 
@@ -87,6 +98,46 @@ def verify_proofs(
     """
     ...
 
+def verify_proofs_tensors(
+    activations: torch.Tensor,
+    proofs: List[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Verify proofs for a given set of activations, returning struct-of-arrays results.
+
+    Args:
+        activations: A 2D tensor of shape (sequence_length, hidden_size)
+        proofs: A list of ProofPoly objects
+        decode_batching_size: The number of activations to process in a single batch
+        topk: The number of top activations to consider for verification
+
+    Returns:
+        Three 1D CPU tensors of length len(proofs):
+        exp_mismatches (int32), mant_err_mean (float64) and mant_err_median (float64)
+    """
+    ...
+
+def verify_proofs_topk(
+    topk_indices: torch.Tensor,
+    topk_values: torch.Tensor,
+    proofs: List[ProofPoly],
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Verify row-wise proofs against precomputed top-k indices and values.
+
+    Args:
+        topk_indices: A 2D tensor of shape (rows, topk) of activation indices
+        topk_values: A 2D tensor of shape (rows, topk) of the activations at those indices
+        proofs: One ProofPoly per row
+
+    Returns:
+        Three 1D CPU tensors of length len(proofs):
+        exp_mismatches (int32), mant_err_mean (float64) and mant_err_median (float64)
+    """
+    ...
+
 def verify_proofs_bytes(
     activations: torch.Tensor, proofs: List[str], decode_batching_size: int, topk: int
 ) -> List[VerificationResult]:
@@ -114,3 +165,14 @@ def verify_proofs_base64(
         topk: The number of top activations to consider for verification
     """
     ...
+
+def compute_newton_coefficients(x: List[int], y: List[int]) -> List[int]: ...
+def evaluate_polynomial(coefficients: List[int], x: int) -> int: ...
+def evaluate_polynomials(coefficients: List[int], x: List[int]) -> List[int]: ...
+def get_fp_parts(
+    tensor: torch.Tensor,
+    num_threads: int = ...,
+) -> Tuple[List[int], List[int]]: ...
+def _stats() -> Dict[str, Dict[str, int]]: ...
+def _reset_stats() -> None: ...
+def _set_stats_enabled(enabled: bool) -> None: ...
@@ -0,0 +1,3 @@
+// ISA-specific build of poly.cpp, see POLY_VARIANTS in setup.py.
+// A separate translation unit gives this build its own object file.
+#include "./poly.cpp"
@@ -0,0 +1,118 @@
+#pragma once
+
+#include <torch/torch.h>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+
+// Namespace alias for pybind11
+namespace py = pybind11;
+
+/**
+ * Low-overhead instrumentation of the native kernels.
+ *
+ * Every stage has an atomic call counter, an item counter (points, bytes, ...)
+ * and a nanosecond timer. Collection is switched at runtime; when disabled,
+ * a ScopedTimer costs a single relaxed atomic load.
+ *
+ * Each extension module gets its own copy of the counters, so the Python side
+ * (toploc.instrumentation) sums them over all modules.
+ */
+namespace toploc_stats {
+
+enum Stage : int {
+    MODULUS_SEARCH = 0,
+    INTERPOLATION,
+    TOPK,
+    EVALUATION,
+    FP_SPLIT,
+    BASE64,
+    THREAD_STARTUP,
+    NUM_STAGES
+};
+
+inline const char* stage_name(int stage) {
+    switch (stage) {
+        case MODULUS_SEARCH: return "modulus_search";
+        case INTERPOLATION: return "interpolation";
+        case TOPK: return "topk";
+        case EVALUATION: return "evaluation";
+        case FP_SPLIT: return "fp_split";
+        case BASE64: return "base64";
+        case THREAD_STARTUP: return "thread_startup";
+        default: return "unknown";
+    }
+}
+
+struct Counter {
+    std::atomic<uint64_t> calls{0};
+    std::atomic<uint64_t> items{0};
+    std::atomic<uint64_t> nanoseconds{0};
+};
+
+inline std::atomic<bool> enabled{false};
+inline Counter counters[NUM_STAGES];
+
+// Times the enclosing scope and attributes it to a stage
+class ScopedTimer {
+public:
+    explicit ScopedTimer(Stage stage, uint64_t items = 1)
+        : stage_(stage), items_(items), active_(enabled.load(std::memory_order_relaxed)) {
+        if (active_) {
+            start_ = std::chrono::steady_clock::now();
+        }
+    }
+
+    ~ScopedTimer() {
+        if (!active_) {
+            return;
+        }
+        auto elapsed = std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::steady_clock::now() - start_).count();
+        Counter& counter = counters[stage_];
+        counter.calls.fetch_add(1, std::memory_order_relaxed);
+        counter.items.fetch_add(items_, std::memory_order_relaxed);
+        counter.nanoseconds.fetch_add(static_cast<uint64_t>(elapsed), std::memory_order_relaxed);
+    }
+
+    ScopedTimer(const ScopedTimer&) = delete;
+    ScopedTimer& operator=(const ScopedTimer&) = delete;
+
+private:
+    Stage stage_;
+    uint64_t items_;
+    bool active_;
+    std::chrono::steady_clock::time_point start_;
+};
+
+inline void reset() {
+    for (Counter& counter : counters) {
+        counter.calls.store(0, std::memory_order_relaxed);
+        counter.items.store(0, std::memory_order_relaxed);
+        counter.nanoseconds.store(0, std::memory_order_relaxed);
+    }
+}
+
+inline py::dict snapshot() {
+    py::dict result;
+    for (int stage = 0; stage < NUM_STAGES; ++stage) {
+        py::dict counter;
+        counter["calls"] = counters[stage].calls.load(std::memory_order_relaxed);
+        counter["items"] = counters[stage].items.load(std::memory_order_relaxed);
+        counter["nanoseconds"] = counters[stage].nanoseconds.load(std::memory_order_relaxed);
+        result[stage_name(stage)] = counter;
+    }
+    return result;
+}
+
+// Expose the counters of this module as _stats, _reset_stats and _set_stats_enabled
+inline void bind(py::module_& m) {
+    m.def("_stats", &snapshot, "Snapshot of the per-stage counters of this module");
+    m.def("_reset_stats", &reset, "Reset the per-stage counters of this module");
+    m.def("_set_stats_enabled",
+          [](bool value) { enabled.store(value, std::memory_order_relaxed); },
+          "Switch collection of the per-stage counters on or off",
+          py::arg("enabled"));
+}
+
+}  // namespace toploc_stats
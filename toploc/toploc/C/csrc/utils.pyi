@@ -1,7 +1,19 @@
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 import torch
 
 def get_fp_parts(
     tensor: torch.Tensor,
     num_threads: int = ...,
-) -> Tuple[List[int], List[int]]: ...
+) -> Tuple[List[int], List[int]]:
+    """
+    Split each element of a CPU tensor into its exponent and mantissa bits.
+
+    Supports float32, bfloat16, float16, float8_e4m3fn, float8_e5m2 and int8.
+    Integers have no exponent, so for int8 the sign bit is returned as the
+    exponent and the magnitude as the mantissa.
+    """
+    ...
+
+def _stats() -> Dict[str, Dict[str, int]]: ...
+def _reset_stats() -> None: ...
+def _set_stats_enabled(enabled: bool) -> None: ...
@@ -1,13 +1,55 @@
 # ruff: noqa: F401
 from toploc.poly import (
     ProofPoly,
+    VerificationResult,
+    VerificationResults,
+    Verdict,
     build_proofs,
     build_proofs_bytes,
     build_proofs_base64,
+    build_proofs_rowwise,
+    build_proofs_rowwise_bytes,
+    build_proofs_rowwise_base64,
+    ProofBuilder,
     verify_proofs,
     verify_proofs_bytes,
     verify_proofs_base64,
+    verify_proofs_rowwise,
+    verify_proofs_rowwise_bytes,
+    verify_proofs_rowwise_base64,
+    decide,
+    verify_and_decide,
+    verify_and_decide_bytes,
+    verify_and_decide_base64,
+    verify_and_decide_many,
+    verify_and_decide_many_bytes,
+    verify_and_decide_many_base64,
+    StreamingVerifier,
+    SpotCheckResult,
+    spot_check_proofs,
+    spot_check_proofs_bytes,
+    spot_check_proofs_base64,
+    LayerProofs,
+    build_layer_proofs,
+    verify_layer_proofs,
+    verify_and_decide_layers,
 )
-from toploc.utils import sha256sum
+from toploc.utils import sha256sum, sha256_tensor
+from toploc.capture import ActivationCapture
+from toploc.deterministic import (
+    DeterministicInference,
+    deterministic_linear,
+    BatchInvariantInference,
+    batch_invariant_linear,
+)
+from toploc.autotune import autotune, load_tuned_params, TuneResult
+from toploc.tracing import (
+    Span,
+    add_trace_hook,
+    remove_trace_hook,
+    LoggingTraceHook,
+    HistogramCollector,
+)
+from toploc.instrumentation import stats, reset_stats, enable_stats
 
 __version__ = "0.0.0.dev1"
@@ -0,0 +1,91 @@
+"""asyncio versions of the proof API.
+
+Every coroutine runs its synchronous counterpart from :mod:`toploc.poly` on a
+shared thread pool, so event loops stay responsive while proofs are built or
+verified. The native kernels release the GIL, so this work overlaps with
+network I/O. The pool size bounds how many heavy calls run at once and can be
+changed with :func:`set_max_concurrency`.
+
+Cancelling a coroutine before its call has started removes the call from the
+queue. A call that is already running is left to finish and its result is
+discarded.
+
+Example:
+    proofs = await toploc.aio.build_proofs_base64(
+        activations, decode_batching_size=32, topk=128
+    )
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from toploc import poly
+
+T = TypeVar("T")
+
+# The native kernels already use every core, so few calls need to run at once
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("TOPLOC_AIO_CONCURRENCY", "2"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_max_concurrency = DEFAULT_MAX_CONCURRENCY
+_lock = threading.Lock()
+
+
+def set_max_concurrency(max_concurrency: int) -> None:
+    """Set how many proof calls may run at once.
+
+    Calls already submitted finish on the previous pool.
+    """
+    global _executor, _max_concurrency
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+    with _lock:
+        _max_concurrency = max_concurrency
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_concurrency, thread_name_prefix="toploc-aio"
+            )
+        return _executor
+
+
+async def run(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run ``fn(*args, **kwargs)`` on the shared proof executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+def _offload(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run(fn, *args, **kwargs)
+
+    wrapper.__doc__ = f"Awaitable :func:`toploc.poly.{fn.__name__}`."
+    return wrapper
+
+
+build_proofs = _offload(poly.build_proofs)
+build_proofs_bytes = _offload(poly.build_proofs_bytes)
+build_proofs_base64 = _offload(poly.build_proofs_base64)
+verify_proofs = _offload(poly.verify_proofs)
+verify_proofs_bytes = _offload(poly.verify_proofs_bytes)
+verify_proofs_base64 = _offload(poly.verify_proofs_base64)
+verify_and_decide = _offload(poly.verify_and_decide)
+verify_and_decide_bytes = _offload(poly.verify_and_decide_bytes)
+verify_and_decide_base64 = _offload(poly.verify_and_decide_base64)
+verify_and_decide_many = _offload(poly.verify_and_decide_many)
+verify_and_decide_many_bytes = _offload(poly.verify_and_decide_many_bytes)
+verify_and_decide_many_base64 = _offload(poly.verify_and_decide_many_base64)
@@ -0,0 +1,183 @@
+"""Pick ``topk`` and ``decode_batching_size`` for an activation shape.
+
+:func:`autotune` benchmarks proof building and verification on synthetic
+activations on the current machine, measures how often perturbed activations
+are caught, and recommends the most sensitive parameters that fit a
+throughput or proof size budget.
+"""
+
+import json
+import math
+import time
+from typing import NamedTuple, Optional
+
+import torch
+
+from toploc.poly import build_proofs, decide, verify_proofs
+
+
+class TuneResult(NamedTuple):
+    """Measurements for one ``(topk, decode_batching_size)`` candidate."""
+
+    topk: int
+    decode_batching_size: int
+    build_proofs_per_sec: float
+    verify_proofs_per_sec: float
+    proof_bytes: float
+    detection_rate: float
+    skip_prefill: bool = False
+
+    def prover_params(self) -> dict:
+        """Parameters in the format used by ``ModelProver`` and ``Verifier``.
+
+        ``skip_prefill`` is the one the candidate was measured with, a prefill
+        row proven alone may not hold ``topk`` values otherwise.
+        """
+        return {
+            "decode_batching_size": self.decode_batching_size,
+            "topk": self.topk,
+            "skip_prefill": self.skip_prefill,
+        }
+
+
+def _best_time(fn, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _measure(
+    activations: torch.Tensor,
+    perturbed: torch.Tensor,
+    topk: int,
+    decode_batching_size: int,
+    skip_prefill: bool,
+    repeats: int,
+    exp_mismatch_threshold: int,
+    mant_err_mean_threshold: float,
+    mant_err_median_threshold: float,
+) -> TuneResult:
+    proofs = build_proofs(activations, decode_batching_size, topk, skip_prefill)
+    build_time = _best_time(
+        lambda: build_proofs(activations, decode_batching_size, topk, skip_prefill),
+        repeats,
+    )
+    verify_time = _best_time(
+        lambda: verify_proofs(
+            activations, proofs, decode_batching_size, topk, skip_prefill
+        ),
+        repeats,
+    )
+    results = verify_proofs(
+        perturbed, proofs, decode_batching_size, topk, skip_prefill, as_tensors=True
+    )
+    verdict = decide(
+        results,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+    )
+    return TuneResult(
+        topk=topk,
+        decode_batching_size=decode_batching_size,
+        build_proofs_per_sec=len(proofs) / build_time,
+        verify_proofs_per_sec=len(proofs) / verify_time,
+        proof_bytes=sum(len(proof.to_bytes()) for proof in proofs) / len(proofs),
+        detection_rate=verdict.num_failed / verdict.num_proofs,
+        skip_prefill=skip_prefill,
+    )
+
+
+def autotune(
+    shape: tuple[int, int],
+    dtype: torch.dtype = torch.bfloat16,
+    topk_candidates: tuple[int, ...] = (4, 8, 16, 32, 64, 128),
+    decode_batching_size_candidates: tuple[int, ...] = (1, 4, 16, 32),
+    skip_prefill: bool = False,
+    target_proofs_per_sec: Optional[float] = None,
+    max_proof_bytes: Optional[int] = None,
+    noise_scale: float = 0.05,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+    repeats: int = 3,
+    seed: int = 0,
+    path: Optional[str] = None,
+) -> TuneResult:
+    """Recommend ``topk`` and ``decode_batching_size`` for an activation shape.
+
+    Every candidate pair is benchmarked on random ``[N, H]`` activations. Its
+    detection rate is the fraction of proofs rejected when the activations are
+    perturbed by Gaussian noise of ``noise_scale`` standard deviations, using
+    the same thresholds as :func:`toploc.decide`. Among the candidates whose
+    build and verify rates reach ``target_proofs_per_sec`` and whose proofs fit
+    in ``max_proof_bytes``, the one with the highest detection rate wins, with
+    ties broken by build rate.
+
+    Args:
+        shape (tuple[int, int]): Activation shape ``(num_activations, hidden)``.
+        dtype (torch.dtype, optional): Activation dtype. Defaults to bfloat16.
+        skip_prefill (bool, optional): Whether the proofs will skip the prefill.
+            Candidates are measured with it and it is saved with the result.
+        path (str, optional): If given, the recommendation is saved there as
+            JSON and can be read back with :func:`load_tuned_params`.
+
+    Returns:
+        TuneResult: The recommended parameters and their measurements.
+
+    Raises:
+        ValueError: If no candidate meets the budget.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    activations = torch.randn(shape, generator=generator).to(dtype)
+    noise = torch.randn(shape, generator=generator) * noise_scale
+    perturbed = (activations.float() + noise).to(dtype)
+
+    candidates = []
+    for decode_batching_size in decode_batching_size_candidates:
+        for topk in topk_candidates:
+            # The smallest batch must hold topk values. That is the prefill
+            # row, which is proven alone, or else the trailing batch.
+            if skip_prefill:
+                min_batch_rows = (shape[0] - 1) % decode_batching_size + 1
+            else:
+                min_batch_rows = 1
+            if topk > min_batch_rows * shape[1]:
+                continue
+            result = _measure(
+                activations,
+                perturbed,
+                topk,
+                decode_batching_size,
+                skip_prefill,
+                repeats,
+                exp_mismatch_threshold,
+                mant_err_mean_threshold,
+                mant_err_median_threshold,
+            )
+            if target_proofs_per_sec is not None and (
+                min(result.build_proofs_per_sec, result.verify_proofs_per_sec)
+                < target_proofs_per_sec
+            ):
+                continue
+            if max_proof_bytes is not None and result.proof_bytes > max_proof_bytes:
+                continue
+            candidates.append(result)
+
+    if not candidates:
+        raise ValueError("No topk and decode_batching_size candidate meets the budget")
+    best = max(candidates, key=lambda r: (r.detection_rate, r.build_proofs_per_sec))
+
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(best._asdict(), f, indent=2)
+    return best
+
+
+def load_tuned_params(path: str) -> TuneResult:
+    """Load a recommendation saved by :func:`autotune`."""
+    with open(path) as f:
+        return TuneResult(**json.load(f))
@@ -0,0 +1,91 @@
+"""Selection of the kernel implementation.
+
+The native kernels are built generically and, on x86-64 Linux, also for AVX2
+and AVX-512. At import the fastest build the CPU supports is picked, using
+PyTorch's CPU capability detection. If it cannot be loaded, the next slower
+build is tried, down to the NumPy implementation in :mod:`toploc.reference`.
+
+Set ``TOPLOC_BACKEND`` to ``avx512``, ``avx2``, ``generic`` or ``numpy`` to
+force a backend.
+"""
+
+import importlib
+import logging
+import os
+from types import ModuleType
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {
+    "avx512": "toploc.C.csrc.poly_avx512",
+    "avx2": "toploc.C.csrc.poly_avx2",
+    "generic": "toploc.C.csrc.poly",
+    "numpy": "toploc.reference",
+}
+
+
+def _cpu_capability() -> str:
+    get_cpu_capability = getattr(torch.backends.cpu, "get_cpu_capability", None)
+    if get_cpu_capability is None:
+        return "DEFAULT"  # pragma: no cover
+    return get_cpu_capability()
+
+
+def supported_backends() -> list[str]:
+    """Backends this CPU can run, fastest first.
+
+    Builds for instruction sets the CPU lacks are never imported, as their
+    module initialization alone may use those instructions.
+    """
+    capability = _cpu_capability()
+    if capability == "AVX512":
+        return ["avx512", "avx2", "generic", "numpy"]
+    if capability == "AVX2":
+        return ["avx2", "generic", "numpy"]
+    return ["generic", "numpy"]
+
+
+def _load() -> tuple[str, ModuleType]:
+    requested = os.environ.get("TOPLOC_BACKEND")
+    if requested:
+        if requested not in BACKENDS:
+            raise ValueError(
+                f"Unknown TOPLOC_BACKEND {requested!r}, "
+                f"expected one of {list(BACKENDS)}"
+            )
+        if requested not in supported_backends():
+            raise ValueError(f"Backend {requested!r} is not supported by this CPU")
+        return requested, importlib.import_module(BACKENDS[requested])
+
+    for candidate in supported_backends():
+        try:
+            return candidate, importlib.import_module(BACKENDS[candidate])
+        except ImportError as e:
+            logger.debug(f"Backend {candidate} is not available: {e}")
+    raise ImportError("No toploc backend could be loaded")
+
+
+name, module = _load()
+logger.debug(f"Using the {name} backend")
+
+# Modules with native counters, see toploc.instrumentation
+if name == "numpy":
+    native_modules: tuple[ModuleType, ...] = ()
+else:
+    from toploc.C.csrc import ndd, utils
+
+    native_modules = (module, ndd, utils)
+
+ProofPoly = module.ProofPoly
+VerificationResult = module.VerificationResult
+compute_newton_coefficients = module.compute_newton_coefficients
+evaluate_polynomial = module.evaluate_polynomial
+evaluate_polynomials = module.evaluate_polynomials
+get_fp_parts = module.get_fp_parts
+verify_proofs = module.verify_proofs
+verify_proofs_tensors = module.verify_proofs_tensors
+verify_proofs_topk = module.verify_proofs_topk
+verify_proofs_bytes = module.verify_proofs_bytes
+verify_proofs_base64 = module.verify_proofs_base64
@@ -0,0 +1,168 @@
+"""Capture activations of unmodified models with forward hooks.
+
+:class:`ActivationCapture` registers forward hooks on named submodules and
+copies their outputs into preallocated buffers, so a model does not need a
+custom ``forward`` returning its hidden states. Each output is flattened to
+rows along its last dim, the layout ``build_proofs`` and
+``build_proofs_rowwise`` take.
+
+Example:
+    with ActivationCapture(model, ["net.5"], capacity=len(inputs)) as capture:
+        output = model(inputs)
+    proofs = build_proofs_rowwise(capture["net.5"], topk=4)
+"""
+
+from typing import Optional
+
+import torch
+import torch.nn as nn
+
+
+class _Buffer:
+    """Preallocated rows of one module output.
+
+    Positions are absolute row counts since the last reset. A ring buffer
+    keeps its capacity and wraps around, a linear buffer grows when full.
+    """
+
+    def __init__(self, capacity: Optional[int], ring: bool):
+        self.capacity = capacity
+        self.ring = ring
+        self.data: Optional[torch.Tensor] = None
+        self.read_pos = 0
+        self.write_pos = 0
+
+    def _allocate(self, rows: torch.Tensor) -> None:
+        if self.read_pos != self.write_pos:
+            raise RuntimeError("Output layout changed while rows are unread")
+        capacity = self.capacity if self.ring else max(self.capacity or 0, len(rows))
+        self.data = rows.new_empty((capacity, *rows.shape[1:]))
+        self.read_pos = self.write_pos = 0
+
+    def write(self, rows: torch.Tensor) -> None:
+        if (
+            self.data is None
+            or self.data.shape[1:] != rows.shape[1:]
+            or self.data.dtype != rows.dtype
+            or self.data.device != rows.device
+        ):
+            self._allocate(rows)
+        num_rows = len(rows)
+        capacity = len(self.data)
+
+        if self.ring:
+            if self.write_pos - self.read_pos + num_rows > capacity:
+                raise RuntimeError(
+                    f"Ring buffer overflow: {num_rows} new rows and "
+                    f"{self.write_pos - self.read_pos} unread rows exceed the "
+                    f"capacity of {capacity}"
+                )
+            start = self.write_pos % capacity
+            first = min(num_rows, capacity - start)
+            self.data[start : start + first].copy_(rows[:first])
+            self.data[: num_rows - first].copy_(rows[first:])
+        else:
+            if self.write_pos + num_rows > capacity:
+                # Grow geometrically so that appends stay amortized O(1)
+                grown = self.data.new_empty(
+                    (max(2 * capacity, self.write_pos + num_rows), *rows.shape[1:])
+                )
+                grown[: self.write_pos].copy_(self.data[: self.write_pos])
+                self.data = grown
+            self.data[self.write_pos : self.write_pos + num_rows].copy_(rows)
+        self.write_pos += num_rows
+
+    def read(self) -> list[torch.Tensor]:
+        if self.data is None or self.read_pos == self.write_pos:
+            return []
+        if not self.ring:
+            segments = [self.data[self.read_pos : self.write_pos]]
+        else:
+            capacity = len(self.data)
+            start = self.read_pos % capacity
+            end = start + self.write_pos - self.read_pos
+            segments = [self.data[start : min(end, capacity)]]
+            if end > capacity:
+                segments.append(self.data[: end - capacity])
+        self.read_pos = self.write_pos
+        return segments
+
+    def reset(self) -> None:
+        self.read_pos = self.write_pos = 0
+
+
+class ActivationCapture:
+    """Copy the outputs of named submodules into reusable buffers.
+
+    Each buffer is allocated on the first forward pass, with ``capacity`` rows
+    or as many rows as that pass produces, and is reused afterwards.
+
+    A linear buffer (the default) keeps every row written since the last
+    :meth:`reset` and grows when it is full. A ring buffer (``ring=True``)
+    never reallocates; :meth:`read` returns the rows written since the last
+    read, and a forward pass raises ``RuntimeError`` if it would overwrite
+    rows that have not been read yet. Rows returned by :meth:`read` are views
+    and stay valid until ``capacity`` further rows are written.
+
+    Args:
+        model (nn.Module): Model whose submodules are captured.
+        module_names (list[str]): Names as in ``model.named_modules()``.
+        capacity (int, optional): Rows allocated per buffer. Required for
+            ring buffers.
+        ring (bool, optional): Whether the buffers are ring buffers.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        module_names: list[str],
+        capacity: Optional[int] = None,
+        ring: bool = False,
+    ):
+        if ring and not capacity:
+            raise ValueError("Ring buffers need a capacity")
+        self.buffers = {name: _Buffer(capacity, ring) for name in module_names}
+        self._handles = [
+            model.get_submodule(name).register_forward_hook(self._hook(name))
+            for name in module_names
+        ]
+
+    def _hook(self, name: str):
+        buffer = self.buffers[name]
+
+        def hook(module, inputs, output):
+            if isinstance(output, (tuple, list)):
+                output = output[0]
+            buffer.write(output.detach().reshape(-1, output.shape[-1]))
+
+        return hook
+
+    def __getitem__(self, name: str) -> torch.Tensor:
+        """Rows of ``name`` written since the last reset, as a view."""
+        buffer = self.buffers[name]
+        if buffer.ring:
+            raise TypeError("Use read() to get the rows of a ring buffer")
+        if buffer.data is None:
+            raise KeyError(f"Nothing was captured for {name!r}")
+        return buffer.data[: buffer.write_pos]
+
+    def read(self, name: str) -> list[torch.Tensor]:
+        """Rows of ``name`` written since the last read, in one or two views."""
+        return self.buffers[name].read()
+
+    def reset(self) -> None:
+        """Forget the captured rows but keep the buffers for reuse."""
+        for buffer in self.buffers.values():
+            buffer.reset()
+
+    def remove(self) -> None:
+        """Remove the hooks. The captured rows stay readable."""
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+    def __enter__(self) -> "ActivationCapture":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.remove()
@@ -0,0 +1,142 @@
+"""Inference whose activations do not depend on how it is executed.
+
+The reduction order of a matmul may change with ``torch.get_num_threads()``
+and with the number of rows in the batch, and a single reordered addition
+can flip the last bit of an activation.
+
+:class:`DeterministicInference` reroutes ``F.linear``, and with it
+``nn.Linear``, to :func:`deterministic_linear`. That function only uses
+elementwise ops in a fixed order, and every output element of an elementwise
+op is computed independently, so each row is the same at any thread count and
+in any batch.
+
+:class:`BatchInvariantInference` is the faster option when the thread count
+is fixed. It reroutes ``F.linear`` to :func:`batch_invariant_linear`, which
+runs the native matmul on fixed-shape row tiles, so each row is the same in
+any batch. Elementwise activations such as ReLU are batch invariant already.
+
+Example:
+    with torch.no_grad(), DeterministicInference():
+        output = model(inputs)
+"""
+
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
+from torch.overrides import TorchFunctionMode
+
+# Width of the blocks of the input dim that are reduced as a pairwise tree.
+# Changing it changes the results, so prover and verifier must agree on it.
+BLOCK_SIZE = 64
+
+# Upper bound on the number of products materialized at once
+_MAX_PRODUCTS = 1 << 24
+
+# Rows per matmul in batch_invariant_linear. Changing it changes the results.
+ROW_TILE = 32
+
+
+def _tree_sum(products: torch.Tensor) -> torch.Tensor:
+    """Sum the last dim, a power of two, by adding halves elementwise."""
+    while products.shape[-1] > 1:
+        half = products.shape[-1] // 2
+        products = products[..., :half] + products[..., half:]
+    return products[..., 0]
+
+
+def deterministic_linear(
+    input: torch.Tensor, weight: torch.Tensor, bias: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """``F.linear`` with a fixed reduction order.
+
+    The input dim is split into blocks of :data:`BLOCK_SIZE`. The products of
+    each block are summed as a pairwise tree, and the block sums are
+    accumulated in order, in at least float32. Each output row only depends
+    on its input row.
+    """
+    out_features, in_features = weight.shape
+    dtype = torch.promote_types(input.dtype, torch.float32)
+    x = input.reshape(-1, in_features).to(dtype)
+    w = weight.to(dtype)
+
+    num_blocks = -(-in_features // BLOCK_SIZE)
+    padding = num_blocks * BLOCK_SIZE - in_features
+    if padding:
+        # Adding zeros does not change the sums
+        x = F.pad(x, (0, padding))
+        w = F.pad(w, (0, padding))
+    x = x.view(-1, num_blocks, BLOCK_SIZE)
+    w = w.view(out_features, num_blocks, BLOCK_SIZE)
+
+    out = x.new_zeros(len(x), out_features)
+    # Rows are independent, so splitting them only bounds the memory
+    rows_per_step = max(1, _MAX_PRODUCTS // (out_features * BLOCK_SIZE))
+    for start in range(0, len(x), rows_per_step):
+        rows = x[start : start + rows_per_step]
+        acc = out[start : start + rows_per_step]
+        for block in range(num_blocks):
+            acc += _tree_sum(rows[:, None, block, :] * w[None, :, block, :])
+    if bias is not None:
+        out += bias.to(dtype)
+    return out.to(input.dtype).reshape(*input.shape[:-1], out_features)
+
+
+class DeterministicInference(TorchFunctionMode):
+    """Context in which ``F.linear`` runs as :func:`deterministic_linear`.
+
+    Activations computed inside it are bit-identical at any thread count, but
+    differ from those computed outside of it, so the prover and the verifier
+    must both use it.
+    """
+
+    def __torch_function__(self, func, types, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        if func is F.linear:
+            return deterministic_linear(*args, **kwargs)
+        return func(*args, **kwargs)
+
+
+def batch_invariant_linear(
+    input: torch.Tensor, weight: torch.Tensor, bias: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """``F.linear`` whose output rows do not depend on the other rows.
+
+    The rows are padded to a multiple of :data:`ROW_TILE` and multiplied one
+    tile at a time. Every matmul therefore has the same shape and takes the
+    same kernel path whatever the batch size, and a row's result does not
+    depend on the other rows of its tile. The thread count must stay the same,
+    see :func:`deterministic_linear` otherwise.
+    """
+    out_features, in_features = weight.shape
+    x = input.reshape(-1, in_features)
+    num_rows = len(x)
+    padding = -num_rows % ROW_TILE
+    if padding:
+        x = F.pad(x, (0, 0, 0, padding))
+
+    out = x.new_empty(len(x), out_features)
+    weight_t = weight.t()
+    for start in range(0, len(x), ROW_TILE):
+        tile = x[start : start + ROW_TILE]
+        out_tile = out[start : start + ROW_TILE]
+        if bias is None:
+            torch.mm(tile, weight_t, out=out_tile)
+        else:
+            torch.addmm(bias, tile, weight_t, out=out_tile)
+    return out[:num_rows].reshape(*input.shape[:-1], out_features)
+
+
+class BatchInvariantInference(TorchFunctionMode):
+    """Context in which ``F.linear`` runs as :func:`batch_invariant_linear`.
+
+    Rows computed inside it are bit-identical whatever batch they are in, at
+    a fixed thread count. They differ from rows computed outside of it, so the
+    prover and the verifier must both use it.
+    """
+
+    def __torch_function__(self, func, types, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        if func is F.linear:
+            return batch_invariant_linear(*args, **kwargs)
+        return func(*args, **kwargs)
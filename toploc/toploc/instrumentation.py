@@ -0,0 +1,43 @@
+"""Per-stage counters and timers of the native kernels.
+
+Collection is off by default and can be switched on at runtime with
+:func:`enable_stats`, or at import time by setting ``TOPLOC_STATS=1``.
+The NumPy backend has no counters.
+"""
+
+import os
+from toploc.backend import native_modules as _MODULES
+
+
+def enable_stats(enabled: bool = True) -> None:
+    """Switch collection of the native counters on or off."""
+    for module in _MODULES:
+        module._set_stats_enabled(enabled)
+
+
+def reset_stats() -> None:
+    """Reset all native counters to zero."""
+    for module in _MODULES:
+        module._reset_stats()
+
+
+def stats() -> dict[str, dict[str, int]]:
+    """Snapshot of the native counters.
+
+    Returns:
+        dict[str, dict[str, int]]: Maps each stage (``modulus_search``,
+        ``interpolation``, ``topk``, ``evaluation``, ``fp_split``, ``base64``,
+        ``thread_startup``) to its ``calls``, ``items`` and ``nanoseconds``
+        totals.
+    """
+    totals: dict[str, dict[str, int]] = {}
+    for module in _MODULES:
+        for stage, counters in module._stats().items():
+            total = totals.setdefault(stage, dict.fromkeys(counters, 0))
+            for key, value in counters.items():
+                total[key] += value
+    return totals
+
+
+if os.environ.get("TOPLOC_STATS", "0") not in ("", "0"):
+    enable_stats()  # pragma: no cover
@@ -1,21 +1,58 @@
-from toploc.C.csrc.ndd import (
-    evaluate_polynomials,
-)
-from toploc.C.csrc.poly import (
+from toploc.backend import (
     ProofPoly,
+    evaluate_polynomials,
+    get_fp_parts,
     verify_proofs_base64 as c_verify_proofs_base64,
     verify_proofs_bytes as c_verify_proofs_bytes,
     verify_proofs as c_verify_proofs,
+    verify_proofs_tensors as c_verify_proofs_tensors,
+    verify_proofs_topk as c_verify_proofs_topk,
     VerificationResult,
 )
-from toploc.C.csrc.utils import get_fp_parts
+from toploc.tracing import trace
 import torch
 import logging
+import math
+import random
 from statistics import mean, median
+from typing import Callable, NamedTuple, Optional, Union
 
 logger = logging.getLogger(__name__)
 
 
+class VerificationResults(NamedTuple):
+    """Struct-of-arrays verification results, one entry per proof.
+
+    Each field is a 1D CPU tensor of length ``len(proofs)`` so that
+    aggregation and thresholding can be vectorized.
+    """
+
+    exp_mismatches: torch.Tensor
+    mant_err_mean: torch.Tensor
+    mant_err_median: torch.Tensor
+
+    def to_list(self) -> list[VerificationResult]:
+        return [
+            VerificationResult(*row)
+            for row in zip(
+                self.exp_mismatches.tolist(),
+                self.mant_err_mean.tolist(),
+                self.mant_err_median.tolist(),
+            )
+        ]
+
+
+class Verdict(NamedTuple):
+    """Accept/reject decision for a proof set plus summary statistics."""
+
+    passed: bool
+    num_proofs: int
+    num_failed: int
+    max_exp_mismatches: int
+    max_mant_err_mean: float
+    max_mant_err_median: float
+
+
 def find_injective_modulus(x: list[int]) -> int:
     for i in range(65497, 2**15, -1):
         if len(set([j % i for j in x])) == len(x):
@@ -23,12 +60,84 @@ def find_injective_modulus(x: list[int]) -> int:
     raise ValueError("No injective modulus found!")  # pragma: no cover
 
 
+def _topk(activations: torch.Tensor, topk: int) -> tuple[torch.Tensor, torch.Tensor]:
+    """Indices and values of the ``topk`` largest magnitudes along the last dim."""
+    if activations.element_size() == 1:
+        # |int8 min| overflows in int8 and fp8 has few kernels, so rank
+        # 8-bit dtypes in float32 (exact for them) and gather the raw bits
+        topk_indices = activations.float().abs().topk(topk, dim=-1).indices
+        topk_values = activations.view(torch.uint8).gather(-1, topk_indices)
+        return topk_indices, topk_values.view(activations.dtype)
+    topk_indices = activations.abs().topk(topk, dim=-1).indices
+    return topk_indices, activations.gather(-1, topk_indices)
+
+
+def _from_bits(bits: list[int], dtype: torch.dtype) -> torch.Tensor:
+    """Reinterpret integer bit patterns as a tensor of ``dtype``."""
+    if dtype.itemsize == 1:
+        return torch.tensor([i & 0xFF for i in bits], dtype=torch.uint8).view(dtype)
+    return torch.tensor(bits, dtype=torch.uint16).view(dtype)
+
+
+def _is_contiguous_run(tensors: list[torch.Tensor]) -> bool:
+    """Whether the tensors are back-to-back slices of one contiguous storage."""
+    first = tensors[0]
+    storage_ptr = first.untyped_storage().data_ptr()
+    for prev, cur in zip(tensors, tensors[1:]):
+        if (
+            not cur.is_contiguous()
+            or cur.dtype != first.dtype
+            or cur.device != first.device
+            or cur.untyped_storage().data_ptr() != storage_ptr
+            or cur.data_ptr() != prev.data_ptr() + prev.numel() * prev.element_size()
+        ):
+            return False
+    return first.is_contiguous()
+
+
+def _flatten_batch(
+    activations: list[torch.Tensor], start: int, end: int
+) -> torch.Tensor:
+    """Flatten ``activations[start:end]`` into a single 1D tensor.
+
+    When the activations already sit back to back in one storage, e.g. the
+    rows of a 2D tensor, a view over that storage is returned instead of a
+    concatenated copy.
+    """
+    if isinstance(activations, torch.Tensor):
+        return activations[start:end].reshape(-1)
+    batch = activations[start:end]
+    if _is_contiguous_run(batch):
+        first = batch[0]
+        numel = sum(i.numel() for i in batch)
+        return first.as_strided((numel,), (1,), first.storage_offset())
+    return torch.cat([i.view(-1) for i in batch])
+
+
+def _prove_batch(flat_view: torch.Tensor, topk: int) -> ProofPoly:
+    with trace("topk", flat_view.numel()):
+        topk_indices, topk_values = _topk(flat_view, topk)
+    with trace("transfer", topk):
+        topk_indices = topk_indices.to("cpu")
+        topk_values = topk_values.to("cpu")
+    with trace("interpolation", topk):
+        return ProofPoly.from_points_tensor(topk_indices, topk_values)
+
+
 def build_proofs(
     activations: list[torch.Tensor],
     decode_batching_size: int,
     topk: int,
     skip_prefill: bool = False,
 ) -> list[ProofPoly]:
+    if (
+        isinstance(activations, torch.Tensor)
+        and activations.dim() == 2
+        and decode_batching_size == 1
+    ):
+        # With one activation per batch, prefill and decode batches are all rows
+        return build_proofs_rowwise(activations, topk)
+
     proofs = []
 
     # In order to not crash, we return null proofs if there is an error
@@ -36,24 +145,15 @@ def build_proofs(
         # Prefill
         if not skip_prefill:
             flat_view = activations[0].view(-1)
-            topk_indices = flat_view.abs().topk(topk).indices
-            topk_values = flat_view[topk_indices]
-            proof = ProofPoly.from_points_tensor(topk_indices, topk_values)
-            proofs.append(proof)
+            proofs.append(_prove_batch(flat_view, topk))
 
         # Batched Decode
         for i in range(
             0 if skip_prefill else 1, len(activations), decode_batching_size
         ):
-            flat_view = torch.cat(
-                [i.view(-1) for i in activations[i : i + decode_batching_size]]
-            )
-            topk_indices = flat_view.abs().topk(topk).indices
-            topk_values = flat_view[topk_indices]
-            topk_indices = topk_indices.to("cpu")
-            topk_values = topk_values.to("cpu")
-            proof = ProofPoly.from_points_tensor(topk_indices, topk_values)
-            proofs.append(proof)
+            with trace("concat", decode_batching_size):
+                flat_view = _flatten_batch(activations, i, i + decode_batching_size)
+            proofs.append(_prove_batch(flat_view, topk))
     except Exception as e:
         logger.error(f"Error building proofs: {e}")
         proofs = [ProofPoly.null(topk)] * (
@@ -63,16 +163,35 @@ def build_proofs(
     return proofs
 
 
+def _encode_bytes(proofs: list[ProofPoly]) -> list[bytes]:
+    with trace("encoding", len(proofs)):
+        return [proof.to_bytes() for proof in proofs]
+
+
+def _encode_base64(proofs: list[ProofPoly]) -> list[str]:
+    with trace("encoding", len(proofs)):
+        return [proof.to_base64() for proof in proofs]
+
+
+def _decode_bytes(proofs: list[bytes]) -> list[ProofPoly]:
+    with trace("decoding", len(proofs)):
+        return [ProofPoly.from_bytes(proof) for proof in proofs]
+
+
+def _decode_base64(proofs: list[str]) -> list[ProofPoly]:
+    with trace("decoding", len(proofs)):
+        return [ProofPoly.from_base64(proof) for proof in proofs]
+
+
 def build_proofs_bytes(
     activations: list[torch.Tensor],
     decode_batching_size: int,
     topk: int,
     skip_prefill: bool = False,
 ) -> list[bytes]:
-    return [
-        proof.to_bytes()
-        for proof in build_proofs(activations, decode_batching_size, topk, skip_prefill)
-    ]
+    return _encode_bytes(
+        build_proofs(activations, decode_batching_size, topk, skip_prefill)
+    )
 
 
 def build_proofs_base64(
@@ -81,10 +200,163 @@ def build_proofs_base64(
     topk: int,
     skip_prefill: bool = False,
 ) -> list[str]:
-    return [
-        proof.to_base64()
-        for proof in build_proofs(activations, decode_batching_size, topk, skip_prefill)
-    ]
+    return _encode_base64(
+        build_proofs(activations, decode_batching_size, topk, skip_prefill)
+    )
+
+
+def build_proofs_rowwise(activations: torch.Tensor, topk: int) -> list[ProofPoly]:
+    """Build one proof per row of a 2D ``[N, H]`` activation tensor.
+
+    The top-k of all rows is taken in a single batched ``topk`` and the rows are
+    interpolated in parallel in native code. The proofs are the same as those of
+    ``build_proofs`` with ``decode_batching_size=1``.
+    """
+    # In order to not crash, we return null proofs if there is an error
+    try:
+        with trace("topk", activations.numel()):
+            topk_indices, topk_values = _topk(activations, topk)
+        with trace("transfer", topk_indices.numel()):
+            topk_indices = topk_indices.cpu()
+            topk_values = topk_values.cpu()
+        with trace("interpolation", topk_indices.numel()):
+            return ProofPoly.from_points_batch(topk_indices, topk_values)
+    except Exception as e:
+        logger.error(f"Error building proofs: {e}")
+        return [ProofPoly.null(topk)] * len(activations)
+
+
+def build_proofs_rowwise_bytes(activations: torch.Tensor, topk: int) -> list[bytes]:
+    return _encode_bytes(build_proofs_rowwise(activations, topk))
+
+
+def build_proofs_rowwise_base64(activations: torch.Tensor, topk: int) -> list[str]:
+    return _encode_base64(build_proofs_rowwise(activations, topk))
+
+
+class _Batcher:
+    """Groups a stream of activations into the batches of ``batch_activations``.
+
+    Only the activations of the batch being filled are held. They must not be
+    modified in place until their batch is emitted.
+    """
+
+    def __init__(self, decode_batching_size: int, skip_prefill: bool = False):
+        self.decode_batching_size = decode_batching_size
+        self._prefill_pending = not skip_prefill
+        self._pending: list[torch.Tensor] = []
+
+    def push(self, activation: torch.Tensor) -> Optional[torch.Tensor]:
+        """Add an activation and return the flattened batch if it is complete."""
+        if self._prefill_pending:
+            self._prefill_pending = False
+            return activation.reshape(-1)
+        self._pending.append(activation)
+        if len(self._pending) == self.decode_batching_size:
+            return self.flush()
+        return None
+
+    def split(
+        self, rows: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Split the rows of a 2D tensor around the whole batches among them.
+
+        Returns the rows that complete the current batch (or the prefill), the
+        whole batches flattened to one batch per row, and the remaining rows.
+        The first and last part still have to be pushed.
+        """
+        if self._prefill_pending:
+            head = 1
+        else:
+            head = -len(self._pending) % self.decode_batching_size
+        head = min(head, len(rows))
+        num_batches = (len(rows) - head) // self.decode_batching_size
+        end = head + num_batches * self.decode_batching_size
+        batches = rows[head:end].reshape(
+            num_batches, self.decode_batching_size * rows.shape[-1]
+        )
+        return rows[:head], batches, rows[end:]
+
+    def flush(self) -> Optional[torch.Tensor]:
+        """Return the partially filled batch, if any, and start a new one."""
+        if not self._pending:
+            return None
+        batch = _flatten_batch(self._pending, 0, len(self._pending))
+        self._pending = []
+        return batch
+
+
+class ProofBuilder:
+    """Build proofs incrementally from a stream of activations.
+
+    Activations are pushed one at a time as they are produced, e.g. after each
+    decode step, and a proof is emitted as soon as a batch is complete. Only
+    one batch of activations is held at a time. The proofs are the same as
+    those of ``build_proofs`` on the full list of activations.
+
+    Example:
+        builder = ProofBuilder(topk=128, decode_batching_size=32)
+        for activation in generate():
+            builder.push(activation)
+        builder.finish()
+        proofs = builder.proofs
+    """
+
+    def __init__(
+        self, topk: int, decode_batching_size: int, skip_prefill: bool = False
+    ):
+        self.topk = topk
+        self.proofs: list[ProofPoly] = []
+        self._batcher = _Batcher(decode_batching_size, skip_prefill)
+        self._finished = False
+
+    def push(self, activation: torch.Tensor) -> Optional[ProofPoly]:
+        """Add an activation and return the proof of its batch if it is complete."""
+        if self._finished:
+            raise RuntimeError("ProofBuilder is already finished")
+        batch = self._batcher.push(activation)
+        if batch is None:
+            return None
+        return self._prove(batch)
+
+    def extend(self, activations: list[torch.Tensor]) -> list[ProofPoly]:
+        """Push several activations, e.g. the rows of a 2D tensor, in order.
+
+        The whole batches among the rows of a 2D tensor are proven together,
+        as in ``build_proofs_rowwise``, instead of one row at a time.
+        """
+        if not (isinstance(activations, torch.Tensor) and activations.dim() == 2):
+            emitted = [self.push(activation) for activation in activations]
+            return [proof for proof in emitted if proof is not None]
+        if self._finished:
+            raise RuntimeError("ProofBuilder is already finished")
+        head, batches, tail = self._batcher.split(activations)
+        proofs = self.extend(list(head))
+        if len(batches):
+            batch_proofs = build_proofs_rowwise(batches, self.topk)
+            self.proofs.extend(batch_proofs)
+            proofs.extend(batch_proofs)
+        return proofs + self.extend(list(tail))
+
+    def finish(self) -> Optional[ProofPoly]:
+        """Return the proof of the last, partially filled batch, if any."""
+        if self._finished:
+            raise RuntimeError("ProofBuilder is already finished")
+        self._finished = True
+        batch = self._batcher.flush()
+        if batch is None:
+            return None
+        return self._prove(batch)
+
+    def _prove(self, batch: torch.Tensor) -> ProofPoly:
+        # In order to not crash, we emit a null proof if there is an error
+        try:
+            proof = _prove_batch(batch, self.topk)
+        except Exception as e:
+            logger.error(f"Error building proof: {e}")
+            proof = ProofPoly.null(self.topk)
+        self.proofs.append(proof)
+        return proof
 
 
 def batch_activations(
@@ -101,40 +373,25 @@ def batch_activations(
 
     # Batched Decode
     for i in range(0 if skip_prefill else 1, len(activations), decode_batching_size):
-        flat_view = torch.cat(
-            [i.view(-1) for i in activations[i : i + decode_batching_size]]
-        )
+        with trace("concat", decode_batching_size):
+            flat_view = _flatten_batch(activations, i, i + decode_batching_size)
         batches.append(flat_view)
 
     return batches
 
 
-def verify_proofs(
-    activations: list[torch.Tensor],
-    proofs: list[ProofPoly],
-    decode_batching_size: int,
-    topk: int,
-    skip_prefill: bool = False,
-) -> list[VerificationResult]:
-    if isinstance(activations, torch.Tensor) and skip_prefill:
-        return c_verify_proofs(activations, proofs, decode_batching_size, topk)
-    results = []
-    for proof, chunk in zip(
-        proofs,
-        batch_activations(
-            activations,
-            decode_batching_size=decode_batching_size,
-            skip_prefill=skip_prefill,
-        ),
-    ):
+def _verify_chunk(
+    chunk: torch.Tensor, proof: ProofPoly, topk: int
+) -> tuple[int, float, float]:
+    with trace("transfer", chunk.numel()):
         chunk = chunk.view(-1).cpu()
-        topk_indices = chunk.abs().topk(k=topk).indices.tolist()
-        topk_values = chunk[topk_indices]
-        y_values = evaluate_polynomials(proof.coeffs, topk_indices)
-        proof_topk_values = torch.tensor(y_values, dtype=torch.uint16).view(
-            dtype=torch.bfloat16
-        )
+    with trace("topk", chunk.numel()):
+        topk_indices, topk_values = _topk(chunk, topk)
+    with trace("evaluation", topk):
+        y_values = evaluate_polynomials(proof.coeffs, topk_indices.tolist())
+        proof_topk_values = _from_bits(y_values, chunk.dtype)
 
+    with trace("comparison", topk):
         exps, mants = get_fp_parts(proof_topk_values)
         proof_exps, proof_mants = get_fp_parts(topk_values)
 
@@ -142,15 +399,115 @@ def verify_proofs(
         mant_errs = [
             abs(i - j) for i, j, k in zip(mants, proof_mants, exp_mismatches) if not k
         ]
-        if len(mant_errs) > 0:
-            results.append(
-                VerificationResult(
-                    sum(exp_mismatches), mean(mant_errs), median(mant_errs)
+    if len(mant_errs) > 0:
+        return sum(exp_mismatches), mean(mant_errs), median(mant_errs)
+    return sum(exp_mismatches), float(2**64), float(2**64)
+
+
+def _verify_batch(
+    batch: torch.Tensor, proof: ProofPoly, topk: int
+) -> VerificationResult:
+    """Verify a single flattened batch with the native kernel."""
+    with trace("evaluation", 1):
+        return c_verify_proofs(batch.view(1, -1), [proof], 1, topk)[0]
+
+
+def _rows_to_tensors(rows: list[tuple[int, float, float]]) -> VerificationResults:
+    exp_mismatches, mant_err_mean, mant_err_median = (
+        zip(*rows) if rows else ((), (), ())
+    )
+    return VerificationResults(
+        torch.tensor(exp_mismatches, dtype=torch.int32),
+        torch.tensor(mant_err_mean, dtype=torch.float64),
+        torch.tensor(mant_err_median, dtype=torch.float64),
+    )
+
+
+def verify_proofs(
+    activations: list[torch.Tensor],
+    proofs: list[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    """Verify proofs against recomputed activations.
+
+    If ``as_tensors`` is set, the results are returned as a
+    :class:`VerificationResults` of contiguous tensors instead of a list of
+    :class:`VerificationResult` objects.
+    """
+    if (
+        isinstance(activations, torch.Tensor)
+        and activations.dim() == 2
+        and decode_batching_size == 1
+    ):
+        return verify_proofs_rowwise(activations, proofs, topk, as_tensors)
+    if isinstance(activations, torch.Tensor) and skip_prefill:
+        # Top-k, evaluation and comparison are fused in the native kernel
+        with trace("evaluation", len(proofs)):
+            if as_tensors:
+                return VerificationResults(
+                    *c_verify_proofs_tensors(
+                        activations, proofs, decode_batching_size, topk
+                    )
                 )
-            )
-        else:
-            results.append(VerificationResult(sum(exp_mismatches), 2**64, 2**64))
-    return results
+            return c_verify_proofs(activations, proofs, decode_batching_size, topk)
+    rows = [
+        _verify_chunk(chunk, proof, topk)
+        for proof, chunk in zip(
+            proofs,
+            batch_activations(
+                activations,
+                decode_batching_size=decode_batching_size,
+                skip_prefill=skip_prefill,
+            ),
+        )
+    ]
+    if as_tensors:
+        return _rows_to_tensors(rows)
+    return [VerificationResult(*row) for row in rows]
+
+
+def verify_proofs_rowwise(
+    activations: torch.Tensor,
+    proofs: list[ProofPoly],
+    topk: int,
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    """Verify one proof per row of a 2D ``[N, H]`` activation tensor.
+
+    The top-k of all rows is taken in a single batched ``topk`` and the proofs
+    are evaluated in parallel in native code.
+    """
+    num_rows = min(len(activations), len(proofs))
+    with trace("topk", activations[:num_rows].numel()):
+        topk_indices, topk_values = _topk(activations[:num_rows], topk)
+    with trace("evaluation", num_rows):
+        results = VerificationResults(
+            *c_verify_proofs_topk(topk_indices, topk_values, proofs[:num_rows])
+        )
+    if as_tensors:
+        return results
+    return results.to_list()
+
+
+def verify_proofs_rowwise_bytes(
+    activations: torch.Tensor,
+    proofs: list[bytes],
+    topk: int,
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    return verify_proofs_rowwise(activations, _decode_bytes(proofs), topk, as_tensors)
+
+
+def verify_proofs_rowwise_base64(
+    activations: torch.Tensor,
+    proofs: list[str],
+    topk: int,
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    return verify_proofs_rowwise(activations, _decode_base64(proofs), topk, as_tensors)
 
 
 def verify_proofs_bytes(
@@ -159,15 +516,20 @@ def verify_proofs_bytes(
     decode_batching_size: int,
     topk: int,
     skip_prefill: bool = False,
-) -> list[VerificationResult]:
-    if isinstance(activations, torch.Tensor) and skip_prefill:
-        return c_verify_proofs_bytes(activations, proofs, decode_batching_size, topk)
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    if isinstance(activations, torch.Tensor) and skip_prefill and not as_tensors:
+        with trace("evaluation", len(proofs)):
+            return c_verify_proofs_bytes(
+                activations, proofs, decode_batching_size, topk
+            )
     return verify_proofs(
         activations,
-        [ProofPoly.from_bytes(proof) for proof in proofs],
+        _decode_bytes(proofs),
         decode_batching_size,
         topk,
         skip_prefill,
+        as_tensors,
     )
 
 
@@ -177,13 +539,704 @@ def verify_proofs_base64(
     decode_batching_size: int,
     topk: int,
     skip_prefill: bool = False,
-) -> list[VerificationResult]:
-    if isinstance(activations, torch.Tensor) and skip_prefill:
-        return c_verify_proofs_base64(activations, proofs, decode_batching_size, topk)
+    as_tensors: bool = False,
+) -> Union[list[VerificationResult], VerificationResults]:
+    if isinstance(activations, torch.Tensor) and skip_prefill and not as_tensors:
+        with trace("evaluation", len(proofs)):
+            return c_verify_proofs_base64(
+                activations, proofs, decode_batching_size, topk
+            )
     return verify_proofs(
         activations,
-        [ProofPoly.from_base64(proof) for proof in proofs],
+        _decode_base64(proofs),
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        as_tensors,
+    )
+
+
+def num_batches(
+    num_activations: int, decode_batching_size: int, skip_prefill: bool = False
+) -> int:
+    """Number of proofs produced for ``num_activations`` activations."""
+    if skip_prefill:
+        return -(-num_activations // decode_batching_size)
+    if num_activations == 0:
+        return 0
+    return 1 + -(-(num_activations - 1) // decode_batching_size)
+
+
+def decide(
+    results: VerificationResults,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+    expected_proofs: Optional[int] = None,
+) -> Verdict:
+    """Apply acceptance thresholds to verification results.
+
+    A proof passes when each of its error measures is at or below the
+    corresponding threshold. The proof set passes when every proof passes
+    and, if ``expected_proofs`` is given, the number of proofs matches it.
+    An empty proof set only passes if zero proofs were expected.
+    """
+    failed = (
+        (results.exp_mismatches > exp_mismatch_threshold)
+        | (results.mant_err_mean > mant_err_mean_threshold)
+        | (results.mant_err_median > mant_err_median_threshold)
+    )
+    num_proofs = results.exp_mismatches.numel()
+    num_failed = int(failed.sum())
+    if num_proofs == 0:
+        return Verdict(expected_proofs == 0, 0, 0, 0, 0.0, 0.0)
+    return Verdict(
+        passed=num_failed == 0
+        and (expected_proofs is None or expected_proofs == num_proofs),
+        num_proofs=num_proofs,
+        num_failed=num_failed,
+        max_exp_mismatches=int(results.exp_mismatches.max()),
+        max_mant_err_mean=float(results.mant_err_mean.max()),
+        max_mant_err_median=float(results.mant_err_median.max()),
+    )
+
+
+def verify_and_decide(
+    activations: list[torch.Tensor],
+    proofs: list[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> Verdict:
+    """Verify proofs and apply acceptance thresholds in one call.
+
+    The proof set is rejected if the number of proofs does not match the
+    number of activation batches.
+    """
+    expected_proofs = num_batches(len(activations), decode_batching_size, skip_prefill)
+    results = verify_proofs(
+        activations,
+        proofs[:expected_proofs],
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        as_tensors=True,
+    )
+    verdict = decide(
+        results,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+        expected_proofs=expected_proofs,
+    )
+    # Proofs beyond the last batch are not verified, so a padded proof set
+    # would otherwise look complete
+    if len(proofs) != expected_proofs:
+        return verdict._replace(passed=False)
+    return verdict
+
+
+def verify_and_decide_bytes(
+    activations: list[torch.Tensor],
+    proofs: list[bytes],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> Verdict:
+    return verify_and_decide(
+        activations,
+        _decode_bytes(proofs),
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+    )
+
+
+def verify_and_decide_base64(
+    activations: list[torch.Tensor],
+    proofs: list[str],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> Verdict:
+    return verify_and_decide(
+        activations,
+        _decode_base64(proofs),
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+    )
+
+
+def _batch_topk(
+    activations: list[torch.Tensor],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Top-k indices and values of every batch of ``batch_activations``.
+
+    Returns ``[num_batches, topk]`` tensors, so that several proof sets can be
+    evaluated against them without taking the top-k again.
+    """
+    if (
+        isinstance(activations, torch.Tensor)
+        and activations.dim() == 2
+        and decode_batching_size == 1
+    ):
+        # One row per batch, the prefill included
+        with trace("topk", activations.numel()):
+            return _topk(activations, topk)
+    batches = batch_activations(activations, decode_batching_size, skip_prefill)
+    if not batches:
+        return torch.empty(0, topk, dtype=torch.long), torch.empty(0, topk)
+    with trace("topk", sum(batch.numel() for batch in batches)):
+        pairs = [_topk(batch, topk) for batch in batches]
+    indices = torch.stack([indices for indices, _ in pairs])
+    values = _cat_values([values.unsqueeze(0) for _, values in pairs])
+    return indices, values
+
+
+def verify_and_decide_many(
+    activations: list[torch.Tensor],
+    proof_sets: list[list[ProofPoly]],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> list[Verdict]:
+    """Verify several competing proof sets against the same activations.
+
+    The top-k of every batch is taken once and shared by all proof sets, whose
+    proofs are each evaluated in parallel in native code. Returns one verdict
+    per proof set, decided as in ``verify_and_decide``.
+    """
+    indices, values = _batch_topk(activations, decode_batching_size, topk, skip_prefill)
+    expected_proofs = len(indices)
+
+    verdicts = []
+    for proofs in proof_sets:
+        num_rows = min(len(proofs), expected_proofs)
+        if num_rows == 0:
+            results = _rows_to_tensors([])
+        else:
+            with trace("evaluation", num_rows):
+                results = VerificationResults(
+                    *c_verify_proofs_topk(
+                        indices[:num_rows], values[:num_rows], proofs[:num_rows]
+                    )
+                )
+        verdict = decide(
+            results,
+            exp_mismatch_threshold,
+            mant_err_mean_threshold,
+            mant_err_median_threshold,
+            expected_proofs=expected_proofs,
+        )
+        # Proofs beyond the last batch are not verified, see verify_and_decide
+        if len(proofs) != expected_proofs:
+            verdict = verdict._replace(passed=False)
+        verdicts.append(verdict)
+    return verdicts
+
+
+def verify_and_decide_many_bytes(
+    activations: list[torch.Tensor],
+    proof_sets: list[list[bytes]],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> list[Verdict]:
+    return verify_and_decide_many(
+        activations,
+        [_decode_bytes(proofs) for proofs in proof_sets],
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+    )
+
+
+def verify_and_decide_many_base64(
+    activations: list[torch.Tensor],
+    proof_sets: list[list[str]],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> list[Verdict]:
+    return verify_and_decide_many(
+        activations,
+        [_decode_base64(proofs) for proofs in proof_sets],
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+    )
+
+
+class LayerProofs(NamedTuple):
+    """Row-wise proofs of several named layers of one forward pass."""
+
+    proofs: dict[str, list[ProofPoly]]
+    topk: int
+
+    def to_base64(self) -> dict[str, list[str]]:
+        return {name: _encode_base64(proofs) for name, proofs in self.proofs.items()}
+
+    @classmethod
+    def from_base64(cls, data: dict[str, list[str]], topk: int) -> "LayerProofs":
+        return cls(
+            {name: _decode_base64(proofs) for name, proofs in data.items()}, topk
+        )
+
+
+def _layer_rows(activations: torch.Tensor) -> torch.Tensor:
+    """One row per vector along the last dim."""
+    return activations.reshape(-1, activations.shape[-1])
+
+
+def _cat_values(values: list[torch.Tensor]) -> torch.Tensor:
+    if values[0].element_size() == 1:
+        # Concatenate 8-bit dtypes as raw bits, not every one has a cat kernel
+        return torch.cat([v.view(torch.uint8) for v in values]).view(values[0].dtype)
+    return torch.cat(values)
+
+
+def _layer_topk_groups(layers: dict[str, torch.Tensor], topk: int):
+    """Top-k of every row of every layer, concatenated per dtype.
+
+    Yields the layer names, their row counts and the concatenated top-k
+    indices and values of each group, so that each group takes a single
+    native call.
+    """
+    groups: dict[torch.dtype, list[tuple[str, torch.Tensor, torch.Tensor]]] = {}
+    for name, activations in layers.items():
+        with trace("topk", activations.numel()):
+            indices, values = _topk(activations, topk)
+        groups.setdefault(activations.dtype, []).append((name, indices, values))
+
+    for members in groups.values():
+        names = [name for name, _, _ in members]
+        rows = [len(indices) for _, indices, _ in members]
+        with trace("concat", len(members)):
+            indices = torch.cat([indices for _, indices, _ in members])
+            values = _cat_values([values for _, _, values in members])
+        with trace("transfer", indices.numel()):
+            yield names, rows, indices.cpu(), values.cpu()
+
+
+def build_layer_proofs(layers: dict[str, torch.Tensor], topk: int) -> LayerProofs:
+    """Build row-wise proofs for several named layers at once.
+
+    Every vector along the last dim of every layer gets its own proof, as in
+    ``build_proofs_rowwise``. The rows of all layers with the same dtype are
+    interpolated in a single parallel native call, so covering several small
+    layers costs about as much as covering one.
+    """
+    layers = {name: _layer_rows(activations) for name, activations in layers.items()}
+    proofs: dict[str, list[ProofPoly]] = {}
+    # In order to not crash, we return null proofs if there is an error
+    try:
+        for names, rows, indices, values in _layer_topk_groups(layers, topk):
+            with trace("interpolation", indices.numel()):
+                batch = ProofPoly.from_points_batch(indices, values)
+            start = 0
+            for name, num_rows in zip(names, rows):
+                proofs[name] = batch[start : start + num_rows]
+                start += num_rows
+    except Exception as e:
+        logger.error(f"Error building proofs: {e}")
+        proofs = {
+            name: [ProofPoly.null(topk)] * len(activations)
+            for name, activations in layers.items()
+        }
+    return LayerProofs({name: proofs[name] for name in layers}, topk)
+
+
+def verify_layer_proofs(
+    layers: dict[str, torch.Tensor],
+    proofs: LayerProofs,
+    as_tensors: bool = False,
+) -> dict[str, Union[list[VerificationResult], VerificationResults]]:
+    """Verify row-wise proofs of several named layers at once.
+
+    Only layers that are both recomputed and proven are verified, and only as
+    many rows and proofs as both have. The rows of all layers with the same
+    dtype are verified in a single parallel native
+    call.
+    """
+    truncated = {}
+    for name, activations in layers.items():
+        if name in proofs.proofs:
+            rows = _layer_rows(activations)
+            truncated[name] = rows[: len(proofs.proofs[name])]
+
+    results: dict[str, VerificationResults] = {}
+    for names, rows, indices, values in _layer_topk_groups(truncated, proofs.topk):
+        batch_proofs = [
+            proof
+            for name, num_rows in zip(names, rows)
+            for proof in proofs.proofs[name][:num_rows]
+        ]
+        with trace("evaluation", len(batch_proofs)):
+            batch = c_verify_proofs_topk(indices, values, batch_proofs)
+        start = 0
+        for name, num_rows in zip(names, rows):
+            results[name] = VerificationResults(
+                *(field[start : start + num_rows] for field in batch)
+            )
+            start += num_rows
+
+    ordered = {name: results[name] for name in truncated}
+    if as_tensors:
+        return ordered
+    return {name: result.to_list() for name, result in ordered.items()}
+
+
+def verify_and_decide_layers(
+    layers: dict[str, torch.Tensor],
+    proofs: LayerProofs,
+    exp_mismatch_threshold: int = 0,
+    mant_err_mean_threshold: float = math.inf,
+    mant_err_median_threshold: float = math.inf,
+) -> Verdict:
+    """Verify the proofs of several layers and decide on all of them at once.
+
+    The proofs are rejected if a recomputed layer is not proven or if the
+    number of proofs of a layer does not match its number of rows.
+    """
+    results = verify_layer_proofs(layers, proofs, as_tensors=True)
+    expected_proofs = sum(len(_layer_rows(a)) for a in layers.values())
+    # Checked per layer, extra proofs of one layer must not make up for
+    # missing proofs of another
+    complete = all(
+        name in proofs.proofs and len(proofs.proofs[name]) == len(_layer_rows(a))
+        for name, a in layers.items()
+    )
+    combined = VerificationResults(
+        *(
+            torch.cat([getattr(r, field) for r in results.values()])
+            if results
+            else torch.empty(0)
+            for field in VerificationResults._fields
+        )
+    )
+    verdict = decide(
+        combined,
+        exp_mismatch_threshold,
+        mant_err_mean_threshold,
+        mant_err_median_threshold,
+        expected_proofs=expected_proofs,
+    )
+    if not complete:
+        return verdict._replace(passed=False)
+    return verdict
+
+
+class StreamingVerifier:
+    """Verify proofs incrementally against a stream of recomputed activations.
+
+    Activations are pushed as they are recomputed and each batch is verified
+    as soon as it is complete, so only one batch of activations is held at a
+    time. Once a batch fails the thresholds, :attr:`rejected` is set and
+    recomputation can be aborted early.
+
+    Example:
+        verifier = StreamingVerifier(proofs, decode_batching_size=32, topk=128)
+        for activation in recompute():
+            verifier.push(activation)
+            if verifier.rejected:
+                break
+        verdict = verifier.finish()
+    """
+
+    def __init__(
+        self,
+        proofs: list[ProofPoly],
+        decode_batching_size: int,
+        topk: int,
+        skip_prefill: bool = False,
+        exp_mismatch_threshold: int = 0,
+        mant_err_mean_threshold: float = math.inf,
+        mant_err_median_threshold: float = math.inf,
+    ):
+        self.proofs = proofs
+        self.topk = topk
+        self.exp_mismatch_threshold = exp_mismatch_threshold
+        self.mant_err_mean_threshold = mant_err_mean_threshold
+        self.mant_err_median_threshold = mant_err_median_threshold
+        self.results: list[VerificationResult] = []
+        self.rejected = False
+        self._batcher = _Batcher(decode_batching_size, skip_prefill)
+        self._finished = False
+
+    def push(self, activation: torch.Tensor) -> Optional[VerificationResult]:
+        """Add an activation and return the result of its batch if it is complete.
+
+        Activations pushed after a rejection are ignored.
+        """
+        if self._finished:
+            raise RuntimeError("StreamingVerifier is already finished")
+        if self.rejected:
+            return None
+        batch = self._batcher.push(activation)
+        if batch is None:
+            return None
+        return self._verify(batch)
+
+    def extend(self, activations: list[torch.Tensor]) -> list[VerificationResult]:
+        """Push several activations in order, stopping at the first rejection.
+
+        The whole batches among the rows of a 2D tensor are verified together,
+        as in ``verify_proofs_rowwise``, instead of one row at a time.
+        """
+        if not (isinstance(activations, torch.Tensor) and activations.dim() == 2):
+            results = []
+            for activation in activations:
+                result = self.push(activation)
+                if result is not None:
+                    results.append(result)
+                if self.rejected:
+                    break
+            return results
+        if self._finished:
+            raise RuntimeError("StreamingVerifier is already finished")
+        if self.rejected:
+            return []
+        head, batches, tail = self._batcher.split(activations)
+        results = self.extend(list(head))
+        if self.rejected:
+            return results
+        if len(batches):
+            start = len(self.results)
+            proofs = self.proofs[start : start + len(batches)]
+            if proofs:
+                for result in verify_proofs_rowwise(
+                    batches[: len(proofs)], proofs, self.topk
+                ):
+                    self.results.append(result)
+                    results.append(result)
+                    if self._failed(result):
+                        self.rejected = True
+                        return results
+            if len(proofs) < len(batches):
+                # More batches than proofs
+                self.rejected = True
+                return results
+        return results + self.extend(list(tail))
+
+    def finish(self) -> Verdict:
+        """Verify the last, partially filled batch and decide on the proof set.
+
+        The proof set is rejected if any batch failed or if the number of
+        batches does not match the number of proofs.
+        """
+        if self._finished:
+            raise RuntimeError("StreamingVerifier is already finished")
+        self._finished = True
+        if not self.rejected:
+            batch = self._batcher.flush()
+            if batch is not None:
+                self._verify(batch)
+        verdict = decide(
+            _rows_to_tensors(self.results),
+            self.exp_mismatch_threshold,
+            self.mant_err_mean_threshold,
+            self.mant_err_median_threshold,
+            expected_proofs=len(self.proofs),
+        )
+        if self.rejected:
+            return verdict._replace(passed=False)
+        return verdict
+
+    def _verify(self, batch: torch.Tensor) -> Optional[VerificationResult]:
+        if len(self.results) == len(self.proofs):
+            # More batches than proofs
+            self.rejected = True
+            return None
+        result = _verify_batch(batch, self.proofs[len(self.results)], self.topk)
+        self.results.append(result)
+        if self._failed(result):
+            self.rejected = True
+        return result
+
+    def _failed(self, result: VerificationResult) -> bool:
+        return (
+            result.exp_mismatches > self.exp_mismatch_threshold
+            or result.mant_err_mean > self.mant_err_mean_threshold
+            or result.mant_err_median > self.mant_err_median_threshold
+        )
+
+
+class SpotCheckResult(NamedTuple):
+    """Results of verifying a random sample of the batches of a proof set."""
+
+    indices: list[int]
+    results: VerificationResults
+    num_batches: int
+
+    def detection_confidence(self, cheat_fraction: float) -> float:
+        """Probability that the sample contains a cheated batch.
+
+        Assumes that a fraction ``cheat_fraction`` of all batches was cheated
+        and that every cheated batch fails verification. The batches are
+        sampled without replacement, so the probability is hypergeometric.
+        """
+        num_cheated = math.ceil(cheat_fraction * self.num_batches)
+        p_miss = 1.0
+        for i in range(len(self.indices)):
+            p_miss *= max(self.num_batches - num_cheated - i, 0) / (
+                self.num_batches - i
+            )
+        return 1.0 - p_miss
+
+
+def _batch_slice(
+    activations: list[torch.Tensor],
+    index: int,
+    decode_batching_size: int,
+    skip_prefill: bool,
+) -> torch.Tensor:
+    """Flattened activations of batch ``index`` of ``batch_activations``."""
+    if not skip_prefill:
+        if index == 0:
+            return activations[0].reshape(-1)
+        index -= 1
+    start = (0 if skip_prefill else 1) + index * decode_batching_size
+    return _flatten_batch(activations, start, start + decode_batching_size)
+
+
+def _spot_check(
+    activations: list[torch.Tensor],
+    num_proofs: int,
+    get_proof: Callable[[int], ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool,
+    sample: Union[int, float],
+    seed: Optional[int],
+) -> SpotCheckResult:
+    total = num_batches(len(activations), decode_batching_size, skip_prefill)
+    # A truncated or padded proof set must not pass a clean sample
+    if num_proofs != total:
+        raise ValueError(f"Expected {total} proofs, got {num_proofs}")
+    if isinstance(sample, float):
+        if not 0 < sample <= 1:
+            raise ValueError(f"Sample fraction must be in (0, 1], got {sample}")
+        sample_size = math.ceil(sample * total)
+    else:
+        if sample < 0:
+            raise ValueError(f"Sample count must be non-negative, got {sample}")
+        sample_size = min(sample, total)
+    indices = sorted(random.Random(seed).sample(range(total), sample_size))
+
+    rows = []
+    for i in indices:
+        batch = _batch_slice(activations, i, decode_batching_size, skip_prefill)
+        result = _verify_batch(batch, get_proof(i), topk)
+        rows.append(
+            (result.exp_mismatches, result.mant_err_mean, result.mant_err_median)
+        )
+    return SpotCheckResult(indices, _rows_to_tensors(rows), total)
+
+
+def spot_check_proofs(
+    activations: list[torch.Tensor],
+    proofs: list[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    sample: Union[int, float] = 0.1,
+    seed: Optional[int] = None,
+) -> SpotCheckResult:
+    """Verify a seeded random sample of the batches of a proof set.
+
+    ``sample`` is either the fraction (float) or the number (int) of batches to
+    verify. Only the activations of the sampled batches are read, so lazily
+    recomputed activations only need to be materialized for those batches.
+    Use :meth:`SpotCheckResult.detection_confidence` to bound the probability
+    that a cheating provider is caught and ``decide`` on
+    :attr:`SpotCheckResult.results` to accept or reject. Raises ``ValueError``
+    if the number of proofs does not match the number of batches.
+    """
+    return _spot_check(
+        activations,
+        len(proofs),
+        proofs.__getitem__,
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        sample,
+        seed,
+    )
+
+
+def spot_check_proofs_bytes(
+    activations: list[torch.Tensor],
+    proofs: list[bytes],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    sample: Union[int, float] = 0.1,
+    seed: Optional[int] = None,
+) -> SpotCheckResult:
+    # Only the sampled proofs are deserialized
+    return _spot_check(
+        activations,
+        len(proofs),
+        lambda i: ProofPoly.from_bytes(proofs[i]),
+        decode_batching_size,
+        topk,
+        skip_prefill,
+        sample,
+        seed,
+    )
+
+
+def spot_check_proofs_base64(
+    activations: list[torch.Tensor],
+    proofs: list[str],
+    decode_batching_size: int,
+    topk: int,
+    skip_prefill: bool = False,
+    sample: Union[int, float] = 0.1,
+    seed: Optional[int] = None,
+) -> SpotCheckResult:
+    # Only the sampled proofs are deserialized
+    return _spot_check(
+        activations,
+        len(proofs),
+        lambda i: ProofPoly.from_base64(proofs[i]),
         decode_batching_size,
         topk,
         skip_prefill,
+        sample,
+        seed,
     )
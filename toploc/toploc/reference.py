@@ -0,0 +1,395 @@
+"""NumPy implementation of the native kernels.
+
+Mirrors the API of the native ``poly`` module and is used by
+:mod:`toploc.backend` when no native build can be loaded. It produces the same
+proofs and verification results as the native kernels, only slower.
+"""
+
+import base64
+import numpy as np
+import torch
+
+MOD_N = 65497
+
+_FP_DTYPES = {
+    torch.float32: (0x7F800000, 23, 0x007FFFFF),
+    torch.bfloat16: (0x7F80, 7, 0x007F),
+    torch.float16: (0x7C00, 10, 0x03FF),
+}
+if hasattr(torch, "float8_e4m3fn"):
+    _FP_DTYPES[torch.float8_e4m3fn] = (0x78, 3, 0x07)
+    _FP_DTYPES[torch.float8_e5m2] = (0x7C, 2, 0x03)
+
+# Integers have no exponent: the sign is used as the "exponent" and the
+# magnitude as the "mantissa", so a sign flip counts as an exponent mismatch.
+_INT_LAYOUT = None
+
+_BITS_DTYPES = {1: torch.uint8, 2: torch.int16, 4: torch.int32}
+
+# y dtypes interpolated as their raw bits, and as their integer values
+_RAW_BITS_Y_DTYPES = {torch.bfloat16, torch.float16, torch.int8, torch.uint8}
+_RAW_BITS_Y_DTYPES.update(dtype for dtype in _FP_DTYPES if dtype.itemsize == 1)
+_INT_Y_DTYPES = {torch.int32, torch.long}
+if hasattr(torch, "uint32"):
+    _INT_Y_DTYPES.add(torch.uint32)
+
+
+def _layout(dtype: torch.dtype):
+    if dtype == torch.int8:
+        return _INT_LAYOUT
+    if dtype not in _FP_DTYPES:
+        raise ValueError(
+            f"Unsupported dtype {dtype}, expected one of [float32, bfloat16, "
+            "float16, float8_e4m3fn, float8_e5m2, int8]"
+        )
+    return _FP_DTYPES[dtype]
+
+
+def _bits_view(tensor: torch.Tensor) -> torch.Tensor:
+    """Integer view of a tensor with the same element size."""
+    return tensor.view(_BITS_DTYPES[tensor.element_size()])
+
+
+def _raw_bits(tensor: torch.Tensor) -> np.ndarray:
+    """Raw bit patterns of a tensor as non-negative int64."""
+    bits = _bits_view(tensor.contiguous()).cpu().to(torch.int64).numpy()
+    return bits & ((1 << (8 * tensor.element_size())) - 1)
+
+
+def _split_bits(bits: np.ndarray, layout) -> tuple[np.ndarray, np.ndarray]:
+    if layout is _INT_LAYOUT:
+        values = ((bits & 0xFF) ^ 0x80) - 0x80
+        return (values < 0).astype(np.int64), np.abs(values)
+    exp_mask, exp_shift, mant_mask = layout
+    return (bits & exp_mask) >> exp_shift, bits & mant_mask
+
+
+def _mod_inverse(a: np.ndarray) -> np.ndarray:
+    """Modular inverses by Fermat's little theorem, MOD_N being prime."""
+    if (a == 0).any():
+        raise RuntimeError("No modular inverse: gcd(a, m) != 1.")
+    result = np.ones_like(a)
+    base = a % MOD_N
+    exponent = MOD_N - 2
+    while exponent:
+        if exponent & 1:
+            result = result * base % MOD_N
+        base = base * base % MOD_N
+        exponent >>= 1
+    return result
+
+
+def compute_newton_coefficients(x: list[int], y: list[int]) -> list[int]:
+    """Expanded polynomial coefficients through the points, modulo MOD_N."""
+    if len(x) != len(y):
+        raise RuntimeError("Input vectors must have the same size")
+    if len(x) == 0:
+        raise RuntimeError("Input vectors must not be empty")
+    x = np.asarray(x, dtype=np.int64)
+    n = len(x)
+
+    # Divided differences, one order per step over all points at once
+    dd = np.asarray(y, dtype=np.int64) % MOD_N
+    for k in range(1, n):
+        numerator = (dd[k:] - dd[k - 1 : -1]) % MOD_N
+        dd[k:] = numerator * _mod_inverse((x[k:] - x[:-k]) % MOD_N) % MOD_N
+
+    # Expand into standard form with the rolling product (x - x[0])...(x - x[i-1])
+    coeffs = np.zeros(n, dtype=np.int64)
+    factor = np.zeros(n, dtype=np.int64)
+    factor[0] = 1
+    for i in range(n):
+        coeffs[: i + 1] = (coeffs[: i + 1] + dd[i] * factor[: i + 1]) % MOD_N
+        if i + 1 < n:
+            shifted = factor[: i + 2] * (-x[i] % MOD_N) % MOD_N
+            shifted[1:] = (shifted[1:] + factor[: i + 1]) % MOD_N
+            factor[: i + 2] = shifted
+    return coeffs.tolist()
+
+
+def _evaluate(coefficients: list[int], x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.int64) % MOD_N
+    result = np.full(x.shape, coefficients[-1], dtype=np.int64)
+    for coeff in reversed(coefficients[:-1]):
+        result = (result * x + coeff) % MOD_N
+    return result
+
+
+def evaluate_polynomial(coefficients: list[int], x: int) -> int:
+    """Evaluate the polynomial at point x using Horner's method."""
+    return int(_evaluate(coefficients, np.asarray([x]))[0])
+
+
+def evaluate_polynomials(coefficients: list[int], x: list[int]) -> list[int]:
+    """Evaluate the polynomial at points x using Horner's method."""
+    return _evaluate(coefficients, np.asarray(x)).tolist()
+
+
+def get_fp_parts(
+    tensor: torch.Tensor, num_threads: int = 1
+) -> tuple[list[int], list[int]]:
+    """Split each element of a CPU tensor into its exponent and mantissa bits."""
+    if not tensor.device.type == "cpu":
+        raise RuntimeError("Input tensor must be on CPU")
+    if num_threads <= 0:
+        raise RuntimeError("Number of threads must be positive")
+    exps, mants = _split_bits(_raw_bits(tensor), _layout(tensor.dtype))
+    return exps.tolist(), mants.tolist()
+
+
+def _x_values(x: torch.Tensor) -> np.ndarray:
+    if x.dtype not in (torch.int32, torch.long):
+        raise ValueError("x must be of dtype [int32, long]")
+    return x.contiguous().to(torch.int64).numpy()
+
+
+def _y_values(y: torch.Tensor) -> np.ndarray:
+    if y.dtype == torch.float32:
+        raise ValueError(
+            "float32 not supported yet because interpolate has hardcode prime"
+        )
+    if y.dtype in _RAW_BITS_Y_DTYPES:
+        return _raw_bits(y)
+    if y.dtype in _INT_Y_DTYPES:
+        return y.contiguous().to(torch.int64).numpy()
+    raise ValueError(
+        "y must be of dtype [float16, bfloat16, float8_e4m3fn, float8_e5m2, int8, "
+        "uint8, int32, uint32, long]"
+    )
+
+
+class ProofPoly:
+    __module__ = "toploc.backend"
+
+    def __init__(self, coeffs: list[int], modulus: int):
+        self.coeffs = list(coeffs)
+        self.modulus = modulus
+
+    def __call__(self, x: int) -> int:
+        return evaluate_polynomial(self.coeffs, x)
+
+    def __len__(self) -> int:
+        return len(self.coeffs)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProofPoly):
+            return NotImplemented
+        return self.coeffs == other.coeffs and self.modulus == other.modulus
+
+    def __repr__(self) -> str:
+        return f"ProofPoly[{self.modulus}]([{', '.join(map(str, self.coeffs))}])"
+
+    def __getstate__(self):
+        return (self.coeffs, self.modulus)
+
+    def __setstate__(self, state):
+        self.coeffs, self.modulus = list(state[0]), state[1]
+
+    @staticmethod
+    def null(length: int) -> "ProofPoly":
+        return ProofPoly([0] * length, 0)
+
+    def to_bytes(self) -> bytes:
+        words = np.asarray([self.modulus, *self.coeffs], dtype=np.int64) & 0xFFFF
+        return words.astype(">u2").tobytes()
+
+    @staticmethod
+    def from_bytes(data) -> "ProofPoly":
+        if isinstance(data, str):
+            data = data.encode()
+        if len(data) < 2:
+            raise ValueError("Data too short")
+        words = np.frombuffer(data[: len(data) // 2 * 2], dtype=">u2")
+        return ProofPoly(words[1:].tolist(), int(words[0]))
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode()
+
+    @staticmethod
+    def from_base64(base64_str: str) -> "ProofPoly":
+        # Like the native decoder, stop at the first padding character
+        stripped = base64_str.split("=", 1)[0]
+        return ProofPoly.from_bytes(
+            base64.b64decode(stripped + "=" * (-len(stripped) % 4))
+        )
+
+    @staticmethod
+    def from_points(x: list[int], y: list[int]) -> "ProofPoly":
+        if len(x) != len(y):
+            raise ValueError("x and y must have the same length")
+        x = np.asarray(x, dtype=np.int64)
+        for modulus in range(65497, 0, -1):
+            if np.unique(x % modulus).size == x.size:
+                break
+        else:
+            raise RuntimeError("No injective modulus found!")  # pragma: no cover
+        coeffs = compute_newton_coefficients((x % modulus).tolist(), list(y))
+        return ProofPoly(coeffs, modulus)
+
+    @staticmethod
+    def from_points_tensor(x: torch.Tensor, y: torch.Tensor) -> "ProofPoly":
+        if x.dim() != 1 or y.dim() != 1:
+            raise ValueError("x and y must be 1D tensors")
+        return ProofPoly.from_points(_x_values(x).tolist(), _y_values(y).tolist())
+
+    @staticmethod
+    def from_points_batch(x: torch.Tensor, y: torch.Tensor) -> list["ProofPoly"]:
+        if x.dim() != 2 or y.dim() != 2:
+            raise ValueError("x and y must be 2D tensors")
+        if x.shape != y.shape:
+            raise ValueError("x and y must have the same shape")
+        xs, ys = _x_values(x), _y_values(y)
+        return [
+            ProofPoly.from_points(row_x.tolist(), row_y.tolist())
+            for row_x, row_y in zip(xs, ys)
+        ]
+
+
+class VerificationResult:
+    __module__ = "toploc.backend"
+
+    def __init__(
+        self, exp_mismatches: int, mant_err_mean: float, mant_err_median: float
+    ):
+        self.exp_mismatches = int(exp_mismatches)
+        self.mant_err_mean = float(mant_err_mean)
+        self.mant_err_median = float(mant_err_median)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VerificationResult):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    def __repr__(self) -> str:
+        return (
+            f"VerificationResult[exp_mismatches={self.exp_mismatches}, "
+            f"mant_err_mean={self.mant_err_mean:g}, "
+            f"mant_err_median={self.mant_err_median:g}]"
+        )
+
+    def __getstate__(self):
+        return (self.exp_mismatches, self.mant_err_mean, self.mant_err_median)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+def _topk_bits(flat: torch.Tensor, topk: int) -> tuple[np.ndarray, np.ndarray]:
+    if flat.element_size() == 1:
+        indices = flat.float().abs().topk(topk).indices
+    else:
+        indices = flat.abs().topk(topk).indices
+    # Gather through an integer view, as not every dtype supports indexing
+    return indices.cpu().numpy(), _raw_bits(_bits_view(flat)[indices])
+
+
+def _compare_topk(
+    indices: np.ndarray, value_bits: np.ndarray, layout, proof: ProofPoly
+) -> tuple[int, float, float]:
+    if proof.modulus > 0:
+        indices = indices % proof.modulus
+    proof_exps, proof_mants = _split_bits(_evaluate(proof.coeffs, indices), layout)
+    value_exps, value_mants = _split_bits(value_bits, layout)
+    matches = proof_exps == value_exps
+    exp_mismatches = int((~matches).sum())
+    mant_errs = np.abs(proof_mants - value_mants)[matches]
+    if mant_errs.size == 0:
+        return exp_mismatches, float(2**64), float(2**64)
+    # Upper median, like the native kernel
+    median = np.partition(mant_errs, mant_errs.size // 2)[mant_errs.size // 2]
+    return exp_mismatches, float(mant_errs.mean()), float(median)
+
+
+def _to_tensors(rows: list[tuple[int, float, float]]):
+    exp_mismatches, mant_err_mean, mant_err_median = (
+        zip(*rows) if rows else ((), (), ())
+    )
+    return (
+        torch.tensor(exp_mismatches, dtype=torch.int32),
+        torch.tensor(mant_err_mean, dtype=torch.float64),
+        torch.tensor(mant_err_median, dtype=torch.float64),
+    )
+
+
+def verify_proofs_tensors(
+    activations: torch.Tensor,
+    proofs: list[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    layout = _layout(activations.dtype)
+    rows = []
+    for i, proof in enumerate(proofs):
+        chunk = activations[
+            i * decode_batching_size : (i + 1) * decode_batching_size
+        ].reshape(-1)
+        indices, value_bits = _topk_bits(chunk, topk)
+        rows.append(_compare_topk(indices, value_bits, layout, proof))
+    return _to_tensors(rows)
+
+
+def verify_proofs(
+    activations: torch.Tensor,
+    proofs: list[ProofPoly],
+    decode_batching_size: int,
+    topk: int,
+) -> list[VerificationResult]:
+    return [
+        VerificationResult(*row)
+        for row in zip(
+            *(
+                t.tolist()
+                for t in verify_proofs_tensors(
+                    activations, proofs, decode_batching_size, topk
+                )
+            )
+        )
+    ]
+
+
+def verify_proofs_topk(
+    topk_indices: torch.Tensor, topk_values: torch.Tensor, proofs: list[ProofPoly]
+) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    if topk_indices.dim() != 2 or topk_values.dim() != 2:
+        raise RuntimeError("topk_indices and topk_values must be 2D tensors")
+    if topk_indices.shape != topk_values.shape:
+        raise RuntimeError("topk_indices and topk_values must have the same shape")
+    if topk_indices.shape[0] != len(proofs):
+        raise RuntimeError("Expected one proof per row of topk_indices")
+    layout = _layout(topk_values.dtype)
+    indices = topk_indices.cpu().to(torch.int64).numpy()
+    value_bits = _raw_bits(topk_values.cpu())
+    return _to_tensors(
+        [
+            _compare_topk(row_indices, row_bits, layout, proof)
+            for row_indices, row_bits, proof in zip(indices, value_bits, proofs)
+        ]
+    )
+
+
+def verify_proofs_bytes(
+    activations: torch.Tensor,
+    proofs: list[bytes],
+    decode_batching_size: int,
+    topk: int,
+) -> list[VerificationResult]:
+    return verify_proofs(
+        activations,
+        [ProofPoly.from_bytes(proof) for proof in proofs],
+        decode_batching_size,
+        topk,
+    )
+
+
+def verify_proofs_base64(
+    activations: torch.Tensor,
+    proofs: list[str],
+    decode_batching_size: int,
+    topk: int,
+) -> list[VerificationResult]:
+    return verify_proofs(
+        activations,
+        [ProofPoly.from_base64(proof) for proof in proofs],
+        decode_batching_size,
+        topk,
+    )
@@ -0,0 +1,142 @@
+"""Stage-level tracing of proof building and verification.
+
+Hooks registered with :func:`add_trace_hook` are called with a :class:`Span`
+after every traced stage (``concat``, ``topk``, ``transfer``,
+``interpolation``, ``encoding``, ``decoding``, ``evaluation``,
+``comparison``). When no hook is registered, tracing a stage only costs a
+list truthiness check.
+
+Example:
+    collector = HistogramCollector()
+    add_trace_hook(collector)
+    build_proofs(activations, decode_batching_size=32, topk=128)
+    print(collector.summary())
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span(NamedTuple):
+    """A timed stage and the number of items it processed."""
+
+    stage: str
+    duration_ns: int
+    size: int
+
+
+TraceHook = Callable[[Span], None]
+
+_hooks: list[TraceHook] = []
+
+
+def add_trace_hook(hook: TraceHook) -> None:
+    """Register a callable that receives a :class:`Span` per traced stage."""
+    _hooks.append(hook)
+
+
+def remove_trace_hook(hook: TraceHook) -> None:
+    """Unregister a hook added with :func:`add_trace_hook`."""
+    _hooks.remove(hook)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("stage", "size", "start")
+
+    def __init__(self, stage: str, size: int):
+        self.stage = stage
+        self.size = size
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        span = Span(self.stage, time.perf_counter_ns() - self.start, self.size)
+        for hook in list(_hooks):
+            # A broken hook must not break proof building or verification
+            try:
+                hook(span)
+            except Exception:
+                logger.exception(f"Trace hook {hook!r} failed")
+        return False
+
+
+def trace(stage: str, size: int = 1):
+    """Context manager that reports the enclosed stage to the registered hooks."""
+    if not _hooks:
+        return _NULL_SPAN
+    return _ActiveSpan(stage, size)
+
+
+class LoggingTraceHook:
+    """Trace hook that logs every span."""
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG
+    ):
+        self.logger = logger or logging.getLogger("toploc.trace")
+        self.level = level
+
+    def __call__(self, span: Span) -> None:
+        self.logger.log(
+            self.level,
+            f"{span.stage}: {span.duration_ns / 1e6:.3f} ms (size={span.size})",
+        )
+
+
+def _percentile(ordered: list[int], q: int) -> int:
+    return ordered[min(len(ordered) - 1, len(ordered) * q // 100)]
+
+
+class HistogramCollector:
+    """Trace hook that keeps the durations of every stage in memory."""
+
+    def __init__(self):
+        self.durations_ns: dict[str, list[int]] = {}
+        self.sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            self.durations_ns.setdefault(span.stage, []).append(span.duration_ns)
+            self.sizes[span.stage] = self.sizes.get(span.stage, 0) + span.size
+
+    def reset(self) -> None:
+        with self._lock:
+            self.durations_ns.clear()
+            self.sizes.clear()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Per-stage ``count``, ``size``, ``total_ms``, ``mean_ms``, ``p50_ms``
+        and ``p99_ms``."""
+        result = {}
+        with self._lock:
+            for stage, durations in self.durations_ns.items():
+                ordered = sorted(durations)
+                result[stage] = {
+                    "count": len(ordered),
+                    "size": self.sizes[stage],
+                    "total_ms": sum(ordered) / 1e6,
+                    "mean_ms": sum(ordered) / len(ordered) / 1e6,
+                    "p50_ms": _percentile(ordered, 50) / 1e6,
+                    "p99_ms": _percentile(ordered, 99) / 1e6,
+                }
+        return result
@@ -1,5 +1,7 @@
 import hashlib
 
+import torch
+
 
 def sha256sum(filename: str, chunk_size: int = 65536) -> str:
     """Calculate the SHA-256 checksum of a file efficiently.
@@ -16,3 +18,22 @@ def sha256sum(filename: str, chunk_size: int = 65536) -> str:
         for chunk in iter(lambda: f.read(chunk_size), b""):
             sha256.update(memoryview(chunk))
     return sha256.hexdigest()
+
+
+def sha256_tensor(tensor: torch.Tensor) -> str:
+    """Calculate the SHA-256 digest of a tensor's canonical bytes.
+
+    The digest covers the dtype, the shape and the raw little-endian element
+    bytes in row-major order, so it does not depend on the device, the strides
+    or the storage offset of the tensor.
+
+    Args:
+        tensor (torch.Tensor): Tensor to hash.
+
+    Returns:
+        str: The SHA-256 hash as a hexadecimal string.
+    """
+    tensor = tensor.detach().cpu().contiguous()
+    sha256 = hashlib.sha256(f"{tensor.dtype}:{tuple(tensor.shape)}:".encode())
+    sha256.update(memoryview(tensor.reshape(-1).view(torch.uint8).numpy()))
+    return sha256.hexdigest()
@@ -1,22 +1,96 @@
-import sklearn.metrics
 import torch
 import os
-import re
-import numpy as np
-import sklearn
-from toploc import verify_proofs_base64
-from model_utils import load_model_with_metadata, TRAINED_MODELS_DIR
+import json
+import math
+import random
+import hashlib
+from toploc import verify_and_decide_base64, verify_and_decide_layers, verify_and_decide_many, verify_proofs_rowwise_base64, decide, LayerProofs, ProofPoly, StreamingVerifier
+from model_utils import load_model_with_metadata, accuracy, inference_context, is_batch_invariant, recompute_forward, resolve_chunk_size, run_model, chunk_capture, DatasetStore, TRAINED_MODELS_DIR
 
 # Ensure the proofs directory exists (same as in prover)
 PROOFS_DIR = "proofs" 
 if not os.path.exists(PROOFS_DIR):
     os.makedirs(PROOFS_DIR)
 
+def check_claims(recomputed_predictions, y, claimed_predictions=None, claimed_accuracy=None):
+    """Whether the claimed predictions and accuracy match the recomputed predictions."""
+    if claimed_predictions is not None:
+        claimed_predictions = torch.as_tensor(claimed_predictions)
+        if claimed_predictions.shape != recomputed_predictions.shape:
+            return False
+        if not torch.equal(claimed_predictions.to(recomputed_predictions.dtype), recomputed_predictions):
+            return False
+    if claimed_accuracy is not None:
+        recomputed_accuracy = accuracy(recomputed_predictions, y)
+        print(f"Recomputed accuracy: {recomputed_accuracy}, Promised accuracy: {claimed_accuracy}")
+        if recomputed_accuracy != round(claimed_accuracy, 3):
+            return False
+    return True
+
+def hoeffding_interval(successes, n, confidence=0.95):
+    """Two-sided Hoeffding confidence interval for a success rate."""
+    if n == 0:
+        return 0.0, 1.0
+    rate = successes / n
+    margin = math.sqrt(math.log(2 / (1 - confidence)) / (2 * n))
+    return max(0.0, rate - margin), min(1.0, rate + margin)
+
+def _binomial_cdf(k, n, p):
+    """P(X <= k) for X ~ Binomial(n, p), summed in log space."""
+    if p <= 0:
+        return 1.0
+    if p >= 1:
+        return 1.0 if k >= n else 0.0
+    log_p, log_q = math.log(p), math.log1p(-p)
+    return min(1.0, sum(
+        math.exp(math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1) + i * log_p + (n - i) * log_q)
+        for i in range(k + 1)
+    ))
+
+def _bisect(f, lo=0.0, hi=1.0, iterations=60):
+    """Root of a function that is increasing on [lo, hi]."""
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        if f(mid) < 0:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+def clopper_pearson_interval(successes, n, confidence=0.95):
+    """Two-sided exact (Clopper-Pearson) confidence interval for a success rate."""
+    if n == 0:
+        return 0.0, 1.0
+    tail = (1 - confidence) / 2
+    # P(X >= successes) grows and P(X <= successes) shrinks with p
+    lower = 0.0 if successes == 0 else _bisect(lambda p: (1 - _binomial_cdf(successes - 1, n, p)) - tail)
+    upper = 1.0 if successes == n else _bisect(lambda p: tail - _binomial_cdf(successes, n, p))
+    return lower, upper
+
+INTERVALS = {"clopper-pearson": clopper_pearson_interval, "hoeffding": hoeffding_interval}
+
 class Verifier:
-    def __init__(self):
-        pass
+    def __init__(self, dataset_store=None, chunk_size=None):
+        self.dataset_store = dataset_store or DatasetStore()
+        # Samples per forward pass for batch-invariant proofs, which need not
+        # follow the prover's chunking. Other proofs use the prover's.
+        self.chunk_size = chunk_size
+
+    def verify_proof(self, model, proof, prover_params, X, y, claimed_predictions=None, claimed_accuracy=None):
+        # X may be the dataset digest of the proof, resolved from the local store
+        if isinstance(X, str):
+            X = self.dataset_store.get(X)
+        # The claims are checked on the output of the same forward pass that
+        # recomputes the activations, so verification is always one forward
+        claims = (y, claimed_predictions, claimed_accuracy)
+        if self.chunk_size and is_batch_invariant(prover_params):
+            prover_params = {**prover_params, "chunk_size": self.chunk_size}
+
+        if prover_params.get("multi_layer"):
+            return self.verify_layer_proof(model, proof, prover_params, X, *claims)
+        if prover_params.get("chunk_size"):
+            return self.verify_chunked_proof(model, proof, prover_params, X, *claims)
 
-    def verify_proof(self, model, proof, prover_params, X, y):
         proofs_base64 = proof.split('~')
         
         prover_params_used = prover_params
@@ -36,40 +110,26 @@ class Verifier:
         
         print("Recomputing activations using the loaded model and dataset...")
         # model.eval() # Ensure model is in evaluation mode?
-        with torch.no_grad():
-            recomputed_output, recomputed_activations_list = model(X)
-        
-        recomputed_activations = [act for act in recomputed_activations_list]
-        
-        # recomputed_predicted_classes = np.argmax(recomputed_output.to(dtype=torch.float32).numpy(), axis=1).tolist()
-        # accuracy_recomputed = round(sklearn.metrics.accuracy_score(recomputed_predicted_classes, y),3)
-        # print(f"Recomputed accuracy: {accuracy_recomputed}, Promised accuracy: {accuracy}")
+        with torch.no_grad(), inference_context(prover_params):
+            recomputed_output, segments = run_model(model, X, prover_params.get("capture_layer"))
+        recomputed_activations = segments[0] if len(segments) == 1 else torch.cat(segments)
 
-        # if accuracy_recomputed != accuracy:
-        #     return False
+        if not check_claims(torch.argmax(recomputed_output, dim=1), *claims):
+            return False
 
         print("Running `toploc` verification...")
-        verification_results = verify_proofs_base64(
+        verdict = verify_and_decide_base64(
             recomputed_activations,
             proofs_base64,
             decode_batching_size=prover_params_used["decode_batching_size"],
             topk=prover_params_used["topk"],
-            skip_prefill=prover_params_used["skip_prefill"]
+            skip_prefill=prover_params_used["skip_prefill"],
+            exp_mismatch_threshold=0,
         )
 
-        # print(verification_results)
-        # print(type(verification_results[0]))
-        
-        for i in verification_results:
-            i = str(i)
-            matches = re.findall(r'VerificationResult\[exp_mismatches=(\d+), mant_err_mean=([\d.]+), mant_err_median=([\d.]+)\]', i)
-            parsed_results = [{'exp_mismatches': int(a), 'mant_err_mean': float(b), 'mant_err_median': float(c)} for a, b, c in matches]
-            
-            m = 0
-            for result in parsed_results:
-                m = max(m, result['exp_mismatches'])
-            if m > 0:
-                return False
+        # print(verdict)
+        if not verdict.passed:
+            return False
 
         # print("\nVerification Results:")
         # print(f"Prover's Predicted Classes: {predicted_classes}")
@@ -77,4 +137,181 @@ class Verifier:
         # print(f"Toploc Proof Verification Status: {verification_results}")
         # print(f"--- Verification Complete for {proof_filename} ---\n")
         
-        return True
\ No newline at end of file
+        return True
+
+    def verify_competing_proofs(self, model, proofs_by_operator, prover_params, X, y=None, claimed_accuracy_by_operator=None):
+        """Verify the proofs several operators submitted for the same task.
+
+        The activations are recomputed once, byte-identical proof strings are
+        verified once, and all distinct proofs are evaluated against the same
+        top-k of the recomputed activations. Returns a verdict per operator.
+        """
+        if prover_params.get("multi_layer"):
+            raise ValueError("Competing multi_layer proofs are not supported")
+        if y is None and any(a is not None for a in (claimed_accuracy_by_operator or {}).values()):
+            raise ValueError("Labels y are required to check a claimed accuracy")
+        if isinstance(X, str):
+            X = self.dataset_store.get(X)
+        if self.chunk_size and is_batch_invariant(prover_params):
+            prover_params = {**prover_params, "chunk_size": self.chunk_size}
+        claimed_accuracy_by_operator = claimed_accuracy_by_operator or {}
+
+        # operators that submitted the same proof share its verdict
+        proof_hashes = {
+            operator: hashlib.sha256(proof.encode()).hexdigest()
+            for operator, proof in proofs_by_operator.items()
+        }
+        distinct_proofs = {proof_hashes[operator]: proof for operator, proof in proofs_by_operator.items()}
+        print(f"Verifying {len(distinct_proofs)} distinct proofs of {len(proofs_by_operator)} operators...")
+
+        decoded = {}
+        errors = {}
+        for proof_hash, proof in distinct_proofs.items():
+            try:
+                decoded[proof_hash] = [ProofPoly.from_base64(p) for p in proof.split('~')]
+            except Exception as e:
+                errors[proof_hash] = f"Could not decode proof: {e}"
+
+        recomputed_predictions, recomputed_activations = recompute_forward(model, X, prover_params)
+        verdicts = dict(zip(decoded, verify_and_decide_many(
+            recomputed_activations,
+            list(decoded.values()),
+            decode_batching_size=prover_params["decode_batching_size"],
+            topk=prover_params["topk"],
+            skip_prefill=prover_params["skip_prefill"],
+            exp_mismatch_threshold=0,
+        )))
+
+        table = {}
+        for operator, proof_hash in proof_hashes.items():
+            verdict = verdicts.get(proof_hash)
+            claims_passed = check_claims(
+                recomputed_predictions, y, claimed_accuracy=claimed_accuracy_by_operator.get(operator)
+            )
+            table[operator] = {
+                "passed": verdict is not None and verdict.passed and claims_passed,
+                "proof_hash": proof_hash,
+                "num_proofs": verdict.num_proofs if verdict is not None else 0,
+                "num_failed": verdict.num_failed if verdict is not None else 0,
+                "claims_passed": claims_passed,
+                "error": errors.get(proof_hash),
+            }
+        return table
+
+    def audit_proof(self, model, proof, prover_params, X, y, claimed_accuracy, sample=0.1, seed=None, confidence=0.95, method="clopper-pearson"):
+        """Check a claimed accuracy by recomputing a seeded random sample of rows.
+
+        Only the sampled rows are recomputed and only their row proofs, which
+        need decode_batching_size 1, are verified, so the cost is O(sample).
+        The model must be row-independent like SimpleNet, and the rows are
+        recomputed in a different batch than the prover used, which is only
+        bit-exact for deterministic or batch-invariant proofs. sample is the
+        fraction (float) or number (int) of rows. The claimed accuracy is
+        plausible if it lies in the confidence interval of the sample
+        accuracy, computed with method "clopper-pearson" or "hoeffding".
+        """
+        if prover_params["decode_batching_size"] != 1 or prover_params.get("multi_layer"):
+            raise ValueError("The audit needs row proofs, i.e. decode_batching_size 1 without multi_layer")
+        if claimed_accuracy is None or not 0 <= claimed_accuracy <= 1:
+            raise ValueError(f"The audit needs a claimed accuracy in [0, 1], got {claimed_accuracy}")
+        if isinstance(sample, bool) or not isinstance(sample, (int, float)):
+            raise ValueError(f"Sample must be a fraction or a number of rows, got {sample!r}")
+        if isinstance(sample, float) and not 0 < sample <= 1:
+            raise ValueError(f"Sample fraction must be in (0, 1], got {sample}")
+        if isinstance(sample, int) and sample < 1:
+            raise ValueError(f"Sample count must be at least 1, got {sample}")
+        if isinstance(X, str):
+            X = self.dataset_store.get(X)
+        y = torch.as_tensor(y)
+        proofs_base64 = proof.split('~')
+
+        num_rows = len(X)
+        sample_size = math.ceil(sample * num_rows) if isinstance(sample, float) else min(sample, num_rows)
+        indices = sorted(random.Random(seed).sample(range(num_rows), sample_size))
+        if not is_batch_invariant(prover_params):
+            print("Warning: rows recomputed outside of their original batch may differ in the last bits")
+
+        rows = torch.tensor(indices, dtype=torch.long)
+        print(f"Recomputing {sample_size} of {num_rows} rows...")
+        with torch.no_grad(), inference_context(prover_params):
+            recomputed_output, segments = run_model(model, X[rows], prover_params.get("capture_layer"))
+        recomputed_activations = segments[0] if len(segments) == 1 else torch.cat(segments)
+
+        # with decode_batching_size 1 proof i is the proof of row i, the
+        # prefill included, so the sampled proofs verify row-wise
+        proofs_passed = len(proofs_base64) == num_rows
+        if proofs_passed and indices:
+            results = verify_proofs_rowwise_base64(
+                recomputed_activations,
+                [proofs_base64[i] for i in indices],
+                topk=prover_params["topk"],
+                as_tensors=True,
+            )
+            proofs_passed = decide(results, exp_mismatch_threshold=0, expected_proofs=sample_size).passed
+
+        correct = int((torch.argmax(recomputed_output, dim=1) == y[rows].to(torch.long)).sum()) if indices else 0
+        lower, upper = INTERVALS[method](correct, sample_size, confidence)
+        # the claimed accuracy is rounded to 3 digits
+        accuracy_plausible = lower - 5e-4 <= claimed_accuracy <= upper + 5e-4
+
+        return {
+            "passed": proofs_passed and accuracy_plausible,
+            "proofs_passed": proofs_passed,
+            "accuracy_plausible": accuracy_plausible,
+            "sample_indices": indices,
+            "sample_accuracy": correct / sample_size if sample_size else None,
+            "accuracy_interval": (lower, upper),
+            "confidence": confidence,
+        }
+
+    def verify_layer_proof(self, model, proof, prover_params, X, y=None, claimed_predictions=None, claimed_accuracy=None):
+        layer_proofs = LayerProofs.from_base64(json.loads(proof), topk=prover_params["topk"])
+
+        print("Recomputing activations of every hidden layer...")
+        with torch.no_grad(), inference_context(prover_params):
+            recomputed_output, recomputed_layers = model.forward_layers(X)
+
+        if not check_claims(torch.argmax(recomputed_output, dim=1), y, claimed_predictions, claimed_accuracy):
+            return False
+
+        print("Running `toploc` verification...")
+        verdict = verify_and_decide_layers(
+            recomputed_layers,
+            layer_proofs,
+            exp_mismatch_threshold=0,
+        )
+        return verdict.passed
+
+    def verify_chunked_proof(self, model, proof, prover_params, X, y=None, claimed_predictions=None, claimed_accuracy=None):
+        # Recompute on the same chunks as the prover, since the numerics of a
+        # forward pass may depend on its batch size, and stop at the first
+        # rejected decode batch
+        chunk_size = resolve_chunk_size(model, prover_params["chunk_size"], len(X))
+        streaming_verifier = StreamingVerifier(
+            [ProofPoly.from_base64(p) for p in proof.split('~')],
+            decode_batching_size=prover_params["decode_batching_size"],
+            topk=prover_params["topk"],
+            skip_prefill=prover_params["skip_prefill"],
+            exp_mismatch_threshold=0,
+        )
+
+        capture = chunk_capture(model, prover_params, chunk_size)
+        recomputed_predictions = []
+
+        print(f"Recomputing activations in chunks of {chunk_size} samples...")
+        try:
+            with torch.no_grad(), inference_context(prover_params):
+                for chunk in X.split(chunk_size):
+                    recomputed_output, segments = run_model(model, chunk, prover_params.get("capture_layer"), capture)
+                    recomputed_predictions.append(torch.argmax(recomputed_output, dim=1))
+                    # the whole decode batches of a chunk are verified together
+                    for recomputed_activations in segments:
+                        streaming_verifier.extend(recomputed_activations)
+                    if streaming_verifier.rejected:
+                        break
+        finally:
+            if capture is not None:
+                capture.remove()
+        if not streaming_verifier.finish().passed:
+            return False
+        return check_claims(torch.cat(recomputed_predictions), y, claimed_predictions, claimed_accuracy)